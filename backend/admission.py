@@ -0,0 +1,241 @@
+"""
+Admission control and load shedding for check requests.
+
+Each worker process counts the checks it has in flight and keeps an
+exponentially weighted average of recent evidence fan-out latency (the
+slow upstream stage). Every request is admitted in a mode picked from those
+signals, and from how long it waited in front of the worker when the proxy
+sends an X-Request-Start header:
+
+- full: every stage runs
+- reduced: Vertex AI analysis is skipped and Custom Search results come
+  from the evidence cache only
+- local: no upstream calls; local signals, the ClaimReview index and cached
+  evidence, with untranslated text where no translation is cached
+- shed: nothing runs and the caller gets a 503 with Retry-After
+
+In-flight checks raise the mode as they pass ADMISSION_REDUCED_AT and
+ADMISSION_LOCAL_AT of ADMISSION_CAPACITY, and are shed beyond it. Evidence
+latency above ADMISSION_SLOW_MS (ADMISSION_VERY_SLOW_MS) raises it to at
+least reduced (local); queue waits above ADMISSION_QUEUE_MS raise it one
+mode per doubling. A latency average without new samples for
+ADMISSION_LATENCY_TTL_S is ignored, so once degraded requests stop calling
+upstream the next ones probe it again. Bulk requests (batches) are admitted
+one mode further down once any signal is raised.
+
+The admitted mode is kept in a context variable, copied into the evidence
+fan-out threads like the outbound priority, for the stages to read.
+"""
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+FULL = 0
+REDUCED = 1
+LOCAL = 2
+SHED = 3
+MODE_NAMES = {FULL: "full", REDUCED: "reduced", LOCAL: "local", SHED: "shed"}
+
+ADMISSION_ENABLED = os.environ.get("ADMISSION_ENABLED", "1") == "1"
+# Checks in flight per worker process before requests are shed (keep below GUNICORN_THREADS)
+ADMISSION_CAPACITY = int(os.environ.get("ADMISSION_CAPACITY", "6"))
+ADMISSION_REDUCED_AT = float(os.environ.get("ADMISSION_REDUCED_AT", "0.5"))
+ADMISSION_LOCAL_AT = float(os.environ.get("ADMISSION_LOCAL_AT", "0.75"))
+ADMISSION_SLOW_MS = float(os.environ.get("ADMISSION_SLOW_MS", "1000"))
+ADMISSION_VERY_SLOW_MS = float(os.environ.get("ADMISSION_VERY_SLOW_MS", "2500"))
+ADMISSION_QUEUE_MS = float(os.environ.get("ADMISSION_QUEUE_MS", "500"))
+ADMISSION_LATENCY_TTL_S = float(os.environ.get("ADMISSION_LATENCY_TTL_S", "5"))
+ADMISSION_EWMA_ALPHA = float(os.environ.get("ADMISSION_EWMA_ALPHA", "0.2"))
+ADMISSION_RETRY_AFTER_MAX_S = int(os.environ.get("ADMISSION_RETRY_AFTER_MAX_S", "30"))
+
+_mode: ContextVar[int] = ContextVar("admission_mode", default=FULL)
+
+
+class Overloaded(Exception):
+    """The request was shed; the caller should retry after `retry_after_s`"""
+
+    def __init__(self, retry_after_s: int):
+        super().__init__(f"Overloaded, retry after {retry_after_s}s")
+        self.retry_after_s = retry_after_s
+
+
+@contextmanager
+def mode(value: int):
+    """Run the stages in this context in the given mode (admitted requests use a Ticket)"""
+    token = _mode.set(value)
+    try:
+        yield
+    finally:
+        _mode.reset(token)
+
+
+def current_mode() -> int:
+    return _mode.get()
+
+
+def queue_ms_from_header(value: Optional[str], now: Optional[float] = None) -> float:
+    """
+    Milliseconds since an X-Request-Start header's timestamp ("t=" prefix
+    optional, in seconds, milliseconds or microseconds), 0 if absent or invalid
+    """
+    if not value:
+        return 0.0
+    try:
+        started = float(value.strip().removeprefix("t="))
+    except ValueError:
+        return 0.0
+    if started > 1e14:
+        started /= 1e6
+    elif started > 1e11:
+        started /= 1e3
+    return max(((now if now is not None else time.time()) - started) * 1000, 0.0)
+
+
+class Ewma:
+    """Exponentially weighted moving average that remembers when it was last updated"""
+
+    def __init__(self, alpha: float = ADMISSION_EWMA_ALPHA):
+        self.alpha = alpha
+        self.value: Optional[float] = None
+        self.updated_at = 0.0
+
+    def add(self, sample: float, now: float) -> None:
+        self.value = sample if self.value is None else self.value + self.alpha * (sample - self.value)
+        self.updated_at = now
+
+    def fresh(self, ttl_s: float, now: float) -> Optional[float]:
+        return self.value if self.value is not None and now - self.updated_at <= ttl_s else None
+
+
+class Ticket:
+    """One admitted request; entering it sets the mode, leaving it (or release()) frees the slot"""
+
+    def __init__(self, controller: "AdmissionController", mode: int):
+        self.controller = controller
+        self.mode = mode
+        self.started = time.monotonic()
+        self._released = False
+        self._token = None
+
+    @property
+    def mode_name(self) -> str:
+        return MODE_NAMES[self.mode]
+
+    def release(self) -> None:
+        """Idempotent: streamed responses release both when the body ends and when it is closed"""
+        if not self._released:
+            self._released = True
+            self.controller._release(self)
+
+    def __enter__(self) -> "Ticket":
+        self._token = _mode.set(self.mode)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        try:
+            _mode.reset(self._token)
+        except ValueError:
+            pass  # Left in a different context (streamed responses)
+        self.release()
+
+
+class AdmissionController:
+    """Per-process admission of checks by in-flight count, stage latency and queue wait"""
+
+    def __init__(self, capacity: int = ADMISSION_CAPACITY, enabled: bool = ADMISSION_ENABLED,
+                 reduced_at: float = ADMISSION_REDUCED_AT, local_at: float = ADMISSION_LOCAL_AT,
+                 slow_ms: float = ADMISSION_SLOW_MS, very_slow_ms: float = ADMISSION_VERY_SLOW_MS,
+                 queue_ms: float = ADMISSION_QUEUE_MS, latency_ttl_s: float = ADMISSION_LATENCY_TTL_S):
+        self.capacity = capacity
+        self.enabled = enabled
+        self.reduced_at = reduced_at
+        self.local_at = local_at
+        self.slow_ms = slow_ms
+        self.very_slow_ms = very_slow_ms
+        self.queue_ms = queue_ms
+        self.latency_ttl_s = latency_ttl_s
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._evidence_ms = Ewma()
+        self._request_ms = Ewma()
+        self._counters = {"admitted_full": 0, "admitted_reduced": 0, "admitted_local": 0, "shed": 0}
+
+    # -----------------------------
+    # Mode selection
+    # -----------------------------
+    def choose(self, in_flight: int, queue_ms: float = 0.0, bulk: bool = False,
+               now: Optional[float] = None) -> int:
+        """Mode for a request arriving with `in_flight` checks running (itself included)"""
+        if not self.enabled:
+            return FULL
+        if in_flight > self.capacity:
+            return SHED
+        now = time.monotonic() if now is None else now
+        mode = FULL
+        if in_flight > self.capacity * self.local_at:
+            mode = LOCAL
+        elif in_flight > self.capacity * self.reduced_at:
+            mode = REDUCED
+
+        evidence_ms = self._evidence_ms.fresh(self.latency_ttl_s, now)
+        if evidence_ms is not None:
+            if evidence_ms > self.very_slow_ms:
+                mode = max(mode, LOCAL)
+            elif evidence_ms > self.slow_ms:
+                mode = max(mode, REDUCED)
+
+        if self.queue_ms > 0 and queue_ms > self.queue_ms:
+            mode = max(mode, min(FULL + 1 + int(math.log2(queue_ms / self.queue_ms)), SHED))
+        if bulk and mode > FULL:
+            mode = min(mode + 1, SHED)
+        return mode
+
+    def retry_after_s(self) -> int:
+        """Roughly how long the checks in flight take to finish"""
+        request_ms = self._request_ms.value or 1000.0
+        return min(max(math.ceil(request_ms / 1000), 1), ADMISSION_RETRY_AFTER_MAX_S)
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+    def admit(self, queue_ms: float = 0.0, bulk: bool = False) -> Ticket:
+        """Ticket for a new request, or Overloaded if it is shed"""
+        with self._lock:
+            mode = self.choose(self._in_flight + 1, queue_ms, bulk)
+            if mode == SHED:
+                self._counters["shed"] += 1
+            else:
+                self._in_flight += 1
+                self._counters[f"admitted_{MODE_NAMES[mode]}"] += 1
+        if mode == SHED:
+            raise Overloaded(self.retry_after_s())
+        return Ticket(self, mode)
+
+    def _release(self, ticket: Ticket) -> None:
+        elapsed_ms = (time.monotonic() - ticket.started) * 1000
+        with self._lock:
+            self._in_flight -= 1
+            self._request_ms.add(elapsed_ms, time.monotonic())
+
+    def observe(self, stage: str, elapsed_ms: float) -> None:
+        """Record one upstream stage's latency (only "evidence" drives the mode)"""
+        if stage == "evidence":
+            with self._lock:
+                self._evidence_ms.add(elapsed_ms, time.monotonic())
+
+    def after_fork(self) -> None:
+        self._lock = threading.Lock()
+        self._in_flight = 0
+
+    def stats(self) -> Dict:
+        now = time.monotonic()
+        with self._lock:
+            evidence_ms = self._evidence_ms.fresh(self.latency_ttl_s, now)
+            return dict(self._counters, in_flight=self._in_flight, capacity=self.capacity,
+                        enabled=self.enabled, mode=MODE_NAMES[self.choose(self._in_flight + 1, now=now)],
+                        evidence_ms=round(evidence_ms, 1) if evidence_ms is not None else None,
+                        request_ms=round(self._request_ms.value or 0.0, 1))
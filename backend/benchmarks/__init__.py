@@ -0,0 +1 @@
+"""Benchmarks for the Misinformation Guardian backend (run from backend/)."""
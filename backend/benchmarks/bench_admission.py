@@ -0,0 +1,120 @@
+"""
+Latency and answer modes of /v1/check under overload, with and without
+admission control.
+
+Runs the app in-process with slow fake backends and sends --requests
+requests per concurrency level, first with admission control off (every
+request waits for the upstream calls) and then on. For each run it reports
+latency percentiles of the answered requests, the 503s and how many answers
+each mode (full, reduced, local) produced.
+
+    python -m benchmarks.bench_admission --concurrency 4,16,32 --fact-check-ms 800 --out admission.json
+"""
+import argparse
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Tuple
+
+from benchmarks.bench_load import make_payloads, percentile
+from benchmarks.fakes import FakeBackends
+from benchmarks.report import write_report
+
+
+def in_process_sender(app) -> Callable[[Dict], Tuple[int, str]]:
+    local = threading.local()
+
+    def send(payload: Dict) -> Tuple[int, str]:
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = app.test_client()
+        response = client.post("/v1/check", json=payload)
+        return response.status_code, (response.json or {}).get("mode", "")
+
+    return send
+
+
+def run_level(send: Callable[[Dict], Tuple[int, str]], payloads: List[Dict], concurrency: int) -> Dict:
+    latencies = []
+    modes = Counter()
+    lock = threading.Lock()
+    queue = iter(payloads)
+
+    def worker():
+        while True:
+            with lock:
+                payload = next(queue, None)
+            if payload is None:
+                return
+            start = time.perf_counter()
+            status, mode = send(payload)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with lock:
+                if status == 200:
+                    latencies.append(elapsed_ms)
+                modes[mode if status in (200, 503) else str(status)] += 1
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall_s = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": len(payloads),
+        "rps": round(len(latencies) / wall_s, 1),
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+        "modes": dict(sorted(modes.items())),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Overload benchmark for admission control")
+    parser.add_argument("--concurrency", default="4,16,32")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per concurrency level")
+    parser.add_argument("--size", type=int, default=1_000)
+    parser.add_argument("--lang", default="hi")
+    parser.add_argument("--capacity", type=int, default=6, help="ADMISSION_CAPACITY for the admission run")
+    parser.add_argument("--fact-check-ms", type=float, default=800)
+    parser.add_argument("--search-ms", type=float, default=600)
+    parser.add_argument("--translate-ms", type=float, default=150)
+    parser.add_argument("--vertex-ms", type=float, default=300)
+    parser.add_argument("--out", help="Write results as JSON")
+    args = parser.parse_args()
+
+    import app as app_module
+    from admission import AdmissionController
+    from evidence_cache import EvidenceCache
+
+    levels = [int(level) for level in args.concurrency.split(",")]
+    backends = FakeBackends({"fact_check": args.fact_check_ms, "search": args.search_ms,
+                             "translate": args.translate_ms, "vertex": args.vertex_ms})
+    backends.install(app_module)
+    app_module.NEAR_DUP_ENABLED = False
+    send = in_process_sender(app_module.create_app())
+
+    rows = []
+    print(f"{'scenario':<10} {'conc':>5} {'rps':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}  modes")
+    for scenario, enabled in (("off", False), ("admission", True)):
+        for level in levels:
+            # Fresh state per run: every lookup misses the cache, latency history starts empty
+            app_module.admission = AdmissionController(capacity=args.capacity, enabled=enabled)
+            app_module.evidence_cache = EvidenceCache(max_entries=0)
+            payloads = make_payloads(args.requests, [args.size], args.lang, "detailed")
+            row = dict(scenario=scenario, **run_level(send, payloads, level))
+            rows.append(row)
+            print(f"{scenario:<10} {level:>5} {row['rps']:>7} {row['p50_ms']:>9} {row['p95_ms']:>9} "
+                  f"{row['p99_ms']:>9}  {row['modes']}")
+
+    if args.out:
+        write_report(args.out, "admission", vars(args), rows, {"upstreams": backends.stats()})
+
+
+if __name__ == "__main__":
+    main()
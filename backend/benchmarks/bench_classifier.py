@@ -0,0 +1,118 @@
+"""
+Throughput of the local classifier with and without micro-batching.
+
+By default the model is a tiny randomly initialized BERT built in-process
+(vocabulary from the benchmark corpus), so nothing is downloaded; --model
+benchmarks a real model id or directory instead. For each concurrency
+level, that many threads score texts through the classifier stage with
+--max-batch 1 (one forward pass per text) and with the configured batch
+size, and the driver reports texts per second, latency and the mean batch
+size actually formed.
+
+Needs torch and transformers.
+
+    python -m benchmarks.bench_classifier [--concurrency 1,8,32] [--max-batch 16] [--threads 1]
+    python -m benchmarks.bench_classifier --model distilbert-base-uncased-finetuned-sst-2-english
+"""
+import argparse
+import re
+import threading
+import time
+from typing import Dict, List
+
+from benchmarks.bench_load import percentile
+from benchmarks.corpus import make_text
+from benchmarks.report import write_report
+
+
+def tiny_model(texts: List[str], threads: int):
+    """A two-layer BERT small enough to build in a second, with a word-level vocabulary"""
+    from tokenizers import Tokenizer, models, normalizers, pre_tokenizers
+    from transformers import BertConfig, BertForSequenceClassification, PreTrainedTokenizerFast
+    from classifier import TransformerModel
+
+    words = sorted({word for text in texts for word in re.findall(r"\w+", text.lower())})
+    vocab = {token: i for i, token in enumerate(["[PAD]", "[UNK]"] + words)}
+    backend = Tokenizer(models.WordLevel(vocab, unk_token="[UNK]"))
+    backend.normalizer = normalizers.Lowercase()
+    backend.pre_tokenizer = pre_tokenizers.Whitespace()
+    tokenizer = PreTrainedTokenizerFast(tokenizer_object=backend, unk_token="[UNK]", pad_token="[PAD]")
+    config = BertConfig(vocab_size=len(vocab), hidden_size=64, num_hidden_layers=2, num_attention_heads=2,
+                        intermediate_size=128, max_position_embeddings=512, num_labels=2)
+    return TransformerModel(BertForSequenceClassification(config), tokenizer, threads=threads)
+
+
+def run_level(model, texts: List[str], concurrency: int, max_batch: int, max_wait_ms: float,
+              per_thread: int) -> Dict:
+    from classifier import Classifier
+
+    clf = Classifier(load_model=lambda: model, max_batch=max_batch, max_wait_ms=max_wait_ms,
+                     timeout_ms=60_000)
+    clf.score(texts[0])  # Load and warm up outside the timing
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(offset: int):
+        mine = []
+        for i in range(per_thread):
+            start = time.perf_counter()
+            clf.score(texts[(offset + i) % len(texts)])
+            mine.append((time.perf_counter() - start) * 1000)
+        with lock:
+            latencies.extend(mine)
+
+    threads = [threading.Thread(target=worker, args=(n * per_thread,)) for n in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    stats = clf.stats()
+    return {
+        "concurrency": concurrency,
+        "scenario": f"max_batch={max_batch}",
+        "texts": len(latencies),
+        "texts_per_s": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "mean_batch": stats["mean_batch"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local classifier micro-batching benchmark")
+    parser.add_argument("--model", help="Model id or directory (default: tiny local BERT)")
+    parser.add_argument("--concurrency", default="1,8,32")
+    parser.add_argument("--max-batch", type=int, default=16)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--threads", type=int, default=1, help="torch intra-op threads")
+    parser.add_argument("--per-thread", type=int, default=20, help="Texts scored by each thread")
+    parser.add_argument("--size", type=int, default=280, help="Text size in bytes")
+    parser.add_argument("--out", help="Write results as JSON")
+    args = parser.parse_args()
+
+    texts = [make_text(args.size, seed=seed) for seed in range(200)]
+    if args.model:
+        from classifier import TransformerModel
+        model = TransformerModel.from_pretrained(args.model, threads=args.threads)
+    else:
+        model = tiny_model(texts, args.threads)
+
+    rows = []
+    for concurrency in [int(level) for level in args.concurrency.split(",")]:
+        for max_batch in (1, args.max_batch):
+            rows.append(run_level(model, texts, concurrency, max_batch, args.max_wait_ms, args.per_thread))
+
+    print(f"{'concurrency':>11} {'scenario':<14} {'texts/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'batch':>6}")
+    for row in rows:
+        print(f"{row['concurrency']:>11} {row['scenario']:<14} {row['texts_per_s']:>9} {row['p50_ms']:>9} "
+              f"{row['p95_ms']:>9} {row['mean_batch']:>6}")
+    if args.out:
+        write_report(args.out, "classifier", vars(args), rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Throughput and memory of re-scoring jobs (jobs.py) on synthetic exports.
+
+Writes JSONL exports of --records check documents per size (texts from the
+benchmark corpus) and runs a job over each with every --workers count. It
+reports lines per second, the speedup over one worker and the peak RSS of
+the job's own process, sampled while it runs: that should stay flat as the
+export grows, since only two chunks are held at a time.
+
+    python -m benchmarks.bench_jobs [--records 20000,200000] [--workers 1,2,4] [--out jobs.json]
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional
+
+from benchmarks.corpus import make_text
+from benchmarks.report import write_report
+
+
+def write_export(path: str, records: int, size: int) -> None:
+    # A fixed pool of texts keeps generation fast; every line is still scored
+    texts = [make_text(size, seed=seed) for seed in range(1000)]
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(records):
+            f.write(json.dumps({"id": f"check-{i}", "data": {
+                "input_text": texts[i % len(texts)], "language": "en", "risk_score": 50.0
+            }}) + "\n")
+
+
+def rss_mb() -> Optional[float]:
+    """Resident memory of this process (Linux only)"""
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+class PeakSampler:
+    def __init__(self, interval_s: float = 0.05):
+        self.interval_s = interval_s
+        self.peak = rss_mb()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            value = rss_mb()
+            if value is not None:
+                self.peak = max(self.peak or 0.0, value)
+
+    def __enter__(self) -> "PeakSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def run(sizes: List[int], workers: List[int], text_size: int, chunk_lines: int, task_lines: int) -> List[Dict]:
+    from jobs import JobStore, run_job
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        store = JobStore(os.path.join(tmp, "jobs"))
+        for records in sizes:
+            path = os.path.join(tmp, f"export-{records}.jsonl")
+            write_export(path, records, text_size)
+            base_rate = None
+            for count in workers:
+                job_id = store.create(path)
+                with PeakSampler() as sampler:
+                    started = time.perf_counter()
+                    checkpoint = run_job(os.path.join(store.root, job_id), count, chunk_lines, task_lines)
+                    wall_s = time.perf_counter() - started
+                rate = checkpoint["lines"] / wall_s
+                base_rate = base_rate or rate
+                rows.append({
+                    "scenario": f"records={records}",
+                    "workers": count,
+                    "wall_s": round(wall_s, 2),
+                    "lines_per_s": round(rate),
+                    "speedup": round(rate / base_rate, 2),
+                    "peak_rss_mb": round(sampler.peak, 1) if sampler.peak is not None else None,
+                    "rescored": checkpoint["rescored"],
+                })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-scoring job throughput benchmark")
+    parser.add_argument("--records", default="20000,200000", help="Export sizes, one run each")
+    parser.add_argument("--workers", default=",".join(str(n) for n in sorted({1, 2, os.cpu_count() or 1})))
+    parser.add_argument("--text-size", type=int, default=300)
+    parser.add_argument("--chunk-lines", type=int, default=5000)
+    parser.add_argument("--task-lines", type=int, default=100)
+    parser.add_argument("--out", help="Write results as JSON")
+    args = parser.parse_args()
+
+    rows = run([int(n) for n in args.records.split(",")], [int(n) for n in args.workers.split(",")],
+               args.text_size, args.chunk_lines, args.task_lines)
+    print(f"{'scenario':<16} {'workers':>7} {'wall s':>8} {'lines/s':>9} {'speedup':>8} {'peak RSS MB':>12}")
+    for row in rows:
+        print(f"{row['scenario']:<16} {row['workers']:>7} {row['wall_s']:>8} {row['lines_per_s']:>9} "
+              f"{row['speedup']:>8} {row['peak_rss_mb']!s:>12}")
+    if args.out:
+        write_report(args.out, "jobs", vars(args), rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Cost of a check per return_level, with and without the stage planner and
+the orjson response encoder.
+
+Runs POST /v1/check in-process against the fake backends with zero
+upstream latency by default, so the numbers are the app's own work: the
+stages a request runs, building the response and encoding it. The
+evidence cache is disabled and near-duplicate reuse is off, so every
+request does the full work for its text; all scenarios check the same texts.
+
+    python -m benchmarks.bench_levels [--requests 300] [--sizes 280,5000] [--out levels.json]
+"""
+import argparse
+import statistics
+import time
+from typing import Dict, List
+
+from flask.json.provider import DefaultJSONProvider
+
+from benchmarks.bench_load import percentile
+from benchmarks.corpus import make_text
+from benchmarks.fakes import FakeBackends
+from benchmarks.report import write_report
+
+DEFAULT_SIZES = [280, 5_000]
+LEVELS = ["simple", "detailed"]
+WARMUP = 20
+# (scenario, stage planner on, orjson encoder on)
+SCENARIOS = [
+    ("baseline", False, False),
+    ("planner", True, False),
+    ("planner+orjson", True, True),
+]
+
+
+def run(requests: int, sizes: List[int], lang: str, vertex_ms: float) -> List[Dict]:
+    import app as app_module
+    import fast_json
+    from evidence_cache import EvidenceCache
+
+    backends = FakeBackends({name: 0 for name in ("fact_check", "search", "translate", "firestore")}
+                            | {"vertex": vertex_ms}, jitter=0.0)
+    backends.install(app_module)
+    app_module.evidence_cache = EvidenceCache(max_entries=0)
+    app_module.NEAR_DUP_ENABLED = False
+    flask_app = app_module.create_app()
+    client = flask_app.test_client()
+
+    rows = []
+    for size in sizes:
+        texts = [make_text(size, seed=seed) for seed in range(requests)]
+        for return_level in LEVELS:
+            for scenario, planner, orjson in SCENARIOS:
+                if orjson and fast_json.orjson is None:
+                    print(f"Skipping {scenario}: orjson is not installed")
+                    continue
+                app_module.STAGE_PLANNER = planner
+                flask_app.json = fast_json.OrjsonProvider(flask_app) if orjson else DefaultJSONProvider(flask_app)
+
+                for text in texts[:WARMUP]:
+                    client.post("/v1/check", json={"text": text, "lang": lang, "return_level": return_level})
+                samples, body_bytes = [], 0
+                for text in texts:
+                    payload = {"text": text, "lang": lang, "return_level": return_level}
+                    start = time.perf_counter()
+                    response = client.post("/v1/check", json=payload)
+                    samples.append((time.perf_counter() - start) * 1000)
+                    assert response.status_code == 200, response.get_data(as_text=True)
+                    body_bytes += len(response.get_data())
+                samples.sort()
+                rows.append({
+                    "size_bytes": size,
+                    "return_level": return_level,
+                    "scenario": scenario,
+                    "requests": requests,
+                    "mean_ms": round(statistics.fmean(samples), 3),
+                    "p50_ms": round(percentile(samples, 50), 3),
+                    "p95_ms": round(percentile(samples, 95), 3),
+                    "rps": round(1000 / statistics.fmean(samples), 1),
+                    "body_bytes": body_bytes // requests,
+                })
+    app_module.check_writer.flush()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per return_level cost of /v1/check")
+    parser.add_argument("--requests", type=int, default=300, help="Requests per row")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES))
+    parser.add_argument("--lang", default="en")
+    parser.add_argument("--vertex-ms", type=float, default=0.0, help="Fake Vertex AI latency per analysis")
+    parser.add_argument("--out", help="Write results as JSON")
+    args = parser.parse_args()
+
+    rows = run(args.requests, [int(size) for size in args.sizes.split(",")], args.lang, args.vertex_ms)
+    print(f"{'size':>6} {'level':<9} {'scenario':<15} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} "
+          f"{'rps':>8} {'bytes':>7}")
+    for row in rows:
+        print(f"{row['size_bytes']:>6} {row['return_level']:<9} {row['scenario']:<15} {row['mean_ms']:>9} "
+              f"{row['p50_ms']:>9} {row['p95_ms']:>9} {row['rps']:>8} {row['body_bytes']:>7}")
+    if args.out:
+        write_report(args.out, "levels", vars(args), rows)
+
+
+if __name__ == "__main__":
+    main()
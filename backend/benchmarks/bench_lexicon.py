@@ -0,0 +1,107 @@
+"""
+Micro-benchmark: shared lexicon scan vs the per-helper scans it replaced.
+
+Times what one /v1/check request spends on entities, sentiment and
+manipulation signals for inputs from 1 KB to 100 KB.
+
+    python -m benchmarks.bench_lexicon
+"""
+import re
+import time
+from typing import Callable, Dict, List
+
+from lexicon import scanner
+from benchmarks.corpus import make_text
+
+SIZES = [1_000, 10_000, 100_000]
+
+
+# Reference implementations as they were before the shared scanner
+def legacy_extract_entities_basic(text: str) -> List[str]:
+    entities = []
+    health_terms = re.findall(r'\b(dengue|covid|cancer|diabetes|heart|blood|medicine|cure|treatment|vaccine|virus|disease)\b', text.lower())
+    entities.extend(health_terms)
+    numbers = re.findall(r'\b(\d+)\s*(hours?|days?|minutes?|years?)\b', text.lower())
+    entities.extend([f"{num} {unit}" for num, unit in numbers])
+    return list(set(entities))
+
+
+def legacy_analyze_sentiment_basic(text: str) -> str:
+    positive_words = ['cure', 'heal', 'effective', 'works', 'success', 'miracle']
+    negative_words = ['fake', 'false', 'dangerous', 'harmful', 'scam', 'lie']
+    pos_count = sum(1 for word in positive_words if word in text.lower())
+    neg_count = sum(1 for word in negative_words if word in text.lower())
+    if pos_count > neg_count:
+        return 'positive'
+    elif neg_count > pos_count:
+        return 'negative'
+    return 'neutral'
+
+
+def legacy_get_manipulation_signals(text: str) -> List[str]:
+    signals = []
+    text_lower = text.lower()
+    miracle_cure_words = ["cure", "miracle", "instant", "24 hours", "overnight", "guaranteed", "secret"]
+    sensational_words = ["shocking", "doctors hate", "breakthrough", "amazing", "incredible"]
+    for word in miracle_cure_words:
+        if word in text_lower:
+            signals.append("miracle cure language")
+            break
+    for word in sensational_words:
+        if word in text_lower:
+            signals.append("sensational language")
+            break
+    if len([word for word in text.split() if word.isupper()]) > len(text.split()) * 0.3:
+        signals.append("excessive capitalization")
+    if text.count('!') > 2:
+        signals.append("excessive punctuation")
+    health_keywords = ["dengue", "covid", "cancer", "diabetes", "blood pressure"]
+    cure_keywords = ["cure", "heal", "treatment", "remedy"]
+    if any(k in text_lower for k in health_keywords) and any(k in text_lower for k in cure_keywords):
+        signals.append("health rumor")
+    return list(set(signals))
+
+
+def legacy_request(text: str) -> None:
+    # Vertex analysis (entities + sentiment), signals, and the claim fallback's entities
+    legacy_extract_entities_basic(text)
+    legacy_analyze_sentiment_basic(text)
+    legacy_get_manipulation_signals(text)
+    legacy_extract_entities_basic(text)
+
+
+def scanner_request(text: str) -> None:
+    scanner.scan(text)
+
+
+def time_per_call(fn: Callable[[str], None], text: str, min_seconds: float = 0.5) -> float:
+    """Mean seconds per call over at least `min_seconds`"""
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        fn(text)
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return elapsed / calls
+
+
+def run() -> List[Dict]:
+    results = []
+    for size in SIZES:
+        text = make_text(size)
+        legacy_s = time_per_call(legacy_request, text)
+        scan_s = time_per_call(scanner_request, text)
+        results.append({
+            "size_bytes": size,
+            "legacy_us": round(legacy_s * 1e6, 1),
+            "scanner_us": round(scan_s * 1e6, 1),
+            "speedup": round(legacy_s / scan_s, 2),
+        })
+    return results
+
+
+if __name__ == "__main__":
+    print(f"{'size':>8} {'legacy µs':>12} {'scanner µs':>12} {'speedup':>8}")
+    for row in run():
+        print(f"{row['size_bytes']:>8} {row['legacy_us']:>12} {row['scanner_us']:>12} {row['speedup']:>7}x")
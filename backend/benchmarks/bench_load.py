@@ -0,0 +1,193 @@
+"""
+End-to-end load driver for POST /v1/check.
+
+By default the app runs in-process with fake backends (see fakes.py), so
+the numbers measure this code rather than Google's APIs; upstream latency
+and error rates are configurable. With --url the driver targets a running
+server instead (its backends are whatever that server uses).
+
+For every concurrency level the driver sends --requests requests from that
+many threads and reports latency percentiles and throughput of the answered
+requests, with requests shed by admission control (503) counted apart from
+errors. In-process, admission control is off unless --admission is given,
+so the numbers measure full checks.
+
+    python -m benchmarks.bench_load --concurrency 1,4,16 --requests 200 --out load.json
+    python -m benchmarks.bench_load --fact-check-ms 400 --error-rate 0.05
+    python -m benchmarks.bench_load --concurrency 16 --admission
+    python -m benchmarks.bench_load --url http://localhost:5000
+"""
+import argparse
+import itertools
+import json
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, List
+
+from benchmarks.corpus import make_text
+from benchmarks.fakes import FakeBackends
+from benchmarks.report import write_report
+
+DEFAULT_SIZES = [280, 1_000, 5_000]
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(pct / 100 * len(sorted_values))) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def make_payloads(count: int, sizes: List[int], lang: str, return_level: str) -> List[Dict]:
+    """Distinct texts of mixed sizes (the seed changes the sentence mix)"""
+    return [{"text": make_text(size, seed=seed), "lang": lang, "return_level": return_level}
+            for seed, size in zip(range(count), itertools.cycle(sizes))]
+
+
+def in_process_sender(app) -> Callable[[Dict], int]:
+    local = threading.local()
+
+    def send(payload: Dict) -> int:
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = app.test_client()
+        return client.post("/v1/check", json=payload).status_code
+
+    return send
+
+
+def http_sender(base_url: str, timeout_s: float) -> Callable[[Dict], int]:
+    import requests
+    local = threading.local()
+
+    def send(payload: Dict) -> int:
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        try:
+            return session.post(f"{base_url}/v1/check", json=payload, timeout=timeout_s).status_code
+        except requests.RequestException:
+            return 0
+
+    return send
+
+
+def run_level(send: Callable[[Dict], int], payloads: List[Dict], concurrency: int) -> Dict:
+    """Send every payload using `concurrency` threads; summarize latency of those not shed"""
+    latencies = []
+    statuses = Counter()
+    lock = threading.Lock()
+    queue = iter(payloads)
+
+    def worker():
+        while True:
+            with lock:
+                payload = next(queue, None)
+            if payload is None:
+                return
+            start = time.perf_counter()
+            status = send(payload)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with lock:
+                if status != 503:
+                    latencies.append(elapsed_ms)
+                statuses[status] += 1
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall_s = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": len(payloads),
+        "rps": round(len(latencies) / wall_s, 1),
+        "mean_ms": round(sum(latencies) / len(latencies), 1) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+        "max_ms": round(latencies[-1], 1) if latencies else 0.0,
+        "errors": sum(count for status, count in statuses.items() if status not in (200, 503)),
+        "sheds": statuses[503],
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load driver for /v1/check")
+    parser.add_argument("--concurrency", default="1,4,16")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per concurrency level")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES))
+    parser.add_argument("--lang", default="en")
+    parser.add_argument("--return-level", default="detailed")
+    parser.add_argument("--url", help="Target a running server instead of the in-process app")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    fake = parser.add_argument_group("fake backends (in-process only)")
+    fake.add_argument("--fact-check-ms", type=float, default=120)
+    fake.add_argument("--search-ms", type=float, default=80)
+    fake.add_argument("--translate-ms", type=float, default=60)
+    fake.add_argument("--vertex-ms", type=float, default=0)
+    fake.add_argument("--firestore-ms", type=float, default=30)
+    fake.add_argument("--error-rate", type=float, default=0.0)
+    fake.add_argument("--quotas", help='Per-minute quotas as JSON, e.g. \'{"custom_search": 100}\' '
+                                       "(by default the fakes are unlimited)")
+    fake.add_argument("--evidence-cache", action="store_true",
+                      help="Keep the evidence cache (by default every lookup misses)")
+    fake.add_argument("--near-dup", action="store_true", help="Keep the near-duplicate index")
+    fake.add_argument("--admission", action="store_true",
+                      help="Keep admission control on (by default every request runs in full)")
+    parser.add_argument("--out", help="Write results as JSON")
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.concurrency.split(",")]
+    sizes = [int(size) for size in args.sizes.split(",")]
+    config = dict(vars(args), concurrency=levels, sizes=sizes)
+
+    backends = None
+    if args.url:
+        send = http_sender(args.url.rstrip("/"), args.timeout)
+    else:
+        import app as app_module
+        from admission import AdmissionController
+        from evidence_cache import EvidenceCache
+
+        backends = FakeBackends({
+            "fact_check": args.fact_check_ms, "search": args.search_ms,
+            "translate": args.translate_ms, "vertex": args.vertex_ms,
+            "firestore": args.firestore_ms,
+        }, error_rate=args.error_rate, quotas_per_min=json.loads(args.quotas) if args.quotas else None)
+        backends.install(app_module)
+        if not args.evidence_cache:
+            app_module.evidence_cache = EvidenceCache(max_entries=0)
+        app_module.NEAR_DUP_ENABLED = args.near_dup
+        app_module.admission = AdmissionController(enabled=args.admission)
+        send = in_process_sender(app_module.create_app())
+
+    # Warm up one-time initialization outside the measurements
+    for payload in make_payloads(3, sizes, args.lang, args.return_level):
+        send(payload)
+
+    rows = []
+    print(f"{'conc':>5} {'reqs':>6} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7} {'sheds':>6}")
+    for level in levels:
+        payloads = make_payloads(args.requests, sizes, args.lang, args.return_level)
+        row = run_level(send, payloads, level)
+        rows.append(row)
+        print(f"{row['concurrency']:>5} {row['requests']:>6} {row['rps']:>8} {row['p50_ms']:>9} "
+              f"{row['p95_ms']:>9} {row['p99_ms']:>9} {row['errors']:>7} {row['sheds']:>6}")
+
+    extra = {}
+    if backends is not None:
+        app_module.check_writer.flush()
+        extra = {"upstreams": backends.stats(), "write_queue": app_module.check_writer.metrics()}
+    if args.out:
+        write_report(args.out, "load", config, rows, extra)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Lookup cost of the domain reputation table as it grows.
+
+Builds synthetic tables of registrable domains and namespace suffixes and
+times ReputationTable.lookup on hosts that hit a listed domain, hit through
+a subdomain, or miss. For comparison it times the substring scan over a
+list of domains that calculate_risk_score used before (capped, since it
+grows linearly with the table).
+
+    python -m benchmarks.bench_reputation [--sizes 100,10000,1000000] [--out reputation.json]
+"""
+import argparse
+import random
+import time
+from typing import Callable, Dict, List
+
+from benchmarks.report import write_report
+
+DEFAULT_SIZES = [100, 1_000, 10_000, 100_000, 1_000_000]
+TLDS = ["com", "org", "in", "gov.in", "co.uk", "edu", "int", "net"]
+# The old scan is O(table size) per lookup; skip it on bigger tables
+SCAN_MAX_SIZE = 100_000
+
+
+def make_domains(size: int, rng: random.Random) -> Dict[str, float]:
+    return {f"site{i}-{rng.randrange(10 ** 6)}.{rng.choice(TLDS)}": round(rng.random(), 2) for i in range(size)}
+
+
+def make_hosts(domains: List[str], count: int, rng: random.Random) -> List[str]:
+    hosts = []
+    for i in range(count):
+        kind = i % 3
+        if kind == 0:
+            hosts.append(rng.choice(domains))
+        elif kind == 1:
+            hosts.append(f"www.news.{rng.choice(domains)}")
+        else:
+            hosts.append(f"unknown{rng.randrange(10 ** 6)}.{rng.choice(TLDS)}")
+    return hosts
+
+
+def time_per_call(fn: Callable[[str], object], hosts: List[str]) -> float:
+    """Mean nanoseconds per call over all hosts"""
+    start = time.perf_counter()
+    for host in hosts:
+        fn(host)
+    return (time.perf_counter() - start) / len(hosts) * 1e9
+
+
+def run(sizes: List[int], lookups: int, seed: int = 0) -> List[Dict]:
+    from reputation import ReputationTable
+
+    rng = random.Random(seed)
+    rows = []
+    for size in sizes:
+        domains = make_domains(size, rng)
+        names = list(domains)
+        started = time.perf_counter()
+        table = ReputationTable(domains)
+        build_ms = (time.perf_counter() - started) * 1000
+        hosts = make_hosts(names, lookups, rng)
+
+        hits = sum(1 for host in hosts if table.lookup(host) is not None)
+        rows.append({"table_size": size, "scenario": "trie", "lookups": lookups,
+                     "ns_per_lookup": round(time_per_call(table.lookup, hosts)),
+                     "hit_rate": round(hits / lookups, 3), "build_ms": round(build_ms, 1)})
+        if size <= SCAN_MAX_SIZE:
+            sample = hosts[:max(lookups * 100 // size, 10)]
+            rows.append({"table_size": size, "scenario": "substring_scan", "lookups": len(sample),
+                         "ns_per_lookup": round(time_per_call(
+                             lambda host: any(domain in host for domain in names), sample))})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Domain reputation lookup benchmark")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES))
+    parser.add_argument("--lookups", type=int, default=100_000)
+    parser.add_argument("--out", help="Write results as JSON")
+    args = parser.parse_args()
+
+    rows = run([int(size) for size in args.sizes.split(",")], args.lookups)
+    print(f"{'table size':>10} {'scenario':<15} {'lookups':>8} {'ns/lookup':>10} {'hit rate':>9} {'build ms':>9}")
+    for row in rows:
+        print(f"{row['table_size']:>10} {row['scenario']:<15} {row['lookups']:>8} {row['ns_per_lookup']:>10} "
+              f"{row.get('hit_rate', ''):>9} {row.get('build_ms', ''):>9}")
+    if args.out:
+        write_report(args.out, "reputation", vars(args), rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Micro-benchmarks of the local pipeline stages.
+
+Times extract_claims, get_manipulation_signals and calculate_risk_score on
+inputs from a short forward to a long article. The lexicon scan cache is
+cleared before every call so each one costs what it would for a new text.
+
+    python -m benchmarks.bench_stages [--sizes 280,1000,10000,100000] [--out stages.json]
+"""
+import argparse
+import statistics
+import time
+from typing import Callable, Dict, List
+
+from benchmarks.corpus import make_text
+from benchmarks.report import write_report
+
+DEFAULT_SIZES = [280, 1_000, 10_000, 100_000]
+
+
+def sample_evidence(n: int = 8) -> List[Dict]:
+    stances = ["refute", "neutral", "support", "refute"]
+    sources = ["World Health Organization", "mohfw.gov.in", "Example Fact Check", "Local News"]
+    return [{"url": f"https://example.org/{i}", "title": f"Source {i}", "source": sources[i % 4],
+             "stance": stances[i % 4], "freshness_days": i, "snippet": "...", "api_source": "bench"}
+            for i in range(n)]
+
+
+def time_calls(fn: Callable[[], object], min_time_s: float = 0.2, max_calls: int = 10_000) -> Dict:
+    """Call `fn` repeatedly and summarize per-call latency in microseconds"""
+    samples = []
+    deadline = time.perf_counter() + min_time_s
+    while len(samples) < 3 or (time.perf_counter() < deadline and len(samples) < max_calls):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return {
+        "calls": len(samples),
+        "mean_us": round(statistics.fmean(samples), 1),
+        "p50_us": round(samples[len(samples) // 2], 1),
+        "p95_us": round(samples[min(int(len(samples) * 0.95), len(samples) - 1)], 1),
+    }
+
+
+def run(sizes: List[int], min_time_s: float = 0.2) -> List[Dict]:
+    import app
+    from lexicon import clear_cache
+
+    evidence = sample_evidence()
+    rows = []
+    for size in sizes:
+        text = make_text(size)
+        claims = app.extract_claims(text)
+        signals = app.get_manipulation_signals(text)
+
+        def claims_stage():
+            clear_cache()
+            app.extract_claims(text)
+
+        def signals_stage():
+            clear_cache()
+            app.get_manipulation_signals(text)
+
+        stages = {
+            "extract_claims": claims_stage,
+            "get_manipulation_signals": signals_stage,
+            "calculate_risk_score": lambda: app.calculate_risk_score(claims, evidence, signals),
+        }
+        for stage, fn in stages.items():
+            rows.append(dict(time_calls(fn, min_time_s), stage=stage, size_bytes=size,
+                             claims=len(claims)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stage micro-benchmarks")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES))
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds per stage and size")
+    parser.add_argument("--out", help="Write results as JSON")
+    args = parser.parse_args()
+
+    rows = run([int(size) for size in args.sizes.split(",")], args.min_time)
+    print(f"{'stage':<26} {'size':>8} {'claims':>7} {'mean µs':>11} {'p50 µs':>11} {'p95 µs':>11}")
+    for row in rows:
+        print(f"{row['stage']:<26} {row['size_bytes']:>8} {row['claims']:>7} "
+              f"{row['mean_us']:>11} {row['p50_us']:>11} {row['p95_us']:>11}")
+    if args.out:
+        write_report(args.out, "stages", {"sizes": args.sizes, "min_time_s": args.min_time}, rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Cold-start check: import the app and run create_app() in a fresh interpreter.
+
+Fails (exit code 1) if bare startup exceeds the time budget or if any heavy
+SDK was imported before a request needed it.
+
+    FIREBASE_CRED_PATH=... python -m benchmarks.bench_startup [--budget-ms 1500]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# SDKs that must stay unloaded until the feature using them runs
+LAZY_MODULES = [
+    "google.cloud.aiplatform",
+    "firebase_admin",
+    "googleapiclient.discovery",
+    "google.cloud.translate_v2",
+]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app
+app.create_app()
+elapsed_ms = (time.perf_counter() - start) * 1000
+import services
+print(json.dumps({
+    "startup_ms": round(elapsed_ms, 1),
+    "eager_modules": [m for m in %r if m in sys.modules],
+    "init_timings_ms": services.init_timings(),
+}))
+""" % (LAZY_MODULES,)
+
+
+def measure() -> dict:
+    result = subprocess.run([sys.executable, "-c", PROBE], cwd=BACKEND_DIR,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--budget-ms", type=float,
+                        default=float(os.environ.get("STARTUP_BUDGET_MS", "1500")))
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    runs = [measure() for _ in range(args.runs)]
+    best = min(runs, key=lambda run: run["startup_ms"])
+    report = dict(best, budget_ms=args.budget_ms, runs_ms=[run["startup_ms"] for run in runs])
+    print(json.dumps(report, indent=2))
+
+    if best["eager_modules"]:
+        print(f"FAIL: imported at startup: {', '.join(best['eager_modules'])}")
+        sys.exit(1)
+    if best["startup_ms"] > args.budget_ms:
+        print(f"FAIL: startup took {best['startup_ms']} ms (budget {args.budget_ms} ms)")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Accuracy, speed and memory of the trending detector on synthetic streams.
+
+Feeds a Zipf-distributed stream of claims spread over one window, plus a
+"spike" claim that only appears in the last quarter of it, into
+trending.SlidingTopK and compares the result with exact counts:
+
+- overcount: how far estimates exceed true counts, and the fraction of
+  items whose overcount exceeds the epsilon * N bound (at most delta;
+  tests/test_trending.py asserts this on a smaller stream)
+- recall of the true top-k among the reported top-k
+- where the spike ranks by growth
+- items per second and sketch memory versus an exact counter's
+
+    python -m benchmarks.bench_trending [--events 200000] [--vocab 50000] [--k 10] [--out trending.json]
+"""
+import argparse
+import random
+import sys
+import time
+from collections import Counter
+from typing import Dict, List
+
+from benchmarks.report import write_report
+
+
+def zipf_stream(events: int, vocab: int, skew: float, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    weights = [1 / (rank ** skew) for rank in range(1, vocab + 1)]
+    return [f"claim {i}" for i in rng.choices(range(vocab), weights=weights, k=events)]
+
+
+def run(events: int, vocab: int, skew: float, k: int, epsilon: float, delta: float,
+        candidates: int, spike: int, seed: int = 0) -> Dict:
+    from trending import SlidingTopK
+
+    window_s = 3600.0
+    detector = SlidingTopK(window_s=window_s, slots=12, recent_slots=3, epsilon=epsilon,
+                           delta=delta, candidates=candidates)
+    stream = zipf_stream(events, vocab, skew, seed)
+    start_at = 1_000_000 * window_s  # Aligned to a slot boundary
+    times = [start_at + window_s * i / events for i in range(events)]
+    rng = random.Random(seed + 1)
+    # The spike arrives only in the window's last quarter
+    spike_times = sorted(rng.uniform(start_at + 0.75 * window_s, start_at + window_s - 1) for _ in range(spike))
+    merged = sorted([(at, item) for at, item in zip(times, stream)] +
+                    [(at, "spike claim") for at in spike_times])
+
+    started = time.perf_counter()
+    for at, item in merged:
+        detector.add({item: item}, now=at)
+    elapsed = time.perf_counter() - started
+    now = merged[-1][0]
+
+    exact = Counter(item for _, item in merged)
+    total = sum(exact.values())
+    bound = epsilon * total
+    cells_of = detector._cells
+    slots = range(len(detector._sketches))
+    overcounts = [detector._window_estimate(cells_of(item), slots) - count for item, count in exact.items()]
+    true_top = {item for item, _ in exact.most_common(k)}
+    by_count = detector.top(k, "count", now=now)
+    by_growth = detector.top(candidates, "growth", now=now)
+    growth_rank = next((i + 1 for i, item in enumerate(by_growth["items"]) if item["text"] == "spike claim"), None)
+
+    return {
+        "scenario": f"zipf{skew}",
+        "events": total,
+        "distinct": len(exact),
+        "items_per_s": round(total / elapsed),
+        "error_bound": round(bound, 1),
+        "max_overcount": max(overcounts),
+        "mean_overcount": round(sum(overcounts) / len(overcounts), 3),
+        "over_bound_rate": round(sum(1 for over in overcounts if over > bound) / len(overcounts), 5),
+        "undercounts": sum(1 for over in overcounts if over < 0),
+        "topk_recall": round(len(true_top & {item["text"] for item in by_count["items"]}) / k, 3),
+        "spike_count": exact["spike claim"],
+        "spike_growth_rank": growth_rank,
+        "sketch_bytes": detector.memory_bytes(),
+        "exact_counter_bytes": sys.getsizeof(exact) + sum(sys.getsizeof(item) for item in exact),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trending detector accuracy benchmark")
+    parser.add_argument("--events", type=int, default=200_000)
+    parser.add_argument("--vocab", type=int, default=50_000)
+    parser.add_argument("--skews", default="1.1,0.8", help="Zipf exponents, one row each")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--epsilon", type=float, default=0.001)
+    parser.add_argument("--delta", type=float, default=0.01)
+    parser.add_argument("--candidates", type=int, default=200)
+    parser.add_argument("--spike", type=int, default=300, help="Spike occurrences in the last quarter")
+    parser.add_argument("--out", help="Write results as JSON")
+    args = parser.parse_args()
+
+    rows = [run(args.events, args.vocab, float(skew), args.k, args.epsilon, args.delta, args.candidates,
+                args.spike) for skew in args.skews.split(",")]
+    for row in rows:
+        print(", ".join(f"{key}={value}" for key, value in row.items()))
+    if args.out:
+        write_report(args.out, "trending", vars(args), rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Throughput of the production serving setup (gunicorn.conf.py) by number of
+worker processes, with fake backends.
+
+For every worker count a gunicorn server is started on benchmarks.fake_wsgi,
+loaded with bench_load's driver at a fixed concurrency and stopped again.
+With zero upstream latency (the default) the numbers measure the CPU-bound
+local stages, which should scale with workers up to the number of cores.
+Admission control is off unless --admission is given; requests it sheds
+are reported apart from errors.
+
+    python -m benchmarks.bench_workers --workers 1,2,4 --concurrency 16 --requests 400
+    python -m benchmarks.bench_workers --fact-check-ms 120 --search-ms 80 --out workers.json
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import requests
+
+from benchmarks.bench_load import DEFAULT_SIZES, http_sender, make_payloads, run_level
+from benchmarks.report import write_report
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workers: int, threads: int, port: int, latencies_ms: dict,
+                 admission: bool = False) -> subprocess.Popen:
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), GUNICORN_THREADS=str(threads),
+               BIND=f"127.0.0.1:{port}", GUNICORN_ACCESS_LOG="",
+               # The driver's keep-alive sessions would otherwise hold shutdown for the full 30s
+               GUNICORN_GRACEFUL_TIMEOUT="2",
+               BENCH_FAKE_LATENCIES_MS=json.dumps(latencies_ms), BENCH_ADMISSION="1" if admission else "0")
+    return subprocess.Popen([sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py",
+                             "benchmarks.fake_wsgi:app"],
+                            cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_ready(base_url: str, workers: int, timeout_s: float = 60.0) -> None:
+    """Wait until the server answers (and give the other workers time to boot)"""
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        try:
+            requests.get(f"{base_url}/metrics", timeout=1)
+            time.sleep(0.2 * workers)
+            return
+        except requests.RequestException:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not start within {timeout_s}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput by gunicorn worker count")
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--threads", type=int, default=8, help="Threads per worker")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=400, help="Requests per worker count")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES))
+    parser.add_argument("--return-level", default="detailed")
+    parser.add_argument("--fact-check-ms", type=float, default=0)
+    parser.add_argument("--search-ms", type=float, default=0)
+    parser.add_argument("--translate-ms", type=float, default=0)
+    parser.add_argument("--firestore-ms", type=float, default=0)
+    parser.add_argument("--admission", action="store_true", help="Keep admission control on")
+    parser.add_argument("--out", help="Write results as JSON")
+    args = parser.parse_args()
+
+    counts = [int(count) for count in args.workers.split(",")]
+    sizes = [int(size) for size in args.sizes.split(",")]
+    latencies = {"fact_check": args.fact_check_ms, "search": args.search_ms,
+                 "translate": args.translate_ms, "vertex": 0, "firestore": args.firestore_ms}
+    config = dict(vars(args), workers=counts, sizes=sizes, cpu_count=os.cpu_count())
+
+    rows = []
+    print(f"{'workers':>7} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7} {'sheds':>6} "
+          f"{'scaling':>8}")
+    for count in counts:
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        server = start_server(count, args.threads, port, latencies, args.admission)
+        try:
+            wait_ready(base_url, count)
+            send = http_sender(base_url, timeout_s=30.0)
+            for payload in make_payloads(count * 4, sizes, "en", args.return_level):
+                send(payload)
+            row = run_level(send, make_payloads(args.requests, sizes, "en", args.return_level),
+                            args.concurrency)
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+        row["workers"] = count
+        row["scaling"] = round(row["rps"] / (rows[0]["rps"] / rows[0]["workers"]) / count, 2) if rows else 1.0
+        rows.append(row)
+        print(f"{count:>7} {row['rps']:>8} {row['p50_ms']:>9} {row['p95_ms']:>9} {row['p99_ms']:>9} "
+              f"{row['errors']:>7} {row['sheds']:>6} {row['scaling']:>8}")
+
+    if args.out:
+        write_report(args.out, "workers", config, rows)
+
+
+if __name__ == "__main__":
+    main()
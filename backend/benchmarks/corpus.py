@@ -0,0 +1,44 @@
+"""
+Synthetic but realistic input corpora for benchmarks.
+
+Texts mix ordinary news-style prose with WhatsApp-style health rumors so
+lexicon hits and claim patterns appear at a plausible density.
+"""
+import random
+from typing import List
+
+PROSE = [
+    "The state government announced new guidelines on Monday for hospitals across the region.",
+    "Officials said the measures were intended to reduce waiting times and improve patient care.",
+    "Local residents expressed mixed reactions, with some welcoming the changes and others raising concerns about costs.",
+    "Experts noted that similar policies had been introduced elsewhere with varying results.",
+    "The committee will review the data again next month before making a final recommendation.",
+    "Schools in the district reopened after the monsoon break with additional safety checks.",
+    "A spokesperson for the ministry declined to comment on the timeline for the rollout.",
+]
+
+RUMORS = [
+    "Forward this message: drinking papaya leaf juice will cure dengue in 24 hours!",
+    "Doctors hate this secret remedy that cures diabetes overnight.",
+    "A SHOCKING report claims the covid vaccine is dangerous and fake!!!",
+    "Garlic water is the best treatment for high blood pressure.",
+    "Turmeric milk prevents cancer, share with everyone before it gets deleted!",
+    "Hot lemon water kills the virus in 10 minutes.",
+]
+
+
+def make_text(size: int, rumor_ratio: float = 0.15, seed: int = 0) -> str:
+    """Build a text of roughly `size` characters"""
+    rng = random.Random(seed)
+    parts = []
+    length = 0
+    while length < size:
+        sentence = rng.choice(RUMORS) if rng.random() < rumor_ratio else rng.choice(PROSE)
+        parts.append(sentence)
+        length += len(sentence) + 1
+    return " ".join(parts)[:size]
+
+
+def make_corpus(sizes: List[int], per_size: int = 5) -> List[str]:
+    """Several texts per size, each with a different seed"""
+    return [make_text(size, seed=seed) for size in sizes for seed in range(per_size)]
@@ -0,0 +1,24 @@
+"""
+WSGI app with fake backends, for benchmarking the gunicorn setup
+(bench_workers.py). Fake upstream latencies are read from
+BENCH_FAKE_LATENCIES_MS as JSON, e.g. '{"fact_check": 120, "search": 80}'.
+Admission control is off unless BENCH_ADMISSION=1, so every request runs a
+full check.
+"""
+import json
+import os
+
+import app as app_module
+from admission import AdmissionController
+from benchmarks.fakes import FakeBackends
+from evidence_cache import EvidenceCache
+
+backends = FakeBackends(json.loads(os.environ.get("BENCH_FAKE_LATENCIES_MS", "{}")))
+backends.install(app_module)
+# Workers drop the services state they inherit; put the fakes back afterwards
+os.register_at_fork(after_in_child=lambda: backends.install(app_module))
+app_module.evidence_cache = EvidenceCache(max_entries=0)
+app_module.NEAR_DUP_ENABLED = False
+app_module.admission = AdmissionController(enabled=os.environ.get("BENCH_ADMISSION", "0") == "1")
+
+app = app_module.create_app()
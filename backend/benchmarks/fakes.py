@@ -0,0 +1,254 @@
+"""
+In-process fakes of the Google and Firebase backends for benchmarks.
+
+`install(app)` puts fake Fact Check, Custom Search, Translate, Vertex AI and
+Firestore clients behind the seams the app already uses (services.py state,
+the Google client registry and the write-behind queue's client), so the
+real request pipeline runs unchanged without credentials or network.
+Each fake sleeps for a configurable latency and fails at a configurable
+rate.
+"""
+import random
+import threading
+import time
+from typing import Dict, List, Optional
+
+import services
+from scheduler import Scheduler
+
+
+class FakeUpstreamError(Exception):
+    pass
+
+
+class Upstream:
+    """Latency and error model for one fake backend"""
+
+    def __init__(self, name: str, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 error_rate: float = 0.0, seed: int = 0):
+        self.name = name
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+
+    def call(self) -> None:
+        with self._lock:
+            self.calls += 1
+            delay = max(self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms), 0.0)
+            fail = self._rng.random() < self.error_rate
+            if fail:
+                self.errors += 1
+        if delay:
+            time.sleep(delay / 1000)
+        if fail:
+            raise FakeUpstreamError(f"{self.name}: injected failure")
+
+    def stats(self) -> Dict:
+        return {"calls": self.calls, "errors": self.errors, "latency_ms": self.latency_ms,
+                "error_rate": self.error_rate}
+
+
+def _fake_claims(query: str) -> List[Dict]:
+    return [{
+        "text": query,
+        "claimReview": [{
+            "url": f"https://factcheck.example/{abs(hash(query)) % 100000}",
+            "title": f"Fact check: {query[:60]}",
+            "publisher": {"name": "Example Fact Check"},
+            "textualRating": "False",
+            "reviewDate": "2024-01-15T00:00:00Z",
+        }]
+    }]
+
+
+# -----------------------------
+# Google API clients
+# -----------------------------
+class _Request:
+    def __init__(self, upstream: Upstream, query: str):
+        self.upstream = upstream
+        self.query = query
+
+    def execute(self) -> Dict:
+        self.upstream.call()
+        return {"claims": _fake_claims(self.query)}
+
+
+class FakeFactCheckService:
+    def __init__(self, upstream: Upstream):
+        self.upstream = upstream
+
+    def claims(self):
+        return self
+
+    def search(self, query: str, languageCode: str = "en"):
+        return _Request(self.upstream, query)
+
+
+class FakeTranslateClient:
+    def __init__(self, upstream: Upstream):
+        self.upstream = upstream
+
+    def translate(self, values, target_language: str):
+        self.upstream.call()
+        if isinstance(values, list):
+            return [{"translatedText": f"[{target_language}] {value}"} for value in values]
+        return {"translatedText": f"[{target_language}] {values}"}
+
+
+class _FakeResponse:
+    status_code = 200
+    text = ""
+
+    def __init__(self, payload: Dict):
+        self._payload = payload
+
+    def json(self) -> Dict:
+        return self._payload
+
+
+class FakeHttpSession:
+    """Direct-HTTP fallback path of the Fact Check API"""
+
+    def __init__(self, upstream: Upstream):
+        self.upstream = upstream
+
+    def get(self, url: str, headers: Optional[Dict] = None, params: Optional[Dict] = None, **kwargs):
+        self.upstream.call()
+        return _FakeResponse({"claims": _fake_claims((params or {}).get("query", ""))})
+
+
+class _SearchRequest:
+    def __init__(self, upstream: Upstream, params: Dict):
+        self.upstream = upstream
+        self.params = params
+
+    def execute(self) -> Dict:
+        self.upstream.call()
+        site = self.params.get("siteSearch", "example.org")
+        return {"items": [{
+            "link": f"https://{site}/health-advisory",
+            "title": f"Health advisory: {self.params.get('q', '')[:50]}",
+            "displayLink": site,
+            "snippet": f"Official statement regarding {self.params.get('q', '')[:50]}...",
+        }]}
+
+
+class FakeSearchService:
+    """Custom Search client; one result per site query"""
+
+    def __init__(self, upstream: Upstream):
+        self.upstream = upstream
+
+    def cse(self):
+        return self
+
+    def list(self, **params):
+        return _SearchRequest(self.upstream, params)
+
+
+class FakeGoogleClients:
+    """Stands in for google_clients.GoogleClientRegistry"""
+
+    def __init__(self, fact_check: Upstream, search: Upstream, translate: Upstream):
+        self._fact_check = FakeFactCheckService(fact_check)
+        self._search = search
+        self._translate = FakeTranslateClient(translate)
+        self.http_session = FakeHttpSession(fact_check)
+
+    def fact_check(self):
+        return self._fact_check
+
+    def custom_search(self):
+        return FakeSearchService(self._search)
+
+    def translate(self):
+        return self._translate
+
+    def access_token(self) -> str:
+        return "fake-token"
+
+
+# -----------------------------
+# Firestore
+# -----------------------------
+class _FakeBatch:
+    def __init__(self, db: "FakeFirestore"):
+        self.db = db
+        self.writes = 0
+
+    def set(self, ref, data: Dict) -> None:
+        self.writes += 1
+
+    def commit(self) -> None:
+        self.db.upstream.call()
+        with self.db.lock:
+            self.db.written += self.writes
+
+
+class _FakeCollection:
+    def document(self):
+        return object()
+
+
+class FakeFirestore:
+    def __init__(self, upstream: Upstream):
+        self.upstream = upstream
+        self.lock = threading.Lock()
+        self.written = 0
+
+    def batch(self):
+        return _FakeBatch(self)
+
+    def collection(self, name: str):
+        return _FakeCollection()
+
+
+# -----------------------------
+# Installation
+# -----------------------------
+DEFAULT_LATENCIES_MS = {"fact_check": 120, "search": 80, "translate": 60, "vertex": 0, "firestore": 30}
+
+
+class FakeBackends:
+    """All fake upstreams of one benchmark run"""
+
+    def __init__(self, latencies_ms: Optional[Dict[str, float]] = None, error_rate: float = 0.0,
+                 jitter: float = 0.2, seed: int = 0, quotas_per_min: Optional[Dict[str, float]] = None):
+        latencies = dict(DEFAULT_LATENCIES_MS, **(latencies_ms or {}))
+        # Fake upstreams have no quota unless a run asks for one
+        self.quotas_per_min = quotas_per_min or {}
+        self.upstreams = {
+            name: Upstream(name, latency, latency * jitter, error_rate, seed + i)
+            for i, (name, latency) in enumerate(sorted(latencies.items()))
+        }
+
+    def install(self, app_module) -> None:
+        """Route the app's outbound calls to the fakes"""
+        up = self.upstreams
+        services._state["read_service_account"] = {
+            "project_id": "benchmark-project",
+            "client_email": "benchmark@benchmark-project.iam.gserviceaccount.com",
+        }
+        services._state["google_clients"] = FakeGoogleClients(up["fact_check"], up["search"], up["translate"])
+        services._state["firestore_import"] = object()  # SERVER_TIMESTAMP sentinel
+        services._state["vertex_init"] = True
+
+        def init_vertex() -> bool:
+            up["vertex"].call()
+            return True
+
+        services.init_vertex = init_vertex
+        app_module.check_writer.db = FakeFirestore(up["firestore"])
+        app_module.CUSTOM_SEARCH_ENGINE_ID = "benchmark-engine"
+        # The whole quota for this process; under gunicorn post_fork re-divides it
+        app_module.outbound = Scheduler(self.quotas_per_min, workers=1)
+        # Fake translations must never reach the real lesson catalog file
+        app_module.translator.catalog.path = None
+
+    def stats(self) -> Dict:
+        return {name: upstream.stats() for name, upstream in self.upstreams.items()}
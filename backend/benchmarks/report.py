@@ -0,0 +1,101 @@
+"""
+JSON result files for benchmark runs, and a comparison of two runs.
+
+Every file records the run's environment (commit, Python, CPU count) next
+to its rows so results from different machines are not mixed up silently.
+
+    python -m benchmarks.report compare baseline.json candidate.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import time
+from typing import Dict, List, Tuple
+
+# Fields that identify a row; everything numeric besides them is a measurement
+KEY_FIELDS = ("stage", "size_bytes", "workers", "concurrency", "return_level", "table_size", "scenario")
+# Measurements where a bigger number is better
+HIGHER_IS_BETTER = ("rps", "speedup", "hit_rate", "texts_per_s")
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def write_report(path: str, kind: str, config: Dict, rows: List[Dict], extra: Dict = None) -> None:
+    report = {
+        "kind": kind,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": config,
+        "rows": rows,
+    }
+    if extra:
+        report.update(extra)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {path}")
+
+
+def _row_key(row: Dict) -> Tuple:
+    return tuple((field, row[field]) for field in KEY_FIELDS if field in row)
+
+
+def compare(baseline: Dict, candidate: Dict) -> List[Dict]:
+    """Relative change of every shared measurement, per matching row"""
+    base_rows = {_row_key(row): row for row in baseline["rows"]}
+    changes = []
+    for row in candidate["rows"]:
+        base = base_rows.get(_row_key(row))
+        if base is None:
+            continue
+        for field, value in row.items():
+            old = base.get(field)
+            if field in KEY_FIELDS or not isinstance(value, (int, float)) or not isinstance(old, (int, float)):
+                continue
+            change = (value - old) / old if old else 0.0
+            better = change > 0 if field in HIGHER_IS_BETTER else change < 0
+            changes.append({"row": dict(_row_key(row)), "field": field, "baseline": old,
+                            "candidate": value, "change_pct": round(change * 100, 1),
+                            "better": better if change else None})
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark result tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    cmp_parser = sub.add_parser("compare", help="Compare two result files")
+    cmp_parser.add_argument("baseline")
+    cmp_parser.add_argument("candidate")
+    cmp_parser.add_argument("--threshold", type=float, default=5.0,
+                            help="Only show changes of at least this many percent")
+    args = parser.parse_args()
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.candidate, encoding="utf-8") as f:
+        candidate = json.load(f)
+    if baseline.get("kind") != candidate.get("kind"):
+        print(f"Warning: comparing {baseline.get('kind')} with {candidate.get('kind')} results")
+    print(f"baseline  {baseline.get('commit')} ({baseline.get('created_at')})")
+    print(f"candidate {candidate.get('commit')} ({candidate.get('created_at')})")
+    for change in compare(baseline, candidate):
+        if abs(change["change_pct"]) < args.threshold:
+            continue
+        mark = "better" if change["better"] else "worse"
+        row = " ".join(f"{key}={value}" for key, value in change["row"].items())
+        print(f"{row:<50} {change['field']:<12} {change['baseline']:>12} -> {change['candidate']:>12} "
+              f"({change['change_pct']:+.1f}%, {mark})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,437 @@
+"""
+Local ClaimReview retrieval from offline fact-check dumps.
+
+Dumps of ClaimReview records (Fact Check Tools API `claims` objects or
+schema.org ClaimReview items, as JSON or JSONL) are turned into immutable
+index segments: a BM25 inverted index plus the stored reviews, in one
+binary file per dump. Segments are memory-mapped read-only, so every worker
+on a host shares the same pages, and a search touches only the posting
+lists of the query terms.
+
+Adding a dump writes a new segment and lists it in the directory's
+manifest; running workers pick it up on their next search. `compact`
+merges all segments into one, keeping the newest copy of each review.
+
+    python claimreview_index.py --index-dir data/claimreview add dump.jsonl
+    python claimreview_index.py --index-dir data/claimreview compact
+    python claimreview_index.py --index-dir data/claimreview search "garlic cures covid"
+"""
+import argparse
+import heapq
+import json
+import math
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+CLAIMREVIEW_RELOAD_S = float(os.environ.get("CLAIMREVIEW_RELOAD_S", "30"))
+# Fraction of the query's terms a review must contain to be returned
+CLAIMREVIEW_MIN_COVERAGE = float(os.environ.get("CLAIMREVIEW_MIN_COVERAGE", "0.6"))
+
+MANIFEST = "segments.json"
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Segment layout (little-endian):
+#   header | terms table (sorted by term) | term bytes | postings | doc lengths | doc offsets | doc JSON
+_MAGIC = b"CRIDX\x00\x00\x01"
+_HEADER = struct.Struct("<8sIIdQQQQQQ")  # magic, n_docs, n_terms, avgdl, section offsets
+_TERM = struct.Struct("<IHIQ")  # term bytes offset, term length, doc frequency, postings offset
+_POSTING = struct.Struct("<IH")  # doc id, term frequency
+_DOCLEN = struct.Struct("<H")
+_DOCOFF = struct.Struct("<Q")
+
+_TOKEN = re.compile(r"\w+")
+STOPWORDS = frozenset("""
+a an and are as at be been but by can do does for from has have he her his how i if in into is it
+its just may more no not of on or our she so such than that the their them then there these they
+this to was we were what when which who will with would you your
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in _TOKEN.findall(text.casefold()) if token not in STOPWORDS]
+
+
+# -----------------------------
+# Dump parsing
+# -----------------------------
+def _from_api_claim(claim: Dict) -> Iterator[Dict]:
+    """Reviews from a Fact Check Tools API `claims` entry"""
+    for review in claim.get("claimReview", []):
+        yield {
+            "claim": claim.get("text", ""),
+            "url": review.get("url", ""),
+            "title": review.get("title", ""),
+            "publisher": review.get("publisher", {}).get("name", "Unknown"),
+            "rating": review.get("textualRating", ""),
+            "review_date": review.get("reviewDate", ""),
+            "language": review.get("languageCode", ""),
+        }
+
+
+def _from_schema_org(item: Dict) -> Iterator[Dict]:
+    """Review from a schema.org ClaimReview item"""
+    author = item.get("author") or {}
+    if isinstance(author, list):
+        author = author[0] if author else {}
+    rating = item.get("reviewRating") or {}
+    yield {
+        "claim": item.get("claimReviewed", ""),
+        "url": item.get("url", ""),
+        "title": item.get("name") or item.get("headline") or item.get("claimReviewed", ""),
+        "publisher": author.get("name", "Unknown"),
+        "rating": rating.get("alternateName", ""),
+        "review_date": item.get("datePublished", ""),
+        "language": item.get("inLanguage", ""),
+    }
+
+
+def _reviews_from(obj) -> Iterator[Dict]:
+    if isinstance(obj, list):
+        for item in obj:
+            yield from _reviews_from(item)
+    elif isinstance(obj, dict):
+        if "claimReview" in obj:
+            yield from _from_api_claim(obj)
+        elif obj.get("@type") == "ClaimReview":
+            yield from _from_schema_org(obj)
+        elif "claims" in obj:
+            yield from _reviews_from(obj["claims"])
+        elif "dataFeedElement" in obj:
+            for element in obj["dataFeedElement"]:
+                yield from _reviews_from(element.get("item", []))
+
+
+def iter_claim_reviews(path: str) -> Iterator[Dict]:
+    """Reviews from a JSON or JSONL dump; records without a URL are skipped"""
+    with open(path, "r", encoding="utf-8") as f:
+        first = f.read(1)
+        while first and first.isspace():
+            first = f.read(1)
+        f.seek(0)
+        if first == "[" or path.endswith(".json"):
+            records = _reviews_from(json.load(f))
+        else:
+            records = (review for line in f if line.strip()
+                       for review in _reviews_from(json.loads(line)))
+        for review in records:
+            if review["url"]:
+                yield review
+
+
+# -----------------------------
+# Segments
+# -----------------------------
+def write_segment(reviews: Iterable[Dict], path: str) -> int:
+    """Write one immutable segment; later reviews with the same URL win"""
+    by_url = {}
+    for review in reviews:
+        by_url[review["url"]] = review
+    docs = list(by_url.values())
+
+    postings: Dict[str, List[Tuple[int, int]]] = {}
+    doc_lengths = []
+    for doc_id, doc in enumerate(docs):
+        tokens = tokenize(f"{doc['claim']} {doc['title']}")
+        doc_lengths.append(min(len(tokens), 0xFFFF))
+        counts: Dict[str, int] = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        for token, tf in counts.items():
+            postings.setdefault(token, []).append((doc_id, min(tf, 0xFFFF)))
+
+    terms = sorted(postings, key=lambda term: term.encode("utf-8"))
+    term_blob = bytearray()
+    posting_blob = bytearray()
+    term_table = bytearray()
+    for term in terms:
+        encoded = term.encode("utf-8")
+        term_table += _TERM.pack(len(term_blob), len(encoded), len(postings[term]), len(posting_blob))
+        term_blob += encoded
+        for doc_id, tf in postings[term]:
+            posting_blob += _POSTING.pack(doc_id, tf)
+
+    doc_blob = bytearray()
+    doc_offsets = bytearray()
+    for doc in docs:
+        doc_offsets += _DOCOFF.pack(len(doc_blob))
+        doc_blob += json.dumps(doc, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    doc_offsets += _DOCOFF.pack(len(doc_blob))
+
+    avgdl = sum(doc_lengths) / len(docs) if docs else 0.0
+    off_terms = _HEADER.size
+    off_term_blob = off_terms + len(term_table)
+    off_postings = off_term_blob + len(term_blob)
+    off_doclens = off_postings + len(posting_blob)
+    off_docoffs = off_doclens + _DOCLEN.size * len(docs)
+    off_docs = off_docoffs + len(doc_offsets)
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, len(docs), len(terms), avgdl, off_terms, off_term_blob,
+                             off_postings, off_doclens, off_docoffs, off_docs))
+        f.write(term_table)
+        f.write(term_blob)
+        f.write(posting_blob)
+        f.write(b"".join(_DOCLEN.pack(length) for length in doc_lengths))
+        f.write(doc_offsets)
+        f.write(doc_blob)
+    os.replace(tmp_path, path)
+    return len(docs)
+
+
+class Segment:
+    """Read-only, memory-mapped view of one segment file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, self.n_docs, self.n_terms, self.avgdl, self._off_terms, self._off_term_blob,
+         self._off_postings, self._off_doclens, self._off_docoffs, self._off_docs) = \
+            _HEADER.unpack_from(self._mm, 0)
+        if magic != _MAGIC:
+            self._mm.close()
+            raise ValueError(f"{path} is not a ClaimReview index segment")
+
+    def lookup(self, term: str) -> Optional[Tuple[int, int]]:
+        """(doc frequency, postings offset) of a term, by binary search"""
+        key = term.encode("utf-8")
+        mm = self._mm
+        lo, hi = 0, self.n_terms
+        while lo < hi:
+            mid = (lo + hi) // 2
+            blob_off, length, df, post_off = _TERM.unpack_from(mm, self._off_terms + mid * _TERM.size)
+            start = self._off_term_blob + blob_off
+            candidate = mm[start:start + length]
+            if candidate < key:
+                lo = mid + 1
+            elif candidate > key:
+                hi = mid
+            else:
+                return df, post_off
+        return None
+
+    def postings(self, df: int, post_off: int) -> Iterator[Tuple[int, int]]:
+        start = self._off_postings + post_off
+        return _POSTING.iter_unpack(self._mm[start:start + df * _POSTING.size])
+
+    def doc_length(self, doc_id: int) -> int:
+        return _DOCLEN.unpack_from(self._mm, self._off_doclens + doc_id * _DOCLEN.size)[0]
+
+    def document(self, doc_id: int) -> Dict:
+        start, end = struct.unpack_from("<QQ", self._mm, self._off_docoffs + doc_id * _DOCOFF.size)
+        return json.loads(self._mm[self._off_docs + start:self._off_docs + end])
+
+    def documents(self) -> Iterator[Dict]:
+        for doc_id in range(self.n_docs):
+            yield self.document(doc_id)
+
+    def close(self) -> None:
+        self._mm.close()
+
+
+# -----------------------------
+# Index
+# -----------------------------
+class ClaimReviewIndex:
+    """BM25 search over all segments listed in an index directory's manifest"""
+
+    def __init__(self, index_dir: str, reload_s: float = CLAIMREVIEW_RELOAD_S,
+                 min_coverage: float = CLAIMREVIEW_MIN_COVERAGE):
+        self.index_dir = index_dir
+        self.reload_s = reload_s
+        self.min_coverage = min_coverage
+        self._segments: List[Segment] = []
+        self._manifest_mtime = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._counters = {"searches": 0, "hits": 0, "reloads": 0}
+        self._reload()
+
+    # -----------------------------
+    # Manifest
+    # -----------------------------
+    def _manifest_path(self) -> str:
+        return os.path.join(self.index_dir, MANIFEST)
+
+    def _read_manifest(self) -> List[str]:
+        try:
+            with open(self._manifest_path(), "r", encoding="utf-8") as f:
+                return json.load(f)["segments"]
+        except FileNotFoundError:
+            return []
+
+    def _write_manifest(self, names: List[str]) -> None:
+        tmp_path = self._manifest_path() + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"segments": names}, f, indent=2)
+        os.replace(tmp_path, self._manifest_path())
+
+    def _reload(self) -> None:
+        """Open segments that were added since the last load (oldest first)"""
+        try:
+            mtime = os.stat(self._manifest_path()).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime == self._manifest_mtime:
+            return
+        names = self._read_manifest() if mtime is not None else []
+        current = {os.path.basename(segment.path): segment for segment in self._segments}
+        segments = []
+        for name in names:
+            segment = current.pop(name, None)
+            if segment is None:
+                try:
+                    segment = Segment(os.path.join(self.index_dir, name))
+                except (OSError, ValueError) as e:
+                    print(f"Could not open ClaimReview segment {name}: {e}")
+                    continue
+            segments.append(segment)
+        self._segments = segments
+        self._manifest_mtime = mtime
+        # Dropped segments are unmapped once in-flight searches release them
+        self._counters["reloads"] += 1
+
+    def _maybe_reload(self) -> None:
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_s:
+            return
+        with self._lock:
+            if now - self._checked_at >= self.reload_s:
+                self._checked_at = now
+                self._reload()
+
+    # -----------------------------
+    # Search
+    # -----------------------------
+    def search(self, query: str, k: int = 5) -> List[Dict]:
+        """Top-k reviews for a claim query, each with its BM25 `score`"""
+        self._maybe_reload()
+        segments = self._segments
+        self._counters["searches"] += 1
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or not segments:
+            return []
+
+        n_docs = sum(segment.n_docs for segment in segments)
+        avgdl = sum(segment.avgdl * segment.n_docs for segment in segments) / max(n_docs, 1)
+        found = [[(segment, segment.lookup(term)) for segment in segments] for term in terms]
+
+        # (segment index, doc id) -> [score, matched terms]
+        scores: Dict[Tuple[int, int], List] = {}
+        for term_hits in found:
+            df = sum(hit[0] for _, hit in term_hits if hit)
+            if not df:
+                continue
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            for seg_index, (segment, hit) in enumerate(term_hits):
+                if not hit:
+                    continue
+                for doc_id, tf in segment.postings(*hit):
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * segment.doc_length(doc_id) / avgdl)
+                    entry = scores.setdefault((seg_index, doc_id), [0.0, 0])
+                    entry[0] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+                    entry[1] += 1
+
+        needed = math.ceil(len(terms) * self.min_coverage)
+        candidates = [(score, key) for key, (score, matched) in scores.items() if matched >= needed]
+        docs: Dict[Tuple[int, int], Dict] = {}
+        if len(segments) > 1:
+            # A review re-published in a later dump is in several segments (URLs are unique
+            # within one): keep only the copy from the newest segment, whatever it scores
+            newest: Dict[str, Tuple[int, int]] = {}
+            for _, key in candidates:
+                docs[key] = segments[key[0]].document(key[1])
+                url = docs[key]["url"]
+                if url not in newest or key[0] > newest[url][0]:
+                    newest[url] = key
+            candidates = [(score, key) for score, key in candidates if newest[docs[key]["url"]] == key]
+
+        results = []
+        for score, (seg_index, doc_id) in heapq.nlargest(k, candidates):
+            doc = docs.get((seg_index, doc_id)) or segments[seg_index].document(doc_id)
+            results.append(dict(doc, score=round(score, 3)))
+        if results:
+            self._counters["hits"] += 1
+        return results
+
+    # -----------------------------
+    # Maintenance
+    # -----------------------------
+    def add_dump(self, dump_path: str) -> str:
+        """Index a dump as a new segment and publish it in the manifest"""
+        os.makedirs(self.index_dir, exist_ok=True)
+        with self._lock:
+            names = self._read_manifest()
+            name = f"seg-{int(time.time() * 1000)}-{os.getpid()}.crix"
+            count = write_segment(iter_claim_reviews(dump_path), os.path.join(self.index_dir, name))
+            self._write_manifest(names + [name])
+            self._manifest_mtime = None
+            self._reload()
+        print(f"Indexed {count} reviews from {dump_path} into {name}")
+        return name
+
+    def compact(self) -> Optional[str]:
+        """Merge every segment into one; newer segments win on duplicate URLs"""
+        with self._lock:
+            self._manifest_mtime = None
+            self._reload()
+            old_names = [os.path.basename(segment.path) for segment in self._segments]
+            if len(old_names) < 2:
+                return None
+            name = f"seg-{int(time.time() * 1000)}-{os.getpid()}.crix"
+            reviews = (doc for segment in self._segments for doc in segment.documents())
+            count = write_segment(reviews, os.path.join(self.index_dir, name))
+            self._write_manifest([name])
+            self._manifest_mtime = None
+            self._reload()
+        # Workers that still map the old files keep reading them until they reload
+        for old in old_names:
+            try:
+                os.remove(os.path.join(self.index_dir, old))
+            except OSError as e:
+                print(f"Could not remove old segment {old}: {e}")
+        print(f"Compacted {len(old_names)} segments into {name} ({count} reviews)")
+        return name
+
+    def stats(self) -> Dict:
+        return dict(self._counters, segments=len(self._segments),
+                    documents=sum(segment.n_docs for segment in self._segments))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local ClaimReview index tools")
+    parser.add_argument("--index-dir", default=os.environ.get("CLAIMREVIEW_INDEX_DIR", "data/claimreview"))
+    sub = parser.add_subparsers(dest="command", required=True)
+    add = sub.add_parser("add", help="Index one or more dumps as new segments")
+    add.add_argument("dumps", nargs="+")
+    sub.add_parser("compact", help="Merge all segments into one")
+    search = sub.add_parser("search", help="Run a query against the index")
+    search.add_argument("query")
+    search.add_argument("-k", type=int, default=5)
+    args = parser.parse_args()
+
+    index = ClaimReviewIndex(args.index_dir, reload_s=0)
+    if args.command == "add":
+        for dump in args.dumps:
+            index.add_dump(dump)
+    elif args.command == "compact":
+        if index.compact() is None:
+            print("Nothing to compact")
+    else:
+        start = time.perf_counter()
+        results = index.search(args.query, k=args.k)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        for review in results:
+            print(f"{review['score']:7.3f}  [{review['rating']}] {review['claim'][:80]}  ({review['url']})")
+        print(f"{len(results)} result(s) in {elapsed_ms:.2f} ms; {index.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Claim extraction.
+
+The input is split into sentences and the health-claim patterns are matched
+against one sentence at a time. Each pattern is anchored on its keyword
+("cure", "is the best treatment for", "in 24 hours") rather than starting
+with a lazy `(.+?)` scanned from every offset of the whole text, so the
+work stays linear in the input length. A sentence yields at most one claim,
+identical claims are dropped, and extraction stops after `max_claims`
+because every claim becomes a set of remote evidence lookups.
+
+Long documents are processed as a generator over fixed-size chunks: only
+the current chunk and an unfinished trailing sentence are held at once.
+"""
+import os
+import re
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from evidence_cache import normalize_claim_query
+
+# Claims sent on to evidence lookup per text
+MAX_CLAIMS = int(os.environ.get("CLAIMS_MAX", "5"))
+# Characters read per step when scanning long documents
+CHUNK_CHARS = 64 * 1024
+# A "sentence" without punctuation is cut at this length (at a space when possible)
+MAX_SENTENCE_CHARS = 1000
+
+# Sentence boundary: terminal punctuation (including the Devanagari danda)
+# followed by whitespace, or a newline
+_BOUNDARY = re.compile(r"[.!?\u0964]+(?=\s)|\n")
+_TRAILING = ".!?\u0964 \t\r\n"
+
+_ACTION = re.compile(r"\s(cure|heal|treat|prevent)s?\s")
+_BEST_FOR = re.compile(r"\sis\s+the\s+best\s+(treatment|cure|remedy)\s+for\s")
+_TIMEFRAME = re.compile(r"\sin\s+(\d+)\s+(hours?|days?|minutes?)$")
+
+
+def match_sentence(sentence: str) -> Optional[List[str]]:
+    """Entities of the first health-claim pattern matching a lowercased sentence"""
+    match = _ACTION.search(sentence)
+    if match:
+        return [sentence[:match.start()], match.group(1), sentence[match.end():]]
+    match = _BEST_FOR.search(sentence)
+    if match:
+        return [sentence[:match.start()], match.group(1), sentence[match.end():]]
+    match = _TIMEFRAME.search(sentence)
+    if match:
+        return [sentence[:match.start()], match.group(1), match.group(2)]
+    return None
+
+
+def iter_sentences(chunks: Iterable[str]) -> Iterator[str]:
+    """Sentences across a stream of text chunks, holding one partial sentence at a time"""
+    buffer = ""
+    for chunk in chunks:
+        buffer += chunk
+        start = 0
+        for boundary in _BOUNDARY.finditer(buffer):
+            yield buffer[start:boundary.end()]
+            start = boundary.end()
+        while len(buffer) - start > MAX_SENTENCE_CHARS:
+            cut = buffer.rfind(" ", start, start + MAX_SENTENCE_CHARS)
+            cut = cut + 1 if cut > start else start + MAX_SENTENCE_CHARS
+            yield buffer[start:cut]
+            start = cut
+        buffer = buffer[start:]
+    if buffer:
+        yield buffer
+
+
+def iter_chunks(text: str, size: int = CHUNK_CHARS) -> Iterator[str]:
+    for start in range(0, len(text), size):
+        yield text[start:start + size]
+
+
+def iter_claims(chunks: Iterable[str], max_claims: int = MAX_CLAIMS) -> Iterator[Dict]:
+    """Distinct health claims from a stream of text chunks, at most `max_claims`"""
+    if max_claims <= 0:
+        return
+    seen = set()
+    for sentence in iter_sentences(chunks):
+        sentence = sentence.strip().lower().rstrip(_TRAILING)
+        entities = match_sentence(sentence) if sentence else None
+        if entities is None:
+            continue
+        key = normalize_claim_query(sentence)
+        if key in seen:
+            continue
+        seen.add(key)
+        yield {
+            "text": sentence,
+            "type": "fact",
+            "entities": [entity.strip() for entity in entities if entity.strip()],
+            "confidence": 0.8
+        }
+        if len(seen) >= max_claims:
+            return
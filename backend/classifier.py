@@ -0,0 +1,223 @@
+"""
+Optional local misinformation classifier.
+
+A Hugging Face sequence-classification model (CLASSIFIER_MODEL: a model id
+or a local directory) scores each checked text on CPU, and the probability
+of its misinformation label feeds calculate_risk_score. With no model
+configured the stage is off and scoring is unchanged.
+
+Concurrent requests are micro-batched: a worker thread collects submitted
+texts until it has CLASSIFIER_MAX_BATCH of them or the oldest has waited
+CLASSIFIER_MAX_WAIT_MS, then runs one padded forward pass for all of them.
+Requests submit their text before the evidence lookups and collect the
+score afterwards, so the forward pass overlaps the network wait. The model
+is loaded by the worker thread on first use, once per process (so a
+gunicorn master never runs torch before forking); a request whose score is
+not ready within CLASSIFIER_TIMEOUT_MS is scored without it.
+"""
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import services
+
+CLASSIFIER_MODEL = os.environ.get("CLASSIFIER_MODEL", "")
+# Output index of the misinformation label, or its name in the model's label2id
+CLASSIFIER_LABEL = os.environ.get("CLASSIFIER_LABEL", "1")
+CLASSIFIER_MAX_BATCH = int(os.environ.get("CLASSIFIER_MAX_BATCH", "16"))
+CLASSIFIER_MAX_WAIT_MS = float(os.environ.get("CLASSIFIER_MAX_WAIT_MS", "5"))
+CLASSIFIER_TIMEOUT_MS = float(os.environ.get("CLASSIFIER_TIMEOUT_MS", "2000"))
+# torch intra-op threads per process; 0 keeps torch's default (one per core)
+CLASSIFIER_THREADS = int(os.environ.get("CLASSIFIER_THREADS", "0"))
+CLASSIFIER_MAX_TOKENS = int(os.environ.get("CLASSIFIER_MAX_TOKENS", "256"))
+# Share of the risk score the classifier contributes
+CLASSIFIER_WEIGHT = float(os.environ.get("CLASSIFIER_WEIGHT", "0.2"))
+
+
+# -----------------------------
+# Model
+# -----------------------------
+def resolve_label(config, label: str) -> int:
+    if label.isdigit():
+        return int(label)
+    label2id = {name.lower(): index for name, index in (getattr(config, "label2id", None) or {}).items()}
+    if label.lower() not in label2id:
+        raise ValueError(f"Model has no label {label!r} (labels: {sorted(label2id)})")
+    return label2id[label.lower()]
+
+
+class TransformerModel:
+    """Batched misinformation probabilities from a sequence-classification model"""
+
+    def __init__(self, model, tokenizer, label: str = CLASSIFIER_LABEL, threads: int = CLASSIFIER_THREADS,
+                 max_tokens: int = CLASSIFIER_MAX_TOKENS):
+        import torch
+        if threads > 0:
+            torch.set_num_threads(threads)
+        model.eval()
+        self.model = model
+        self.tokenizer = tokenizer
+        self.max_tokens = max_tokens
+        self.label_index = resolve_label(model.config, label) if model.config.num_labels > 1 else 0
+
+    @classmethod
+    def from_pretrained(cls, name_or_path: str, **kwargs) -> "TransformerModel":
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer
+        return cls(AutoModelForSequenceClassification.from_pretrained(name_or_path),
+                   AutoTokenizer.from_pretrained(name_or_path), **kwargs)
+
+    def predict_batch(self, texts: List[str]) -> List[float]:
+        import torch
+        inputs = self.tokenizer(texts, padding=True, truncation=True, max_length=self.max_tokens,
+                                return_tensors="pt")
+        with torch.inference_mode():
+            logits = self.model(**inputs).logits
+        if logits.shape[-1] == 1:
+            probabilities = torch.sigmoid(logits[:, 0])
+        else:
+            probabilities = torch.softmax(logits, dim=-1)[:, self.label_index]
+        return probabilities.tolist()
+
+
+# -----------------------------
+# Micro-batching
+# -----------------------------
+class PendingScore:
+    __slots__ = ("text", "submitted", "done", "score", "error")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.submitted = time.monotonic()
+        self.done = threading.Event()
+        self.score: Optional[float] = None
+        self.error: Optional[BaseException] = None
+
+
+class MicroBatcher:
+    """Runs `predict_batch` on texts submitted by concurrent callers, a batch at a time"""
+
+    def __init__(self, predict_batch: Callable[[List[str]], Sequence[float]],
+                 max_batch: int = CLASSIFIER_MAX_BATCH, max_wait_ms: float = CLASSIFIER_MAX_WAIT_MS,
+                 name: str = "classifier"):
+        self.predict_batch = predict_batch
+        self.max_batch = max(max_batch, 1)
+        self.max_wait_s = max_wait_ms / 1000
+        self.name = name
+        self._cond = threading.Condition()
+        self._queue: deque = deque()
+        self._thread: Optional[threading.Thread] = None
+        self._counters = {"submitted": 0, "batches": 0, "scored": 0, "errors": 0, "largest_batch": 0}
+
+    def submit(self, text: str) -> PendingScore:
+        pending = PendingScore(text)
+        with self._cond:
+            self._queue.append(pending)
+            self._counters["submitted"] += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=f"{self.name}-batcher", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return pending
+
+    def _next_batch(self) -> List[PendingScore]:
+        with self._cond:
+            while not self._queue:
+                self._cond.wait()
+            # Fill up until the oldest text has waited max_wait
+            deadline = self._queue[0].submitted + self.max_wait_s
+            while len(self._queue) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            return [self._queue.popleft() for _ in range(min(self.max_batch, len(self._queue)))]
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            try:
+                scores = self.predict_batch([pending.text for pending in batch])
+                for pending, score in zip(batch, scores):
+                    pending.score = float(score)
+                with self._cond:
+                    self._counters["batches"] += 1
+                    self._counters["scored"] += len(batch)
+                    self._counters["largest_batch"] = max(self._counters["largest_batch"], len(batch))
+            except Exception as e:
+                print(f"{self.name} batch of {len(batch)} failed: {e}")
+                with self._cond:
+                    self._counters["errors"] += 1
+                for pending in batch:
+                    pending.error = e
+            finally:
+                for pending in batch:
+                    pending.done.set()
+
+    def after_fork(self) -> None:
+        """The batching thread and its queue belong to the parent"""
+        self._cond = threading.Condition()
+        self._queue = deque()
+        self._thread = None
+
+    def stats(self) -> Dict:
+        with self._cond:
+            stats = dict(self._counters, queued=len(self._queue))
+        stats["mean_batch"] = round(stats["scored"] / stats["batches"], 2) if stats["batches"] else 0.0
+        return stats
+
+
+# -----------------------------
+# Classifier stage
+# -----------------------------
+class Classifier:
+    """Lazily loaded model behind a micro-batcher; every method is a no-op when disabled"""
+
+    def __init__(self, model_name: str = CLASSIFIER_MODEL, load_model: Optional[Callable[[], Any]] = None,
+                 max_batch: int = CLASSIFIER_MAX_BATCH, max_wait_ms: float = CLASSIFIER_MAX_WAIT_MS,
+                 timeout_ms: float = CLASSIFIER_TIMEOUT_MS):
+        self.model_name = model_name
+        self._load_model = load_model or (lambda: TransformerModel.from_pretrained(model_name))
+        self.enabled = bool(model_name) or load_model is not None
+        self.timeout_s = timeout_ms / 1000
+        self._model = None
+        self._timeouts = 0
+        self.batcher = MicroBatcher(self._predict_batch, max_batch, max_wait_ms)
+
+    def _predict_batch(self, texts: List[str]) -> List[float]:
+        if self._model is None:
+            try:
+                with services.timed("classifier_model"):
+                    self._model = self._load_model()
+            except Exception as e:
+                print(f"Classifier model {self.model_name or 'custom'} failed to load, disabling: {e}")
+                self.enabled = False
+                raise
+        return self._model.predict_batch(texts)
+
+    def submit(self, text: str) -> Optional[PendingScore]:
+        """Queue a text for scoring; pass the result to result()"""
+        if not self.enabled:
+            return None
+        return self.batcher.submit(text)
+
+    def result(self, pending: Optional[PendingScore]) -> Optional[float]:
+        """The misinformation probability, or None if disabled, failed or late"""
+        if pending is None:
+            return None
+        remaining = pending.submitted + self.timeout_s - time.monotonic()
+        if not pending.done.wait(max(remaining, 0.0)):
+            self._timeouts += 1
+            return None
+        return pending.score
+
+    def score(self, text: str) -> Optional[float]:
+        return self.result(self.submit(text))
+
+    def after_fork(self) -> None:
+        self.batcher.after_fork()
+
+    def stats(self) -> Dict:
+        return dict(self.batcher.stats(), enabled=self.enabled, loaded=self._model is not None,
+                    model=self.model_name, timeouts=self._timeouts)
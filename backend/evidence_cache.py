@@ -0,0 +1,187 @@
+"""
+Evidence cache for remote fact-check and search lookups.
+
+Entries are keyed by (source, normalized claim query) and kept in a bounded
+in-memory LRU with per-source TTLs. Empty results are cached too, for a
+shorter time, so unanswerable claims do not hit the APIs on every request.
+An optional SQLite file adds a second tier that survives restarts and can
+be shared by all workers on a host. Concurrent misses for the same query
+share one upstream call (see singleflight.py); with SINGLEFLIGHT_LOCK_DIR
+and the SQLite tier, so do the workers on a host.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from singleflight import SINGLEFLIGHT_LOCK_DIR, SingleFlight
+
+# Default time-to-live per source kind, in seconds
+DEFAULT_TTLS = {
+    "fact_check": int(os.environ.get("EVIDENCE_CACHE_TTL_FACT_CHECK_S", str(6 * 3600))),
+    "search": int(os.environ.get("EVIDENCE_CACHE_TTL_SEARCH_S", "3600")),
+}
+DEFAULT_TTL = 3600
+NEGATIVE_TTL = int(os.environ.get("EVIDENCE_CACHE_NEGATIVE_TTL_S", "300"))
+MAX_ENTRIES = int(os.environ.get("EVIDENCE_CACHE_SIZE", "10000"))
+QUERY_MAX_CHARS = 100
+
+
+def normalize_claim_query(text: str) -> str:
+    """Case-fold, collapse whitespace and truncate like claim['text'][:100]"""
+    return " ".join(text.casefold().split())[:QUERY_MAX_CHARS]
+
+
+class EvidenceCache:
+    """Thread-safe TTL/LRU cache of evidence lists with an optional SQLite tier"""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, ttls: Dict[str, int] = None,
+                 negative_ttl: int = NEGATIVE_TTL, db_path: Optional[str] = None,
+                 lock_dir: Optional[str] = SINGLEFLIGHT_LOCK_DIR):
+        self.max_entries = max_entries
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.negative_ttl = negative_ttl
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, List[Dict]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "disk_hits": 0, "negative_hits": 0,
+                          "misses": 0, "evictions": 0}
+        self._db = None
+        self._db_path = db_path
+        self._db_lock = threading.Lock()
+        if db_path:
+            self._open_db(db_path)
+        # Other workers' results are only visible through the SQLite tier
+        self.flights = SingleFlight("evidence", lock_dir=lock_dir if db_path else None)
+
+    def after_fork(self) -> None:
+        """SQLite connections must not be used across fork(); reopen in the child"""
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self.flights.after_fork()
+        if self._db is not None:
+            self._db = None
+            self._open_db(self._db_path)
+
+    # -----------------------------
+    # SQLite tier
+    # -----------------------------
+    def _open_db(self, db_path: str) -> None:
+        self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=5)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS evidence_cache ("
+            " source TEXT NOT NULL, query TEXT NOT NULL,"
+            " expires_at REAL NOT NULL, payload TEXT NOT NULL,"
+            " PRIMARY KEY (source, query))"
+        )
+        self._db.execute("DELETE FROM evidence_cache WHERE expires_at < ?", (time.time(),))
+        self._db.commit()
+
+    def _db_get(self, key: Tuple[str, str]) -> Optional[Tuple[float, List[Dict]]]:
+        if self._db is None:
+            return None
+        try:
+            with self._db_lock:
+                row = self._db.execute(
+                    "SELECT expires_at, payload FROM evidence_cache WHERE source = ? AND query = ?",
+                    key,
+                ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Evidence cache read error: {e}")
+            return None
+        if row is None or row[0] < time.time():
+            return None
+        return row[0], json.loads(row[1])
+
+    def _db_set(self, key: Tuple[str, str], expires_at: float, evidence: List[Dict]) -> None:
+        if self._db is None:
+            return
+        try:
+            with self._db_lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO evidence_cache (source, query, expires_at, payload)"
+                    " VALUES (?, ?, ?, ?)",
+                    (key[0], key[1], expires_at, json.dumps(evidence)),
+                )
+                self._db.commit()
+        except sqlite3.Error as e:
+            print(f"Evidence cache write error: {e}")
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+    def ttl_for(self, source: str, evidence: List[Dict]) -> int:
+        if not evidence:
+            return self.negative_ttl
+        return self.ttls.get(source.split(":", 1)[0], DEFAULT_TTL)
+
+    def get(self, source: str, query: str) -> Optional[List[Dict]]:
+        """Return cached evidence, or None on a miss"""
+        key = (source, normalize_claim_query(query))
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] >= now:
+                    self._entries.move_to_end(key)
+                    self._counters["hits"] += 1
+                    if not entry[1]:
+                        self._counters["negative_hits"] += 1
+                    return [dict(e) for e in entry[1]]
+                del self._entries[key]
+
+        entry = self._db_get(key)
+        with self._lock:
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+            self._counters["disk_hits"] += 1
+            if not entry[1]:
+                self._counters["negative_hits"] += 1
+            self._store(key, entry)
+        return [dict(e) for e in entry[1]]
+
+    def set(self, source: str, query: str, evidence: List[Dict]) -> None:
+        key = (source, normalize_claim_query(query))
+        expires_at = time.time() + self.ttl_for(source, evidence)
+        entry = (expires_at, [dict(e) for e in evidence])
+        with self._lock:
+            self._store(key, entry)
+        self._db_set(key, expires_at, entry[1])
+
+    def _store(self, key: Tuple[str, str], entry: Tuple[float, List[Dict]]) -> None:
+        # Caller holds self._lock
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def get_or_load(self, source: str, query: str, loader: Callable[[], List[Dict]]) -> List[Dict]:
+        """Return cached evidence or call `loader` and cache its result"""
+        cached = self.get(source, query)
+        if cached is not None:
+            return cached
+
+        def load() -> List[Dict]:
+            evidence = loader()
+            self.set(source, query, evidence)
+            return evidence
+
+        # Callers that joined the leader's call get their own copies, as on a hit
+        evidence = self.flights.do((source, normalize_claim_query(query)), load,
+                                   recheck=lambda: self.get(source, query))
+        return [dict(e) for e in evidence]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._counters, size=len(self._entries), max_entries=self.max_entries,
+                         persistent=self._db is not None)
+        lookups = stats["hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["hits"] + stats["disk_hits"]) / lookups, 3) if lookups else 0.0
+        stats["singleflight"] = self.flights.stats()
+        return stats
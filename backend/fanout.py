@@ -0,0 +1,95 @@
+"""
+Bounded concurrent fan-out with a shared deadline.
+
+Used to run the independent evidence lookups of a request (fact checks and
+per-site searches for every claim) at the same time. Whatever finishes before
+the deadline is returned (or streamed as it completes); anything still
+pending is cancelled and reported.
+"""
+import contextvars
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Upper bound on concurrent upstream lookups per worker process
+FANOUT_MAX_WORKERS = int(os.environ.get("EVIDENCE_MAX_WORKERS", "16"))
+
+_executor = ThreadPoolExecutor(max_workers=FANOUT_MAX_WORKERS, thread_name_prefix="evidence")
+
+
+def _reset_after_fork() -> None:
+    # Pool threads do not survive fork(); each worker process gets its own pool
+    global _executor
+    _executor = ThreadPoolExecutor(max_workers=FANOUT_MAX_WORKERS, thread_name_prefix="evidence")
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class FanoutResult:
+    """Outcome of a fan-out: completed values, late task keys and failures"""
+
+    def __init__(self):
+        self.completed: Dict[str, Any] = {}
+        self.late: List[str] = []
+        self.failed: Dict[str, str] = {}
+        self.elapsed_ms: int = 0
+
+    def summary(self) -> Dict:
+        return {
+            "tasks": len(self.completed) + len(self.late) + len(self.failed),
+            "completed": len(self.completed),
+            "late": list(self.late),
+            "failed": dict(self.failed),
+            "elapsed_ms": self.elapsed_ms,
+        }
+
+
+def iter_with_deadline(tasks: Dict[str, Callable[[], Any]], deadline_s: float,
+                       result: Optional[FanoutResult] = None) -> Iterator[Tuple[str, Any]]:
+    """
+    Run every task on the shared pool and yield (key, value) as each one
+    completes, for at most `deadline_s` seconds in total. Failures, late
+    tasks and timing are recorded on `result` when one is given.
+    """
+    if result is None:
+        result = FanoutResult()
+    start = time.monotonic()
+    # Each task runs in a copy of the caller's context so request tracing follows it
+    futures = {_executor.submit(contextvars.copy_context().run, fn): key for key, fn in tasks.items()}
+    pending = set(futures)
+
+    try:
+        while pending:
+            remaining = deadline_s - (time.monotonic() - start)
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                key = futures[future]
+                try:
+                    value = future.result()
+                except Exception as e:
+                    result.failed[key] = str(e)
+                    continue
+                result.completed[key] = value
+                yield key, value
+    finally:
+        # Also runs if the consumer stops early (e.g. a streaming client disconnects)
+        for future in pending:
+            future.cancel()
+            result.late.append(futures[future])
+        result.elapsed_ms = round((time.monotonic() - start) * 1000)
+
+
+def run_with_deadline(tasks: Dict[str, Callable[[], Any]], deadline_s: float) -> FanoutResult:
+    """
+    Run every task on the shared pool and wait at most `deadline_s` seconds
+    for all of them together. Tasks that have not finished by then are
+    cancelled (if still queued) or abandoned (if already running).
+    """
+    result = FanoutResult()
+    for _ in iter_with_deadline(tasks, deadline_s, result):
+        pass
+    return result
@@ -0,0 +1,177 @@
+"""
+Process-wide registry of Google API clients.
+
+Discovery clients, the Translate client and the HTTP session used for the
+direct REST fallbacks are built once per worker process and shared by every
+request thread. Access tokens are cached until shortly before they expire and
+refreshed in the background so request threads rarely wait on OAuth.
+Every transport has explicit connect/read timeouts, so a hung upstream
+costs a bounded wait instead of a blocked request thread.
+"""
+import calendar
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+import google.auth.transport.requests
+
+# Seconds before expiry at which a cached token is no longer handed out
+TOKEN_EXPIRY_SKEW_S = int(os.environ.get("GOOGLE_TOKEN_EXPIRY_SKEW_S", "60"))
+# Seconds before expiry at which a background refresh is started
+TOKEN_REFRESH_AHEAD_S = int(os.environ.get("GOOGLE_TOKEN_REFRESH_AHEAD_S", "300"))
+# Connection pool size for the shared HTTP session
+HTTP_POOL_SIZE = int(os.environ.get("GOOGLE_HTTP_POOL_SIZE", "32"))
+# Timeouts (seconds) for outbound calls; httplib2 has a single socket timeout,
+# which is set to the read timeout
+CONNECT_TIMEOUT_S = float(os.environ.get("GOOGLE_API_CONNECT_TIMEOUT_S", "3.05"))
+READ_TIMEOUT_S = float(os.environ.get("GOOGLE_API_READ_TIMEOUT_S", "10"))
+HTTP_TIMEOUT = (CONNECT_TIMEOUT_S, READ_TIMEOUT_S)
+
+
+class TimeoutSession(requests.Session):
+    """requests.Session that applies HTTP_TIMEOUT when a call sets none"""
+
+    def request(self, method, url, *args, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = HTTP_TIMEOUT
+        return super().request(method, url, *args, **kwargs)
+
+
+class TokenCache:
+    """Caches an OAuth access token and refreshes it ahead of expiry"""
+
+    def __init__(self, credentials, session: Optional[requests.Session] = None):
+        self._credentials = credentials
+        self._session = session
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._token: Optional[str] = None
+        self._expiry: float = 0.0
+
+    def _seconds_left(self) -> float:
+        return self._expiry - time.time()
+
+    def _refresh(self) -> None:
+        auth_req = google.auth.transport.requests.Request(session=self._session)
+        self._credentials.refresh(auth_req)
+        expiry = self._credentials.expiry
+        self._token = self._credentials.token
+        # google-auth reports expiry as a naive UTC datetime
+        if isinstance(expiry, datetime):
+            self._expiry = calendar.timegm(expiry.utctimetuple())
+        else:
+            # Unknown lifetime: assume the standard one-hour service account token
+            self._expiry = time.time() + 3600
+
+    def _refresh_in_background(self) -> None:
+        try:
+            with self._lock:
+                if self._seconds_left() > TOKEN_REFRESH_AHEAD_S:
+                    return
+                self._refresh()
+        except Exception as e:
+            print(f"Background token refresh failed: {e}")
+        finally:
+            self._refreshing = False
+
+    def get_token(self) -> str:
+        """Return a valid access token, refreshing only when necessary"""
+        remaining = self._seconds_left()
+        if self._token and remaining > TOKEN_EXPIRY_SKEW_S:
+            if remaining < TOKEN_REFRESH_AHEAD_S and not self._refreshing:
+                self._refreshing = True
+                threading.Thread(target=self._refresh_in_background,
+                                 name="google-token-refresh", daemon=True).start()
+            return self._token
+
+        with self._lock:
+            # Another thread may have refreshed while we waited for the lock
+            if not self._token or self._seconds_left() <= TOKEN_EXPIRY_SKEW_S:
+                self._refresh()
+            return self._token
+
+
+class GoogleClientRegistry:
+    """Builds each Google API client once and shares it across threads"""
+
+    def __init__(self, credentials):
+        self._credentials = credentials
+        self._lock = threading.Lock()
+        self._clients: Dict[str, Any] = {}
+        self._thread_local = threading.local()
+        self.http_session = self._build_http_session()
+        self.tokens = TokenCache(credentials, session=self.http_session)
+
+    @staticmethod
+    def _build_http_session() -> requests.Session:
+        session = TimeoutSession()
+        adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def _get_or_build(self, name: str, factory: Callable[[], Any]) -> Any:
+        client = self._clients.get(name)
+        if client is not None:
+            return client
+        with self._lock:
+            client = self._clients.get(name)
+            if client is None:
+                client = factory()
+                self._clients[name] = client
+            return client
+
+    def _thread_http(self):
+        """One authorized httplib2 connection per thread (httplib2 is not thread-safe)"""
+        http = getattr(self._thread_local, "http", None)
+        if http is None:
+            import httplib2
+            import google_auth_httplib2
+            http = google_auth_httplib2.AuthorizedHttp(self._credentials, http=httplib2.Http(timeout=READ_TIMEOUT_S))
+            self._thread_local.http = http
+        return http
+
+    def _build_discovery(self, service_name: str, version: str):
+        from googleapiclient.discovery import build
+        from googleapiclient.http import HttpRequest
+
+        def request_builder(http, *args, **kwargs):
+            # Route every request through the calling thread's own connection
+            return HttpRequest(self._thread_http(), *args, **kwargs)
+
+        return build(service_name, version, http=self._thread_http(),
+                     requestBuilder=request_builder, cache_discovery=False)
+
+    def fact_check(self):
+        """Fact Check Tools API service"""
+        return self._get_or_build("factchecktools",
+                                  lambda: self._build_discovery('factchecktools', 'v1alpha1'))
+
+    def custom_search(self):
+        """Custom Search API service"""
+        return self._get_or_build("customsearch",
+                                  lambda: self._build_discovery('customsearch', 'v1'))
+
+    def translate(self):
+        """Translation API client"""
+        def factory():
+            from google.auth.transport.requests import AuthorizedSession
+            from google.cloud import translate_v2 as translate
+
+            class TimeoutAuthorizedSession(AuthorizedSession):
+                # google-cloud-core always passes its own 60s timeout
+                def request(self, method, url, *args, **kwargs):
+                    kwargs["timeout"] = HTTP_TIMEOUT
+                    return super().request(method, url, *args, **kwargs)
+
+            return translate.Client(credentials=self._credentials,
+                                    _http=TimeoutAuthorizedSession(self._credentials))
+        return self._get_or_build("translate", factory)
+
+    def access_token(self) -> str:
+        """Cached OAuth access token for direct REST calls"""
+        return self.tokens.get_token()
@@ -0,0 +1,41 @@
+"""
+Gunicorn settings for serving the API in production:
+
+    cd backend && gunicorn -c gunicorn.conf.py wsgi:app
+
+One worker process per core lets the CPU-bound local stages (claim
+extraction, scoring, near-duplicate lookups) scale across cores, and the
+threads of each worker overlap its upstream calls. Workers share no
+in-process state, so a slow upstream call in one never holds up another.
+
+The app is preloaded in the master: it is imported once, its pages are
+shared copy-on-write and the ClaimReview segments are mapped once. This is
+safe because the master only reads the service account; every client,
+thread pool and connection is created lazily inside each worker (see the
+after-fork hooks in app.py, services.py, fanout.py, resilience.py and
+metrics.py).
+
+Each worker's share of the outbound API quotas (scheduler.py) is set from
+the number of workers gunicorn started, so `-w` on the command line is
+honored too.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get("BIND", f"0.0.0.0:{os.environ.get('PORT', '5000')}")
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "gthread"
+# Keep above ADMISSION_CAPACITY (admission.py) so requests beyond it still get a thread to be shed on
+threads = int(os.environ.get("GUNICORN_THREADS", "8"))
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1") == "1"
+# Longer than the evidence deadline plus Vertex AI and translation time
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = 5
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG", "-") or None
+
+
+def post_fork(server, worker):
+    import app
+
+    app.outbound.set_workers(server.cfg.workers)
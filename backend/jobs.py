@@ -0,0 +1,441 @@
+"""
+Background re-scoring of stored checks.
+
+A job streams a JSONL export of check documents (one per line, flat or with
+the fields under "data") through a process pool that re-runs the local
+stages on each text (app.rescore_checks: claims, manipulation signals,
+classifier and risk, no upstream calls), so changed heuristics can be
+applied to millions of historical records. Each job lives in a directory:
+
+    JOBS_DIR/<job id>/job.json           input, options and creation time
+    JOBS_DIR/<job id>/checkpoint.json    input offset, parts written, counts
+    JOBS_DIR/<job id>/part-00000.jsonl   one result per input line, in order
+    JOBS_DIR/<job id>/lock               flock held while the job runs
+    JOBS_DIR/slot-<n>.lock               flock held by each job started over the API
+
+The input is read JOBS_CHUNK_LINES lines at a time and handed to the pool in
+tasks of JOBS_TASK_LINES lines; while one chunk is scored the previous one
+is written out, so at most two chunks are in memory whatever the input size.
+Each chunk becomes one part file, written atomically, after which the
+checkpoint records the input offset that follows it. A job resumed after a
+crash seeks to that offset and rewrites at most the part that was in flight.
+
+Records are scored against their stored "evidence" when the export has it,
+otherwise against real evidence only: the ClaimReview index and the
+persistent evidence cache. Set EVIDENCE_CACHE_DB to the web workers' cache
+file so the pool processes can read it; without it, records with no stored
+evidence are scored with no evidence at all (never with mock sources).
+
+Status is read from the files, so any worker process can answer a poll. A
+job that is not done and whose lock nobody holds was interrupted and can be
+resumed. Polls probe the lock with a shared flock that is released at once,
+and run_job retries the exclusive lock for JOBS_LOCK_WAIT_S, so a poll never
+stops a job from starting.
+
+Every job runs a pool of JOBS_WORKERS processes, each importing the app, so
+at most JOBS_MAX_RUNNING jobs are started over the API at a time, across all
+worker processes sharing JOBS_DIR: each holds one of that many slot locks,
+and a submission or resume finding none free gets JobsBusy (a 429). Pool
+processes are started with JOBS_START_METHOD ("spawn": the web worker has
+threads running) and run at JOBS_NICE so checks keep priority.
+
+    python -m jobs rescore exports/checks.jsonl [--workers 8]
+    python -m jobs resume <job id>
+    python -m jobs status <job id>
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import threading
+import time
+import uuid
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: a job's liveness is only known to its own process
+    fcntl = None
+
+from rollups import unwrap_check_record
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+JOBS_DIR = os.environ.get("JOBS_DIR", os.path.join(DATA_DIR, "jobs"))
+# Jobs submitted over the API may only read exports from this directory
+JOBS_INPUT_DIR = os.environ.get("JOBS_INPUT_DIR", os.path.join(DATA_DIR, "exports"))
+JOBS_WORKERS = int(os.environ.get("JOBS_WORKERS", "0")) or os.cpu_count() or 1
+JOBS_CHUNK_LINES = int(os.environ.get("JOBS_CHUNK_LINES", "5000"))
+JOBS_TASK_LINES = int(os.environ.get("JOBS_TASK_LINES", "100"))
+JOBS_START_METHOD = os.environ.get("JOBS_START_METHOD", "spawn")
+JOBS_NICE = int(os.environ.get("JOBS_NICE", "10"))
+JOBS_MAX_RUNNING = int(os.environ.get("JOBS_MAX_RUNNING", "1"))
+JOBS_LOCK_WAIT_S = float(os.environ.get("JOBS_LOCK_WAIT_S", "2"))
+
+JOB_ID = re.compile(r"^[0-9a-f]{12}$")
+
+
+class JobsBusy(Exception):
+    """JOBS_MAX_RUNNING jobs are already running"""
+
+
+def write_json_atomic(path: str, data: Dict) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def read_json(path: str) -> Optional[Dict]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+# -----------------------------
+# Pool processes
+# -----------------------------
+_rescore_checks = None
+
+
+def _init_worker(nice: int) -> None:
+    global _rescore_checks
+    if nice:
+        try:
+            os.nice(nice)
+        except OSError:
+            pass
+    # Imported here, not at module level: app imports this module for its routes
+    from app import rescore_checks
+    _rescore_checks = rescore_checks
+
+
+def rescore_lines(lines: List[Tuple[int, bytes]]) -> List[Dict]:
+    """Result rows for (line number, JSONL line) pairs; bad lines get an "error" row"""
+    rows: List[Dict] = []
+    records = []
+    for line_no, line in lines:
+        try:
+            document = json.loads(line)
+            record = unwrap_check_record(document)
+            if not (record.get("input_text") or "").strip():
+                raise ValueError("no input_text")
+        except (ValueError, AttributeError) as e:
+            rows.append({"line": line_no, "error": str(e)})
+            continue
+        rows.append({"line": line_no, "id": document.get("id") or document.get("name"),
+                     "previous_risk_score": record.get("risk_score")})
+        records.append(record)
+
+    results = iter(_rescore_checks(records) if records else [])
+    for row in rows:
+        if "error" not in row:
+            scored = next(results)
+            risk = scored.pop("risk")
+            row.update(risk_score=risk["score"], rationales=risk["rationales"], **scored)
+            if "classifier_score" in risk:
+                row["classifier_score"] = risk["classifier_score"]
+    return rows
+
+
+# -----------------------------
+# Running a job
+# -----------------------------
+def read_chunks(path: str, offset: int, first_line: int,
+                chunk_lines: int) -> Iterator[Tuple[List[Tuple[int, bytes]], int, int]]:
+    """(numbered non-blank lines, offset and line number after them) per chunk, from `offset` on"""
+    with open(path, "rb") as f:
+        f.seek(offset)
+        line_no = first_line
+        chunk = []
+        for line in f:
+            offset += len(line)
+            line_no += 1
+            if line.strip():
+                chunk.append((line_no, line))
+            if len(chunk) >= chunk_lines:
+                yield chunk, offset, line_no
+                chunk = []
+        if chunk:
+            yield chunk, offset, line_no
+
+
+def try_lock(path: str) -> Optional[int]:
+    """Descriptor of `path` under an exclusive flock, or None if another process holds it"""
+    fd = os.open(path, os.O_CREAT | os.O_RDWR, 0o644)
+    if fcntl is None:
+        return fd
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(fd)
+        return None
+    return fd
+
+
+def acquire_lock(job_dir: str, wait_s: float = JOBS_LOCK_WAIT_S) -> Optional[int]:
+    """Lock file descriptor once nobody else is running the job, None if it is still held after wait_s"""
+    deadline = time.monotonic() + wait_s
+    while True:
+        fd = try_lock(os.path.join(job_dir, "lock"))
+        if fd is not None or time.monotonic() >= deadline:
+            return fd
+        time.sleep(0.05)
+
+
+def lock_held(job_dir: str) -> bool:
+    """Whether a process is running the job; probes without ever holding the lock exclusively"""
+    if fcntl is None:
+        return False
+    try:
+        fd = os.open(os.path.join(job_dir, "lock"), os.O_RDONLY)
+    except FileNotFoundError:
+        return False  # Never started
+    try:
+        fcntl.flock(fd, fcntl.LOCK_SH | fcntl.LOCK_NB)
+    except OSError:
+        return True
+    finally:
+        os.close(fd)  # Releases the shared lock
+    return False
+
+
+def run_job(job_dir: str, workers: int = JOBS_WORKERS, chunk_lines: int = JOBS_CHUNK_LINES,
+            task_lines: int = JOBS_TASK_LINES) -> Optional[Dict]:
+    """
+    Run (or resume) a job to completion from its checkpoint. Returns the
+    final checkpoint, or None if another process is still running it after
+    JOBS_LOCK_WAIT_S.
+    """
+    lock_fd = acquire_lock(job_dir)
+    if lock_fd is None:
+        return None
+    try:
+        spec = read_json(os.path.join(job_dir, "job.json"))
+        checkpoint_path = os.path.join(job_dir, "checkpoint.json")
+        checkpoint = read_json(checkpoint_path) or {
+            "offset": 0, "lines": 0, "parts": 0, "rescored": 0, "failed": 0, "done": False
+        }
+        if checkpoint["done"]:
+            return checkpoint
+        checkpoint.pop("error", None)
+        if not os.environ.get("EVIDENCE_CACHE_DB"):
+            print("EVIDENCE_CACHE_DB is not set: records without stored evidence are re-scored "
+                  "from the ClaimReview index alone")
+        checkpoint.update(started_at=time.time(), lines_at_start=checkpoint["lines"])
+        write_json_atomic(checkpoint_path, checkpoint)
+
+        def write_part(offset, line_no, result) -> None:
+            rows = [row for task_rows in result.get() for row in task_rows]
+            part_path = os.path.join(job_dir, f"part-{checkpoint['parts']:05d}.jsonl")
+            with open(f"{part_path}.tmp", "w", encoding="utf-8") as f:
+                f.writelines(json.dumps(row) + "\n" for row in rows)
+            os.replace(f"{part_path}.tmp", part_path)
+            failed = sum(1 for row in rows if "error" in row)
+            checkpoint.update(offset=offset, lines=line_no, parts=checkpoint["parts"] + 1,
+                              rescored=checkpoint["rescored"] + len(rows) - failed,
+                              failed=checkpoint["failed"] + failed, updated_at=time.time())
+            write_json_atomic(checkpoint_path, checkpoint)
+
+        context = multiprocessing.get_context(JOBS_START_METHOD)
+        with context.Pool(workers, initializer=_init_worker, initargs=(JOBS_NICE,)) as pool:
+            pending = None
+            try:
+                chunks = read_chunks(spec["input"], checkpoint["offset"], checkpoint["lines"], chunk_lines)
+                for chunk, offset, line_no in chunks:
+                    tasks = [chunk[i:i + task_lines] for i in range(0, len(chunk), task_lines)]
+                    # Score this chunk while the previous one is written out
+                    result = pool.map_async(rescore_lines, tasks)
+                    if pending is not None:
+                        write_part(*pending)
+                    pending = (offset, line_no, result)
+                if pending is not None:
+                    write_part(*pending)
+            except Exception as e:
+                checkpoint.update(error=str(e), updated_at=time.time())
+                write_json_atomic(checkpoint_path, checkpoint)
+                raise
+        checkpoint.update(done=True, updated_at=time.time())
+        write_json_atomic(checkpoint_path, checkpoint)
+        return checkpoint
+    finally:
+        os.close(lock_fd)  # Releases the flock
+
+
+# -----------------------------
+# Job store
+# -----------------------------
+class JobStore:
+    """Jobs on disk plus the ones this process is running in background threads"""
+
+    def __init__(self, root: str = JOBS_DIR, input_dir: str = JOBS_INPUT_DIR, workers: int = JOBS_WORKERS,
+                 max_running: int = JOBS_MAX_RUNNING):
+        self.root = root
+        self.input_dir = input_dir
+        self.workers = workers
+        self.max_running = max_running
+        self._threads: Dict[str, threading.Thread] = {}
+        self._lock = threading.Lock()
+
+    def job_dir(self, job_id: str) -> Optional[str]:
+        if not JOB_ID.match(job_id or ""):
+            return None
+        path = os.path.join(self.root, job_id)
+        return path if os.path.isfile(os.path.join(path, "job.json")) else None
+
+    def resolve_input(self, name: str) -> str:
+        """Absolute path of an export under input_dir; ValueError outside it or missing"""
+        base = os.path.realpath(self.input_dir)
+        path = os.path.realpath(os.path.join(base, name))
+        if os.path.commonpath([base, path]) != base or not os.path.isfile(path):
+            raise ValueError(f"input must be an existing file under {self.input_dir}")
+        return path
+
+    def create(self, input_path: str) -> str:
+        job_id = uuid.uuid4().hex[:12]
+        job_dir = os.path.join(self.root, job_id)
+        os.makedirs(job_dir)
+        write_json_atomic(os.path.join(job_dir, "job.json"), {
+            "id": job_id,
+            "kind": "rescore",
+            "input": os.path.abspath(input_path),
+            "input_bytes": os.path.getsize(input_path),
+            "created_at": time.time(),
+        })
+        return job_id
+
+    def _take_slot(self) -> int:
+        """Descriptor of a free slot lock, held until the job ends; JobsBusy if there is none"""
+        # Caller holds self._lock
+        if fcntl is None and sum(thread.is_alive() for thread in self._threads.values()) >= self.max_running:
+            raise JobsBusy(f"{self.max_running} jobs are already running")
+        os.makedirs(self.root, exist_ok=True)
+        for slot in range(self.max_running):
+            fd = try_lock(os.path.join(self.root, f"slot-{slot}.lock"))
+            if fd is not None:
+                return fd
+        raise JobsBusy(f"{self.max_running} jobs are already running")
+
+    def _start(self, job_id: str, slot_fd: int) -> None:
+        # Caller holds self._lock
+        def run():
+            try:
+                if run_job(os.path.join(self.root, job_id), self.workers) is None:
+                    print(f"Job {job_id} was not started: another process is running it")
+            except Exception as e:
+                print(f"Job {job_id} failed: {e}")
+            finally:
+                os.close(slot_fd)  # Frees the slot
+
+        thread = threading.Thread(target=run, name=f"job-{job_id}", daemon=True)
+        self._threads[job_id] = thread
+        thread.start()
+
+    def start(self, job_id: str) -> bool:
+        """
+        Run a job in a background thread; False if it is already running
+        here, JobsBusy if JOBS_MAX_RUNNING jobs are running
+        """
+        with self._lock:
+            thread = self._threads.get(job_id)
+            if thread is not None and thread.is_alive():
+                return False
+            self._start(job_id, self._take_slot())
+            return True
+
+    def submit(self, input_path: str) -> str:
+        """Create a job and start it; JobsBusy (and no job created) if every slot is taken"""
+        with self._lock:
+            slot_fd = self._take_slot()
+            try:
+                job_id = self.create(input_path)
+            except Exception:
+                os.close(slot_fd)
+                raise
+            self._start(job_id, slot_fd)
+            return job_id
+
+    def is_running(self, job_id: str) -> bool:
+        thread = self._threads.get(job_id)
+        if thread is not None and thread.is_alive():
+            return True
+        return lock_held(os.path.join(self.root, job_id))
+
+    def status(self, job_id: str) -> Optional[Dict]:
+        """Progress of a job from its files, or None if there is no such job"""
+        job_dir = self.job_dir(job_id)
+        if job_dir is None:
+            return None
+        spec = read_json(os.path.join(job_dir, "job.json")) or {}
+        checkpoint = read_json(os.path.join(job_dir, "checkpoint.json")) or {}
+        if checkpoint.get("done"):
+            state = "done"
+        elif self.is_running(job_id):
+            state = "running"
+        elif checkpoint.get("error"):
+            state = "failed"
+        else:
+            state = "interrupted" if checkpoint else "queued"
+
+        input_bytes = spec.get("input_bytes") or 0
+        offset = checkpoint.get("offset", 0)
+        status = {
+            "job_id": job_id,
+            "kind": spec.get("kind"),
+            "state": state,
+            "created_at": spec.get("created_at"),
+            "progress": round(offset / input_bytes, 4) if input_bytes else 1.0,
+            "lines": checkpoint.get("lines", 0),
+            "rescored": checkpoint.get("rescored", 0),
+            "failed": checkpoint.get("failed", 0),
+            "parts": [f"part-{i:05d}.jsonl" for i in range(checkpoint.get("parts", 0))],
+            "output_dir": job_dir,
+        }
+        # Lines per second since the current run (or resume) started
+        started_at, updated_at = checkpoint.get("started_at"), checkpoint.get("updated_at")
+        if started_at and updated_at and updated_at > started_at:
+            status["lines_per_s"] = round(
+                (checkpoint["lines"] - checkpoint.get("lines_at_start", 0)) / (updated_at - started_at), 1)
+        if checkpoint.get("error"):
+            status["error"] = checkpoint["error"]
+        return status
+
+    def after_fork(self) -> None:
+        # Job threads do not survive a fork; their jobs show as interrupted elsewhere
+        self._threads = {}
+        self._lock = threading.Lock()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score stored checks")
+    parser.add_argument("--dir", default=JOBS_DIR, help="Jobs directory")
+    parser.add_argument("--workers", type=int, default=JOBS_WORKERS)
+    sub = parser.add_subparsers(dest="command", required=True)
+    rescore = sub.add_parser("rescore", help="Start a job over a JSONL export")
+    rescore.add_argument("input")
+    resume = sub.add_parser("resume", help="Resume an interrupted job")
+    resume.add_argument("job_id")
+    show = sub.add_parser("status", help="Print a job's progress")
+    show.add_argument("job_id")
+    args = parser.parse_args()
+
+    store = JobStore(args.dir, workers=args.workers)
+    if args.command == "rescore":
+        job_id = store.create(args.input)
+        print(f"Job {job_id}")
+    else:
+        job_id = args.job_id
+        if store.job_dir(job_id) is None:
+            parser.error(f"no job {job_id} in {args.dir}")
+    if args.command != "status":
+        start = time.perf_counter()
+        if run_job(os.path.join(args.dir, job_id), args.workers) is None:
+            parser.error(f"job {job_id} is already running")
+        print(f"Finished in {time.perf_counter() - start:.1f}s")
+    print(json.dumps(store.status(job_id), indent=2))
+
+
+if __name__ == "__main__":
+    main()
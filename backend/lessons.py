@@ -0,0 +1,50 @@
+"""
+Lesson templates shown with every check result.
+
+Lessons are fixed markdown texts chosen from the manipulation signals, so they
+are translated once per language into the lesson catalog (see translations.py)
+instead of on every request.
+"""
+from typing import List
+
+HEALTH_LESSON = "health_misinformation"
+BASICS_LESSON = "fact_checking_basics"
+
+LESSON_TEMPLATES = {
+    HEALTH_LESSON: """**🏥 Spotting Health Misinformation**
+
+**Red flags to watch for:**
+• Claims of "instant" or "miracle" cures
+• Promises of treating serious diseases with simple remedies
+• Lack of medical professional endorsement
+
+**How to verify health claims:**
+1. Check with official health organizations (WHO, MOHFW, ICMR)
+2. Look for peer-reviewed medical studies  
+3. Consult healthcare professionals
+4. Be skeptical of "too good to be true" claims
+
+**Remember:** Always consult qualified medical professionals for health advice.""",
+
+    BASICS_LESSON: """**🔍 Fact-Checking Basics**
+
+**Before sharing, ask:**
+• Who is the original source?
+• When was this published?
+• Do other reliable sources report the same thing?
+
+**Quick verification steps:**
+1. Check the source's credibility
+2. Look for corroborating evidence
+3. Search for fact-checks on the claim
+4. Consider the source's motivation
+
+**Remember:** When in doubt, don't share. Help stop misinformation!""",
+}
+
+
+def select_lesson(manip_signals: List[str]) -> str:
+    """Pick the lesson template key for a set of manipulation signals"""
+    if "miracle cure language" in manip_signals or "health rumor" in manip_signals:
+        return HEALTH_LESSON
+    return BASICS_LESSON
@@ -0,0 +1,274 @@
+"""
+Lightweight request tracing and Prometheus metrics.
+
+Stages of the check pipeline and outbound API calls are timed with spans:
+
+    with metrics.stage("extract_claims"):
+        ...
+    with metrics.upstream("fact_check"):
+        ...
+
+or with the `timed_stage` decorator. Every span feeds a latency histogram
+(and an error counter if it raised) and, while a request is being traced,
+that request's stage breakdown, which is returned in `debug`. The trace
+lives in a context variable and the evidence fan-out copies the context
+into its worker threads, so upstream calls made there are included.
+
+Component stats (cache hits, queue depth, ...) are registered as
+collectors and read only when /metrics is scraped. Metrics are per
+process; with several workers each one is scraped separately.
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registry: List["_Metric"] = []
+_collectors: List[Callable[[], Iterable[str]]] = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels: Dict) -> Tuple:
+        return tuple(labels.get(name, "") for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+        # key -> [per-bucket counts (+Inf last), sum, count]
+        self._values: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            values = [(key, list(counts), total, count) for key, (counts, total, count) in self._values.items()]
+        for key, counts, total, count in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                bucket_labels = _format_labels(self.labelnames, key, 'le="%s"' % le)
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+REQUEST_SECONDS = Histogram("mg_request_duration_seconds", "HTTP request latency",
+                            ("endpoint", "status"))
+STAGE_SECONDS = Histogram("mg_stage_duration_seconds", "Check pipeline stage latency", ("stage",))
+STAGE_ERRORS = Counter("mg_stage_errors_total", "Check pipeline stages that raised", ("stage",))
+UPSTREAM_SECONDS = Histogram("mg_upstream_duration_seconds", "Outbound API call latency", ("upstream",))
+UPSTREAM_ERRORS = Counter("mg_upstream_errors_total", "Outbound API calls that failed", ("upstream",))
+
+
+# -----------------------------
+# Per-request traces
+# -----------------------------
+_trace: ContextVar[Optional[list]] = ContextVar("metrics_trace", default=None)
+
+
+def start_trace():
+    """Start collecting spans for the current request; returns a reset token"""
+    return _trace.set([])
+
+
+def end_trace(token) -> None:
+    _trace.reset(token)
+
+
+def trace_summary() -> Dict:
+    """Stage and upstream timings of the current request, in milliseconds"""
+    spans = _trace.get()
+    if spans is None:
+        return {}
+    stages: Dict[str, float] = {}
+    upstreams: Dict[str, Dict] = {}
+    for kind, name, elapsed, failed in list(spans):
+        ms = elapsed * 1000
+        if kind == "stage":
+            stages[name] = round(stages.get(name, 0.0) + ms, 2)
+        else:
+            entry = upstreams.setdefault(name, {"calls": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0})
+            entry["calls"] += 1
+            entry["errors"] += int(failed)
+            entry["total_ms"] = round(entry["total_ms"] + ms, 2)
+            entry["max_ms"] = round(max(entry["max_ms"], ms), 2)
+    return {"stages_ms": stages, "upstreams": upstreams}
+
+
+class Span:
+    """Times one stage or upstream call; use via stage() or upstream()"""
+
+    __slots__ = ("kind", "name", "started")
+
+    def __init__(self, kind: str, name: str):
+        self.kind = kind
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.started
+        failed = exc_type is not None
+        if self.kind == "stage":
+            STAGE_SECONDS.observe(elapsed, stage=self.name)
+            if failed:
+                STAGE_ERRORS.inc(stage=self.name)
+        else:
+            UPSTREAM_SECONDS.observe(elapsed, upstream=self.name)
+            if failed:
+                UPSTREAM_ERRORS.inc(upstream=self.name)
+        spans = _trace.get()
+        if spans is not None:
+            spans.append((self.kind, self.name, elapsed, failed))
+        return False
+
+
+def stage(name: str) -> Span:
+    return Span("stage", name)
+
+
+def upstream(name: str) -> Span:
+    return Span("upstream", name)
+
+
+def upstream_error(name: str) -> None:
+    """Count a failed upstream call that did not raise (e.g. an HTTP error status)"""
+    UPSTREAM_ERRORS.inc(upstream=name)
+    spans = _trace.get()
+    if spans is not None:
+        spans.append(("upstream", name, 0.0, True))
+
+
+def timed_stage(name: str):
+    """Decorator form of stage()"""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with Span("stage", name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def observe_request(endpoint: str, status: int, elapsed_s: float) -> None:
+    REQUEST_SECONDS.observe(elapsed_s, endpoint=endpoint, status=status)
+
+
+# -----------------------------
+# Component stats and exposition
+# -----------------------------
+def register_stats(prefix: str, stats_fn: Callable[[], Dict], counters: Iterable[str] = ()) -> None:
+    """
+    Expose the numeric values of a component's stats() dict. Keys listed in
+    `counters` are monotonic and exported as `{prefix}_{key}_total`; the
+    rest are gauges.
+    """
+    counters = frozenset(counters)
+
+    def collect() -> Iterable[str]:
+        try:
+            stats = stats_fn()
+        except Exception as e:
+            print(f"Metrics collector {prefix} failed: {e}")
+            return []
+        lines = []
+        for key, value in sorted(stats.items()):
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            if key in counters:
+                name = f"{prefix}_{key}_total"
+                lines += [f"# TYPE {name} counter", f"{name} {value}"]
+            else:
+                name = f"{prefix}_{key}"
+                lines += [f"# TYPE {name} gauge", f"{name} {value}"]
+        return lines
+
+    _collectors.append(collect)
+
+
+def _reset_after_fork() -> None:
+    # A lock held by a background thread at fork time would stay held in the child
+    for metric in _registry:
+        metric._lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    for collect in _collectors:
+        lines.extend(collect())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,292 @@
+"""
+Near-duplicate index of recently checked texts.
+
+Forwarded rumors arrive as many lightly edited copies (different emoji,
+punctuation or a changed word). Each checked text is reduced to a MinHash
+signature of its character shingles and stored with the verdict; a new text
+whose estimated Jaccard similarity to a stored one reaches the threshold is
+answered from that verdict instead of running the pipeline again.
+
+Signatures use one-permutation hashing: every shingle is hashed once and
+kept as the minimum of one of `num_perm` bins, so building a signature is a
+single pass over the text. Candidates come from LSH buckets (the signature
+split into bands) and are verified against the threshold. The index is
+bounded by entry count (LRU) and age, and can be saved to a JSON file of
+normalized texts and verdicts; signatures are rebuilt when it is loaded.
+"""
+import atexit
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Tuple
+
+NEAR_DUP_THRESHOLD = float(os.environ.get("NEAR_DUP_THRESHOLD", "0.85"))
+NEAR_DUP_MAX_ENTRIES = int(os.environ.get("NEAR_DUP_MAX_ENTRIES", "10000"))
+NEAR_DUP_TTL_S = int(os.environ.get("NEAR_DUP_TTL_S", str(24 * 3600)))
+# Shorter texts are only matched exactly: one changed word matters too much
+NEAR_DUP_MIN_CHARS = int(os.environ.get("NEAR_DUP_MIN_CHARS", "40"))
+NEAR_DUP_SAVE_INTERVAL_S = float(os.environ.get("NEAR_DUP_SAVE_INTERVAL_S", "60"))
+
+NUM_PERM = 128
+BANDS = 16
+SHINGLE_CHARS = 5
+
+_NON_WORD = re.compile(r"[\W_]+")
+_MASK_64 = (1 << 64) - 1
+
+
+def normalize_text(text: str) -> str:
+    """Case-fold and drop emoji, punctuation and extra whitespace"""
+    return " ".join(_NON_WORD.sub(" ", text.casefold()).split())
+
+
+def minhash_signature(normalized: str, num_perm: int = NUM_PERM) -> Tuple[int, ...]:
+    """One-permutation MinHash of the text's character shingles"""
+    bins = [_MASK_64] * num_perm
+    if len(normalized) <= SHINGLE_CHARS:
+        shingles = {normalized}
+    else:
+        shingles = {normalized[i:i + SHINGLE_CHARS] for i in range(len(normalized) - SHINGLE_CHARS + 1)}
+    for shingle in shingles:
+        # str hashes are salted per process; signatures are rebuilt on load
+        h = hash(shingle) & _MASK_64
+        b = h % num_perm
+        if h < bins[b]:
+            bins[b] = h
+
+    # Densify: an empty bin borrows the next non-empty bin's value, offset by
+    # the distance, so short texts still give comparable signatures
+    filled = [b for b in range(num_perm) if bins[b] != _MASK_64]
+    if filled and len(filled) < num_perm:
+        out = list(bins)
+        for b in range(num_perm):
+            if bins[b] == _MASK_64:
+                for step in range(1, num_perm):
+                    source = (b + step) % num_perm
+                    if bins[source] != _MASK_64:
+                        out[b] = (bins[source] + step * 0x9E3779B97F4A7C15) & _MASK_64
+                        break
+        bins = out
+    return tuple(bins)
+
+
+def similarity(a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+
+class NearDuplicateMatch(NamedTuple):
+    similarity: float
+    checked_at: float
+    verdict: Dict
+
+
+class NearDuplicateIndex:
+    """Thread-safe MinHash LSH index of verdicts, keyed per language"""
+
+    def __init__(self, threshold: float = NEAR_DUP_THRESHOLD, max_entries: int = NEAR_DUP_MAX_ENTRIES,
+                 ttl_s: int = NEAR_DUP_TTL_S, min_chars: int = NEAR_DUP_MIN_CHARS,
+                 path: Optional[str] = None, save_interval_s: float = NEAR_DUP_SAVE_INTERVAL_S,
+                 num_perm: int = NUM_PERM, bands: int = BANDS):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.min_chars = min_chars
+        self.path = path
+        self.save_interval_s = save_interval_s
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+
+        # entry id -> (lang, normalized, signature or None, checked_at, verdict)
+        self._entries: "OrderedDict[int, Tuple]" = OrderedDict()
+        self._exact: Dict[Tuple[str, str], int] = {}
+        self._buckets: Dict[Tuple, set] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self._loading = False
+        self._dirty = False
+        self._last_save = time.time()
+        self._counters = {"lookups": 0, "exact_hits": 0, "near_hits": 0, "added": 0,
+                          "evictions": 0, "expired": 0}
+        if path:
+            self._load_in_background(path)
+            atexit.register(self.save)
+
+    # -----------------------------
+    # Index maintenance
+    # -----------------------------
+    def _band_keys(self, lang: str, signature: Tuple[int, ...]):
+        rows = self.rows
+        return [(lang, band, signature[band * rows:(band + 1) * rows]) for band in range(self.bands)]
+
+    def _insert(self, lang: str, normalized: str, signature: Optional[Tuple[int, ...]],
+                checked_at: float, verdict: Dict) -> None:
+        # Caller holds self._lock
+        old = self._exact.get((lang, normalized))
+        if old is not None:
+            self._remove(old)
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = (lang, normalized, signature, checked_at, verdict)
+        self._exact[(lang, normalized)] = entry_id
+        if signature is not None:
+            for key in self._band_keys(lang, signature):
+                self._buckets.setdefault(key, set()).add(entry_id)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self._counters["evictions"] += 1
+
+    def _remove(self, entry_id: int) -> None:
+        # Caller holds self._lock
+        lang, normalized, signature, _, _ = self._entries.pop(entry_id)
+        if self._exact.get((lang, normalized)) == entry_id:
+            del self._exact[(lang, normalized)]
+        if signature is not None:
+            for key in self._band_keys(lang, signature):
+                bucket = self._buckets.get(key)
+                if bucket is not None:
+                    bucket.discard(entry_id)
+                    if not bucket:
+                        del self._buckets[key]
+
+    def _signature_for(self, normalized: str) -> Optional[Tuple[int, ...]]:
+        if len(normalized) < self.min_chars:
+            return None
+        return minhash_signature(normalized, self.num_perm)
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+    def add(self, text: str, lang: str, verdict: Dict) -> None:
+        """Remember the verdict for a checked text"""
+        normalized = normalize_text(text)
+        if not normalized:
+            return
+        signature = self._signature_for(normalized)
+        with self._lock:
+            self._insert(lang, normalized, signature, time.time(), verdict)
+            self._counters["added"] += 1
+            self._dirty = True
+        self._maybe_save()
+
+    def lookup(self, text: str, lang: str) -> Optional[NearDuplicateMatch]:
+        """Verdict of the most similar recent text at or above the threshold"""
+        normalized = normalize_text(text)
+        if not normalized:
+            return None
+        now = time.time()
+        with self._lock:
+            self._counters["lookups"] += 1
+            entry_id = self._exact.get((lang, normalized))
+            if entry_id is not None:
+                match = self._fresh(entry_id, now, 1.0)
+                if match is not None:
+                    self._counters["exact_hits"] += 1
+                    return match
+
+        signature = self._signature_for(normalized)
+        if signature is None:
+            return None
+        with self._lock:
+            candidates = set()
+            for key in self._band_keys(lang, signature):
+                candidates |= self._buckets.get(key, set())
+            best = None
+            for entry_id in candidates:
+                score = similarity(signature, self._entries[entry_id][2])
+                if score >= self.threshold and (best is None or score > best[0]):
+                    best = (score, entry_id)
+            if best is None:
+                return None
+            match = self._fresh(best[1], now, best[0])
+            if match is not None:
+                self._counters["near_hits"] += 1
+            return match
+
+    def _fresh(self, entry_id: int, now: float, score: float) -> Optional[NearDuplicateMatch]:
+        # Caller holds self._lock; expired entries are dropped on sight
+        _, _, _, checked_at, verdict = self._entries[entry_id]
+        if now - checked_at > self.ttl_s:
+            self._remove(entry_id)
+            self._counters["expired"] += 1
+            return None
+        self._entries.move_to_end(entry_id)
+        return NearDuplicateMatch(round(score, 3), checked_at, verdict)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._counters, size=len(self._entries), max_entries=self.max_entries,
+                         threshold=self.threshold)
+        hits = stats["exact_hits"] + stats["near_hits"]
+        stats["hit_rate"] = round(hits / stats["lookups"], 3) if stats["lookups"] else 0.0
+        return stats
+
+    # -----------------------------
+    # Persistence
+    # -----------------------------
+    def _maybe_save(self) -> None:
+        if not self.path or time.time() - self._last_save < self.save_interval_s:
+            return
+        self._last_save = time.time()
+        threading.Thread(target=self.save, name="near-duplicate-save", daemon=True).start()
+
+    def save(self, path: Optional[str] = None) -> None:
+        path = path or self.path
+        if not path:
+            return
+        with self._lock:
+            if not self._dirty and path == self.path:
+                return
+            entries = [[lang, normalized, checked_at, verdict]
+                       for lang, normalized, _, checked_at, verdict in self._entries.values()]
+            self._dirty = False
+        try:
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"entries": entries}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"Could not save near-duplicate index {path}: {e}")
+
+    def _load_in_background(self, path: str) -> None:
+        # Rebuilding signatures takes a while for a large file; serve while it loads
+        def run():
+            try:
+                self.load(path)
+            finally:
+                self._loading = False
+
+        self._loading = True
+        threading.Thread(target=run, name="near-duplicate-load", daemon=True).start()
+
+    def after_fork(self) -> None:
+        """Reset the lock in a forked worker and finish a load the parent had started"""
+        self._lock = threading.Lock()
+        if self._loading and self.path:
+            self._load_in_background(self.path)
+
+    def load(self, path: str) -> None:
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Could not load near-duplicate index {path}: {e}")
+            return
+        now = time.time()
+        for lang, normalized, checked_at, verdict in data.get("entries", []):
+            if now - checked_at > self.ttl_s:
+                continue
+            # Signatures are built outside the lock so lookups keep running
+            signature = self._signature_for(normalized)
+            with self._lock:
+                # Entries checked since startup are newer than the file's
+                if (lang, normalized) not in self._exact:
+                    self._insert(lang, normalized, signature, checked_at, verdict)
@@ -0,0 +1,105 @@
+"""
+Stage planning for the check pipeline.
+
+The pipeline is declared as a list of stages, each naming the stages whose
+results it reads. A request asks for a set of outputs (what its
+return_level shows plus what the Firestore record stores); the planner
+returns just the stages those outputs transitively depend on, in
+declaration order, and the rest are skipped. Plans are cached per set of
+outputs.
+
+    pipeline = Pipeline([
+        Stage("claims", (), lambda ctx: extract_claims(ctx["text"])),
+        Stage("risk", ("claims",), lambda ctx: score(ctx["claims"])),
+    ])
+    plan = pipeline.plan({"risk"})
+    ctx = pipeline.run(plan, {"text": text})
+
+run_batch runs one plan over several contexts a stage at a time, and can
+replace individual stages with one call for the whole batch (e.g. a
+deduplicated remote lookup), so batched results are built by the same
+stages as single ones.
+"""
+import threading
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+
+
+class Stage(NamedTuple):
+    name: str
+    deps: Tuple[str, ...]
+    run: Callable[[Dict], Any]
+
+
+class Plan:
+    """The stages to run for one set of outputs"""
+
+    def __init__(self, outputs: FrozenSet[str], stages: List[str], skipped: List[str]):
+        self.outputs = outputs
+        self.stages = stages
+        self.skipped = skipped
+        self._stage_set = frozenset(stages)
+
+    def needs(self, stage: str) -> bool:
+        return stage in self._stage_set
+
+    def describe(self) -> Dict:
+        return {"outputs": sorted(self.outputs), "stages": list(self.stages), "skipped": list(self.skipped)}
+
+
+class Pipeline:
+    """Stages in dependency order (each stage may only depend on earlier ones)"""
+
+    def __init__(self, stages: Iterable[Stage]):
+        self.stages: Dict[str, Stage] = {}
+        for stage in stages:
+            missing = [dep for dep in stage.deps if dep not in self.stages]
+            if missing:
+                raise ValueError(f"Stage {stage.name} depends on undeclared stage(s) {missing}")
+            self.stages[stage.name] = stage
+        self._plans: Dict[FrozenSet[str], Plan] = {}
+        self._lock = threading.Lock()
+
+    def plan(self, outputs: Iterable[str]) -> Plan:
+        outputs = frozenset(outputs)
+        plan = self._plans.get(outputs)
+        if plan is not None:
+            return plan
+        unknown = outputs - self.stages.keys()
+        if unknown:
+            raise ValueError(f"Unknown pipeline output(s) {sorted(unknown)}")
+
+        needed = set()
+        pending = list(outputs)
+        while pending:
+            name = pending.pop()
+            if name not in needed:
+                needed.add(name)
+                pending.extend(self.stages[name].deps)
+        plan = Plan(outputs, [name for name in self.stages if name in needed],
+                    [name for name in self.stages if name not in needed])
+        with self._lock:
+            self._plans[outputs] = plan
+        return plan
+
+    def run(self, plan: Plan, ctx: Dict) -> Dict:
+        """Run the plan's stages, storing each result in `ctx` under the stage name"""
+        for name in plan.stages:
+            ctx[name] = self.stages[name].run(ctx)
+        return ctx
+
+    def run_batch(self, plan: Plan, ctxs: List[Dict],
+                  batch_stages: Optional[Dict[str, Callable[[List[Dict]], List[Any]]]] = None) -> List[Dict]:
+        """
+        Run the plan's stages over every context, one stage at a time; a
+        stage in `batch_stages` is called once with all contexts and returns
+        one result per context
+        """
+        batch_stages = batch_stages or {}
+        for name in plan.stages:
+            if name in batch_stages:
+                results = batch_stages[name](ctxs) if ctxs else []
+            else:
+                results = [self.stages[name].run(ctx) for ctx in ctxs]
+            for ctx, result in zip(ctxs, results):
+                ctx[name] = result
+        return ctxs
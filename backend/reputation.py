@@ -0,0 +1,264 @@
+"""
+Domain reputation table for evidence sources.
+
+Graded scores (0 to 1) per domain are loaded from data/domain_reputation.json
+(REPUTATION_PATH) into a trie keyed by reversed host labels, so looking up
+`www.mohfw.gov.in` walks in -> gov -> mohfw -> www and returns the score of
+the longest listed suffix: entries cover their subdomains, and suffix
+entries such as "gov.in" grade whole namespaces. A lookup costs one dict
+access per label of the host, however large the table.
+
+Domains with a "search" rank are the sites Custom Search queries, best
+first. The file is checked for changes every REPUTATION_RELOAD_S; a changed
+file is loaded in the background and swapped in whole, so lookups never
+wait and never see a half-built table.
+
+    {"default_score": 0.0,
+     "sources": ["where the scores come from", ...],
+     "domains": {"who.int": {"score": 1.0, "search": 2}, "gov.in": 0.8, ...}}
+
+Besides the hand-curated sites, the shipped table grades the government,
+military and academic namespaces of country-code TLDs (gov.br, gob.mx,
+ac.jp, mil.ng, ...) taken from the Public Suffix List. To refresh them:
+
+    python -m reputation add-namespaces /usr/share/publicsuffix/public_suffix_list.dat
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+REPUTATION_PATH = os.environ.get(
+    "REPUTATION_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "domain_reputation.json")
+)
+REPUTATION_RELOAD_S = float(os.environ.get("REPUTATION_RELOAD_S", "30"))
+# Evidence from a domain scoring at least this counts as authoritative
+REPUTATION_AUTHORITATIVE = float(os.environ.get("REPUTATION_AUTHORITATIVE", "0.7"))
+
+# Trie nodes map a label to the child node; the score of a listed domain is stored under ""
+_SCORE = ""
+
+# Scores for <label>.<ccTLD> namespaces that registries reserve for governments, militaries
+# and academia; "go" and "gv" are left out as some registries use them for other things
+NAMESPACE_SCORES = {"gov": 0.8, "gob": 0.8, "gouv": 0.8, "govt": 0.8, "gub": 0.8,
+                    "mil": 0.7, "edu": 0.7, "ac": 0.7}
+
+
+def host_of(url_or_host: str) -> str:
+    """Lowercased host of a URL, or of a bare domain"""
+    value = url_or_host.strip().lower()
+    if "//" not in value:
+        value = "//" + value
+    try:
+        host = urlsplit(value).hostname or ""
+    except ValueError:
+        return ""
+    return host.rstrip(".")
+
+
+class ReputationTable:
+    """Immutable reversed-label trie of domain scores"""
+
+    def __init__(self, domains: Dict, default_score: float = 0.0):
+        self.default_score = default_score
+        self._root: Dict = {}
+        ranked = []
+        for domain, entry in domains.items():
+            if isinstance(entry, dict):
+                score, rank = float(entry["score"]), entry.get("search")
+            else:
+                score, rank = float(entry), None
+            labels = [label for label in domain.lower().strip(".").split(".") if label]
+            if not labels:
+                continue
+            node = self._root
+            for label in reversed(labels):
+                node = node.setdefault(label, {})
+            node[_SCORE] = score
+            if rank is not None:
+                ranked.append((rank, ".".join(labels)))
+        self.size = len(domains)
+        self.search_sites = [domain for _, domain in sorted(ranked)]
+
+    @classmethod
+    def from_file(cls, path: str) -> "ReputationTable":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data.get("domains", {}), float(data.get("default_score", 0.0)))
+
+    def lookup(self, host: str) -> Optional[float]:
+        """Score of the longest listed suffix of `host`, or None"""
+        node = self._root
+        score = None
+        end = len(host)
+        # Walk labels right to left without splitting the host
+        while end > 0:
+            start = host.rfind(".", 0, end) + 1
+            node = node.get(host[start:end])
+            if node is None:
+                break
+            score = node.get(_SCORE, score)
+            end = start - 1
+        return score
+
+
+class DomainReputation:
+    """The reputation table from a data file, reloaded when the file changes"""
+
+    def __init__(self, path: Optional[str] = REPUTATION_PATH, reload_s: float = REPUTATION_RELOAD_S,
+                 authoritative: float = REPUTATION_AUTHORITATIVE):
+        self.path = path
+        self.reload_s = reload_s
+        self.authoritative = authoritative
+        self.table = ReputationTable({})
+        self._mtime = None
+        self._checked_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._loading = False
+        self._counters = {"lookups": 0, "reloads": 0, "reload_errors": 0}
+        if path:
+            self._load()
+
+    # -----------------------------
+    # Loading
+    # -----------------------------
+    def _load(self) -> None:
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+            if mtime == self._mtime:
+                return
+            table = ReputationTable.from_file(self.path)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Could not load reputation table {self.path}: {e}")
+            self._counters["reload_errors"] += 1
+            return
+        self.table = table
+        self._mtime = mtime
+        self._counters["reloads"] += 1
+
+    def _maybe_reload(self) -> None:
+        now = time.monotonic()
+        if not self.path or now - self._checked_at < self.reload_s:
+            return
+        with self._lock:
+            if self._loading or now - self._checked_at < self.reload_s:
+                return
+            self._checked_at = now
+            try:
+                if os.stat(self.path).st_mtime_ns == self._mtime:
+                    return
+            except OSError:
+                return
+            self._loading = True
+
+        def run():
+            try:
+                self._load()
+            finally:
+                self._loading = False
+
+        threading.Thread(target=run, name="reputation-reload", daemon=True).start()
+
+    def after_fork(self) -> None:
+        self._lock = threading.Lock()
+        self._loading = False
+
+    # -----------------------------
+    # Lookups
+    # -----------------------------
+    def score(self, url_or_host: str) -> float:
+        self._maybe_reload()
+        self._counters["lookups"] += 1
+        table = self.table
+        score = table.lookup(host_of(url_or_host))
+        return table.default_score if score is None else score
+
+    def evidence_score(self, item: Dict) -> float:
+        """Score of an evidence item's URL host, or of its source when that is a domain"""
+        url = item.get("url") or ""
+        if url:
+            return self.score(url)
+        return self.score(item.get("source") or "")
+
+    def is_authoritative(self, item: Dict) -> bool:
+        return self.evidence_score(item) >= self.authoritative
+
+    def search_sites(self) -> List[str]:
+        self._maybe_reload()
+        return self.table.search_sites
+
+    def stats(self) -> Dict:
+        return dict(self._counters, size=self.table.size, search_sites=len(self.table.search_sites))
+
+
+# -----------------------------
+# Building the table
+# -----------------------------
+def psl_namespaces(lines: Iterable[str], scores: Dict[str, float] = NAMESPACE_SCORES) -> Dict[str, float]:
+    """Scores for the <label>.<ccTLD> rules in the ICANN section of a Public Suffix List"""
+    namespaces = {}
+    icann = False
+    for line in lines:
+        line = line.strip()
+        if "===BEGIN ICANN DOMAINS===" in line:
+            icann = True
+        elif "===END ICANN DOMAINS===" in line:
+            icann = False
+        if not icann or not line or line.startswith(("//", "!", "*")):
+            continue
+        labels = line.lower().split(".")
+        if len(labels) == 2 and len(labels[1]) == 2 and labels[1].isascii() and labels[0] in scores:
+            namespaces[line.lower()] = scores[labels[0]]
+    return namespaces
+
+
+def write_table(path: str, data: Dict) -> None:
+    """Write a reputation file with one domain per line, atomically"""
+    sources = [f"    {json.dumps(source, ensure_ascii=False)}" for source in data.get("sources", [])]
+    entries = [f"    {json.dumps(domain)}: {json.dumps(entry)}" for domain, entry in data["domains"].items()]
+    text = "\n".join([
+        "{",
+        f'  "default_score": {json.dumps(data.get("default_score", 0.0))},',
+        '  "sources": [', ",\n".join(sources), "  ],",
+        '  "domains": {', ",\n".join(entries), "  }",
+        "}",
+    ])
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text + "\n")
+    os.replace(tmp_path, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the domain reputation table")
+    parser.add_argument("--table", default=REPUTATION_PATH, help="Reputation file to update")
+    sub = parser.add_subparsers(dest="command", required=True)
+    namespaces = sub.add_parser("add-namespaces",
+                                help="Add government, military and academic namespaces from a Public Suffix List")
+    namespaces.add_argument("psl", help="public_suffix_list.dat")
+    namespaces.add_argument("--psl-version", help="Version to record (default: the file's date)")
+    args = parser.parse_args()
+
+    with open(args.table, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    with open(args.psl, "r", encoding="utf-8") as f:
+        found = psl_namespaces(f)
+    domains = data.setdefault("domains", {})
+    # Hand-curated entries keep their scores
+    added = {domain: score for domain, score in sorted(found.items()) if domain not in domains}
+    domains.update(added)
+
+    version = args.psl_version or time.strftime("%Y-%m-%d", time.gmtime(os.stat(args.psl).st_mtime))
+    labels = ", ".join(f"{label}.* {score}" for label, score in NAMESPACE_SCORES.items())
+    source = (f"Public Suffix List {version} (https://publicsuffix.org/list/, MPL 2.0): "
+              f"<label>.<ccTLD> namespaces scored by label ({labels})")
+    data["sources"] = [s for s in data.get("sources", []) if not s.startswith("Public Suffix List")] + [source]
+    write_table(args.table, data)
+    print(f"Added {len(added)} of {len(found)} namespaces; {len(domains)} domains in {args.table}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+Circuit breakers and hedged calls for upstream APIs.
+
+A CircuitBreaker watches the outcomes of calls to one upstream. After
+`failure_threshold` consecutive failures, or when at least half of a full
+window of recent calls failed, it opens: callers are refused immediately
+(CircuitOpenError) instead of each waiting for the upstream to fail. While
+open, a background probe checks the upstream every `reset_timeout_s` and
+closes the breaker once a probe succeeds. Without a probe the breaker goes
+half-open after the timeout and lets a single trial call through.
+
+The breaker also keeps recent successful latencies, which `hedged` uses to
+start a secondary path once the primary is slower than its usual p95.
+"""
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, Optional
+
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_WINDOW = int(os.environ.get("BREAKER_WINDOW", "20"))
+BREAKER_RESET_TIMEOUT_S = float(os.environ.get("BREAKER_RESET_TIMEOUT_S", "30"))
+# Fewer latency samples than this and the p95 is not trusted for hedging
+HEDGE_MIN_SAMPLES = 20
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+HEDGE_MAX_WORKERS = int(os.environ.get("HEDGE_MAX_WORKERS", "8"))
+
+_hedge_executor = ThreadPoolExecutor(max_workers=HEDGE_MAX_WORKERS, thread_name_prefix="hedge")
+
+
+def _reset_after_fork() -> None:
+    global _hedge_executor
+    _hedge_executor = ThreadPoolExecutor(max_workers=HEDGE_MAX_WORKERS, thread_name_prefix="hedge")
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose breaker is open"""
+
+
+class CircuitBreaker:
+    """Per-upstream failure detector with fail-fast and background recovery probes"""
+
+    def __init__(self, name: str, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 window: int = BREAKER_WINDOW, reset_timeout_s: float = BREAKER_RESET_TIMEOUT_S,
+                 probe: Optional[Callable[[], Any]] = None, latency_samples: int = 200):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_s = reset_timeout_s
+        self.probe = probe
+        self.state = CLOSED
+        self._outcomes: deque = deque(maxlen=window)
+        self._latencies: deque = deque(maxlen=latency_samples)
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._probe_thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._counters = {"successes": 0, "failures": 0, "rejected": 0, "opened": 0,
+                          "probes": 0, "probe_failures": 0}
+
+    # -----------------------------
+    # State transitions
+    # -----------------------------
+    def allow(self) -> bool:
+        """Whether a call may go to the upstream now"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if (self.state == OPEN and self.probe is None
+                    and time.monotonic() - self._opened_at >= self.reset_timeout_s):
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self._counters["rejected"] += 1
+            return False
+
+    def record_success(self, latency_s: Optional[float] = None) -> None:
+        with self._lock:
+            self._counters["successes"] += 1
+            self._outcomes.append(True)
+            self._consecutive_failures = 0
+            if latency_s is not None:
+                self._latencies.append(latency_s)
+            if self.state != CLOSED:
+                print(f"Circuit {self.name} closed")
+            self.state = CLOSED
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._counters["failures"] += 1
+            self._outcomes.append(False)
+            self._consecutive_failures += 1
+            failed = self._outcomes.count(False)
+            should_open = (self.state == HALF_OPEN
+                           or self._consecutive_failures >= self.failure_threshold
+                           or (len(self._outcomes) == self._outcomes.maxlen
+                               and failed * 2 >= len(self._outcomes)))
+            self._trial_in_flight = False
+            if should_open and self.state != OPEN:
+                self._open()
+            elif self.state == OPEN:
+                self._opened_at = time.monotonic()
+
+    def _open(self) -> None:
+        # Caller holds self._lock
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self._counters["opened"] += 1
+        print(f"Circuit {self.name} opened after {self._consecutive_failures} consecutive failure(s)")
+        if self.probe is not None and (self._probe_thread is None or not self._probe_thread.is_alive()):
+            self._probe_thread = threading.Thread(target=self._probe_loop, name=f"probe-{self.name}",
+                                                  daemon=True)
+            self._probe_thread.start()
+
+    def _probe_loop(self) -> None:
+        while True:
+            time.sleep(self.reset_timeout_s)
+            with self._lock:
+                if self.state != OPEN:
+                    return
+                self._counters["probes"] += 1
+            start = time.monotonic()
+            try:
+                self.probe()
+            except Exception as e:
+                with self._lock:
+                    self._counters["probe_failures"] += 1
+                print(f"Circuit {self.name} probe failed: {e}")
+                continue
+            self.record_success(time.monotonic() - start)
+            return
+
+    # -----------------------------
+    # Calls
+    # -----------------------------
+    def call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Call `fn` through the breaker; raises CircuitOpenError when open"""
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        start = time.monotonic()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success(time.monotonic() - start)
+        return result
+
+    def after_fork(self) -> None:
+        """Start a forked worker closed: the parent's probe thread did not survive"""
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self._outcomes.clear()
+        self._consecutive_failures = 0
+        self._trial_in_flight = False
+        self._probe_thread = None
+
+    def latency_p95(self) -> Optional[float]:
+        """p95 of recent successful call latencies, if there are enough samples"""
+        with self._lock:
+            samples = sorted(self._latencies)
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        return samples[min(int(len(samples) * 0.95), len(samples) - 1)]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return dict(self._counters, state=self.state,
+                        state_code={CLOSED: 0, HALF_OPEN: 1, OPEN: 2}[self.state],
+                        consecutive_failures=self._consecutive_failures)
+
+
+def _fallback(secondary: Callable[[], Any], error: Exception) -> Any:
+    """secondary(), raising the primary's `error` if it fails too"""
+    try:
+        return secondary()
+    except Exception:
+        raise error
+
+
+def hedged(primary: Callable[[], Any], secondary: Callable[[], Any],
+           hedge_after_s: Optional[float]) -> Any:
+    """
+    Run `primary`; if it has not finished after `hedge_after_s` seconds, also
+    start `secondary` and return whichever succeeds first. If one fails the
+    other's result is used; if both fail the primary's error is raised.
+    With no delay (not enough latency data) secondary is only a fallback.
+    """
+    if hedge_after_s is None:
+        try:
+            return primary()
+        except Exception as e:
+            return _fallback(secondary, e)
+
+    first = _hedge_executor.submit(contextvars.copy_context().run, primary)
+    done, _ = wait([first], timeout=hedge_after_s)
+    if done:
+        try:
+            return first.result()
+        except Exception as e:
+            return _fallback(secondary, e)
+
+    second = _hedge_executor.submit(contextvars.copy_context().run, secondary)
+    pending = {first, second}
+    error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                return future.result()
+            except Exception as e:
+                if future is first or error is None:
+                    error = e
+    raise error
@@ -0,0 +1,344 @@
+"""
+Incremental rollups of completed checks for the /v1/stats endpoint.
+
+Every check record (the document written to `misinformation_checks`) adds
+to counters and fixed-bucket histograms of three granularities: hourly
+windows, daily windows and an all-time total. Only the last ROLLUP_HOURS
+hourly and ROLLUP_DAYS daily windows are kept, so answering a stats query
+sums a bounded number of rows however much history there is.
+
+Updates are held in memory and flushed every ROLLUP_FLUSH_INTERVAL_S to a
+SQLite file (ROLLUP_DB) as additive upserts, so every worker process on a
+host adds into the same store; queries read the file plus this process's
+unflushed updates. Without ROLLUP_DB the rollups live in memory only.
+
+The rollups can be rebuilt from an exported dump of the collection (JSON
+array or JSONL, one check document per record):
+
+    python rollups.py --db data/rollups.db backfill checks.jsonl [--replace]
+    python rollups.py --db data/rollups.db show --window 7d
+"""
+import argparse
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+ROLLUP_DB = os.environ.get("ROLLUP_DB")
+ROLLUP_FLUSH_INTERVAL_S = float(os.environ.get("ROLLUP_FLUSH_INTERVAL_S", "10"))
+ROLLUP_HOURS = int(os.environ.get("ROLLUP_HOURS", "48"))
+ROLLUP_DAYS = int(os.environ.get("ROLLUP_DAYS", "90"))
+
+HOUR_S = 3600
+DAY_S = 86400
+# Risk scores (0-100) in ten equal buckets; 100 falls in the last one
+RISK_BUCKETS = 10
+# Query windows: (granularity, number of windows up to and including the current one)
+WINDOWS = {
+    "1h": ("hour", 1),
+    "24h": ("hour", 24),
+    "7d": ("day", 7),
+    "30d": ("day", 30),
+    "all": ("all", 1),
+}
+OTHER = "other"
+
+
+def parse_timestamp(value) -> Optional[float]:
+    """Epoch seconds from an exported timestamp (ISO string, seconds or ms, or {"_seconds": ...})"""
+    if value is None:
+        return None
+    if isinstance(value, dict):
+        seconds = value.get("_seconds", value.get("seconds"))
+        return float(seconds) if seconds is not None else None
+    if isinstance(value, (int, float)):
+        return value / 1000 if value > 1e11 else float(value)
+    if isinstance(value, datetime):
+        return value.timestamp()
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _windows_for(at: float) -> List[Tuple[str, int]]:
+    return [("hour", int(at // HOUR_S) * HOUR_S), ("day", int(at // DAY_S) * DAY_S), ("all", 0)]
+
+
+class Rollups:
+    """Counters and histograms of checks per hourly, daily and all-time window"""
+
+    def __init__(self, db_path: Optional[str] = ROLLUP_DB, languages: Optional[Iterable[str]] = None,
+                 hours: int = ROLLUP_HOURS, days: int = ROLLUP_DAYS,
+                 flush_interval_s: float = ROLLUP_FLUSH_INTERVAL_S):
+        self.db_path = db_path
+        # Per-language volumes are kept for these codes; anything else counts as "other"
+        self.languages = frozenset(languages) if languages is not None else None
+        self.retention = {"hour": hours * HOUR_S, "day": days * DAY_S}
+        self.flush_interval_s = flush_interval_s
+        self._pending: Counter = Counter()
+        self._lock = threading.Lock()
+        self._db = None
+        self._db_lock = threading.Lock()
+        self._last_flush = time.time()
+        self._flushing = False
+        self._counters = {"recorded": 0, "flushes": 0, "flush_errors": 0}
+        if db_path:
+            self._open_db(db_path)
+            atexit.register(self.flush)
+
+    # -----------------------------
+    # Recording
+    # -----------------------------
+    def _language(self, lang) -> str:
+        lang = str(lang or "en").lower()
+        if self.languages is not None and lang != "en" and lang not in self.languages:
+            return OTHER
+        return lang
+
+    def add(self, record: Dict, at: Optional[float] = None) -> None:
+        """Count one check record (as written to Firestore) at time `at` (default: now)"""
+        if at is None:
+            at = time.time()
+        risk = float(record.get("risk_score") or 0)
+        bucket = min(max(int(risk * RISK_BUCKETS // 100), 0), RISK_BUCKETS - 1)
+        values = [
+            ("checks", "", 1),
+            ("risk_sum", "", risk),
+            ("risk_bucket", str(bucket), 1),
+            ("lang", self._language(record.get("language")), 1),
+            ("claims", "", record.get("claims_count") or 0),
+            ("evidence", "", record.get("evidence_count") or 0),
+        ]
+        values += [("signal", signal, 1) for signal in set(record.get("manipulation_signals") or ())]
+        if record.get("near_duplicate"):
+            values.append(("near_duplicates", "", 1))
+        with self._lock:
+            for granularity, start in _windows_for(at):
+                for metric, key, value in values:
+                    self._pending[(granularity, start, metric, key)] += value
+            self._counters["recorded"] += 1
+        self._maybe_flush()
+
+    def add_many(self, records: Iterable[Dict]) -> None:
+        for record in records:
+            self.add(record)
+
+    def _prune_memory(self, now: float) -> None:
+        """Without a database the pending counters are the store; drop expired windows"""
+        cutoffs = {granularity: now - kept for granularity, kept in self.retention.items()}
+        for key in [key for key in self._pending if key[0] in cutoffs and key[1] < cutoffs[key[0]]]:
+            del self._pending[key]
+
+    # -----------------------------
+    # SQLite store
+    # -----------------------------
+    def _open_db(self, db_path: str) -> None:
+        self._db = sqlite3.connect(db_path, check_same_thread=False, timeout=5)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS rollups ("
+            " granularity TEXT NOT NULL, window_start INTEGER NOT NULL,"
+            " metric TEXT NOT NULL, key TEXT NOT NULL, value REAL NOT NULL,"
+            " PRIMARY KEY (granularity, window_start, metric, key)) WITHOUT ROWID"
+        )
+        self._db.commit()
+
+    def _maybe_flush(self) -> None:
+        with self._lock:
+            if self._flushing or time.time() - self._last_flush < self.flush_interval_s:
+                return
+            self._flushing = True
+            self._last_flush = time.time()
+        threading.Thread(target=self.flush, name="rollups-flush", daemon=True).start()
+
+    def flush(self) -> None:
+        """Add this process's pending updates into the SQLite store"""
+        try:
+            now = time.time()
+            if self._db is None:
+                with self._lock:
+                    self._prune_memory(now)
+                return
+            with self._lock:
+                pending, self._pending = self._pending, Counter()
+            if not pending:
+                return
+            try:
+                with self._db_lock:
+                    self._db.executemany(
+                        "INSERT INTO rollups (granularity, window_start, metric, key, value)"
+                        " VALUES (?, ?, ?, ?, ?)"
+                        " ON CONFLICT (granularity, window_start, metric, key)"
+                        " DO UPDATE SET value = value + excluded.value",
+                        [key + (value,) for key, value in pending.items()],
+                    )
+                    for granularity, kept in self.retention.items():
+                        self._db.execute("DELETE FROM rollups WHERE granularity = ? AND window_start < ?",
+                                         (granularity, now - kept))
+                    self._db.commit()
+                with self._lock:
+                    self._counters["flushes"] += 1
+            except sqlite3.Error as e:
+                print(f"Rollup flush failed, keeping {len(pending)} update(s) for the next one: {e}")
+                with self._lock:
+                    self._pending.update(pending)
+                    self._counters["flush_errors"] += 1
+        finally:
+            self._flushing = False
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pending.clear()
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM rollups")
+                self._db.commit()
+
+    def after_fork(self) -> None:
+        """Updates pending in the parent are flushed by the parent; reopen SQLite in the child"""
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._pending = Counter()
+        self._flushing = False
+        if self._db is not None:
+            self._db = None
+            self._open_db(self.db_path)
+
+    # -----------------------------
+    # Queries
+    # -----------------------------
+    def _totals(self, granularity: str, since: int) -> Counter:
+        totals: Counter = Counter()
+        if self._db is not None:
+            with self._db_lock:
+                rows = self._db.execute(
+                    "SELECT metric, key, SUM(value) FROM rollups"
+                    " WHERE granularity = ? AND window_start >= ? GROUP BY metric, key",
+                    (granularity, since),
+                ).fetchall()
+            for metric, key, value in rows:
+                totals[(metric, key)] = value
+        with self._lock:
+            for (g, start, metric, key), value in self._pending.items():
+                if g == granularity and start >= since:
+                    totals[(metric, key)] += value
+        return totals
+
+    def query(self, window: str = "24h", top: int = 10, now: Optional[float] = None) -> Dict:
+        """Stats for one of WINDOWS; windows are aligned to UTC hours and days"""
+        granularity, count = WINDOWS[window]
+        if now is None:
+            now = time.time()
+        if granularity == "all":
+            since = 0
+        else:
+            size = HOUR_S if granularity == "hour" else DAY_S
+            since = int(now // size) * size - (count - 1) * size
+        totals = self._totals(granularity, since)
+
+        checks = int(totals[("checks", "")])
+
+        def per_check(metric: str) -> float:
+            return round(totals[(metric, "")] / checks, 2) if checks else 0.0
+
+        signals = Counter({key: int(value) for (metric, key), value in totals.items() if metric == "signal"})
+        languages = {key: int(value) for (metric, key), value in totals.items() if metric == "lang"}
+        width = 100 // RISK_BUCKETS
+        return {
+            "window": window,
+            "since": datetime.fromtimestamp(since, timezone.utc).isoformat() if since else None,
+            "checks": checks,
+            "near_duplicates": int(totals[("near_duplicates", "")]),
+            "risk": {
+                "mean": per_check("risk_sum"),
+                "histogram": [{"from": i * width, "to": (i + 1) * width,
+                               "count": int(totals[("risk_bucket", str(i))])} for i in range(RISK_BUCKETS)],
+            },
+            "top_signals": [{"signal": signal, "count": count} for signal, count in signals.most_common(top)],
+            "languages": dict(sorted(languages.items(), key=lambda item: -item[1])),
+            "claims_per_check": per_check("claims"),
+            "evidence_per_check": per_check("evidence"),
+        }
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return dict(self._counters, pending=len(self._pending), persistent=self._db is not None)
+
+
+# -----------------------------
+# Backfill from an export
+# -----------------------------
+def unwrap_check_record(document: Dict) -> Dict:
+    """The check fields of an exported document (some exporters nest them under "data" next to the id)"""
+    return document["data"] if isinstance(document.get("data"), dict) else document
+
+
+def iter_check_records(path: str) -> Iterator[Dict]:
+    """Check documents from a JSON array (or {"documents": [...]}) or JSONL export"""
+    with open(path, "r", encoding="utf-8") as f:
+        first = f.read(1)
+        while first and first.isspace():
+            first = f.read(1)
+        f.seek(0)
+        if first == "[" or path.endswith(".json"):
+            data = json.load(f)
+            records = data.get("documents", []) if isinstance(data, dict) else data
+        else:
+            records = (json.loads(line) for line in f if line.strip())
+        for record in records:
+            yield unwrap_check_record(record)
+
+
+def backfill(rollups: Rollups, path: str, flush_every: int = 10000) -> Dict:
+    """Add every check in an export to the rollups; records without a timestamp are skipped"""
+    added = skipped = 0
+    for record in iter_check_records(path):
+        at = parse_timestamp(record.get("timestamp"))
+        if at is None:
+            skipped += 1
+            continue
+        rollups.add(record, at=at)
+        added += 1
+        if added % flush_every == 0:
+            rollups.flush()
+    rollups.flush()
+    return {"added": added, "skipped": skipped}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check analytics rollups")
+    parser.add_argument("--db", default=ROLLUP_DB or "data/rollups.db")
+    sub = parser.add_subparsers(dest="command", required=True)
+    fill = sub.add_parser("backfill", help="Build the rollups from exported check documents")
+    fill.add_argument("exports", nargs="+")
+    fill.add_argument("--replace", action="store_true", help="Clear the store first")
+    show = sub.add_parser("show", help="Print the stats for a window")
+    show.add_argument("--window", choices=sorted(WINDOWS), default="24h")
+    args = parser.parse_args()
+
+    # Backfills keep every window of the export; the server prunes to its retention on flush
+    rollups = Rollups(args.db, hours=10 ** 6, days=10 ** 6, flush_interval_s=float("inf"))
+    if args.command == "backfill":
+        if args.replace:
+            rollups.clear()
+        for path in args.exports:
+            start = time.perf_counter()
+            result = backfill(rollups, path)
+            print(f"{path}: {result['added']} check(s) added, {result['skipped']} without a timestamp skipped "
+                  f"in {time.perf_counter() - start:.1f}s")
+    else:
+        print(json.dumps(rollups.query(args.window), indent=2))
+
+
+if __name__ == "__main__":
+    main()
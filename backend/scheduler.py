@@ -0,0 +1,187 @@
+"""
+Quota-aware scheduling of outbound API calls.
+
+Every quota-limited API (Fact Check, Custom Search, Translate) has a token
+bucket sized so that no 60 second window can spend more than the API's
+per-minute quota: the bucket holds a burst of `burst_fraction` of the quota
+and refills with the rest over a minute. Each worker process gets an equal
+share of the project quota. QUOTA_WORKERS defaults to the worker count
+gunicorn.conf.py uses (WEB_CONCURRENCY, else one per core), and the
+post_fork hook there re-divides by the count gunicorn actually started; set
+QUOTA_WORKERS=1 for a single-process server.
+
+Callers wait for tokens in priority order. The priority comes from a
+context variable, set per request (interactive /v1/check, bulk batch
+checks, backfill jobs) and copied into the evidence fan-out threads.
+Lower classes cannot spend the part of the bucket reserved for the classes
+above them and give up sooner, so when quota is short interactive traffic
+still gets through and bulk work degrades: QuotaExceeded is raised instead
+of making the call, and callers search fewer sites or skip the tier.
+"""
+import heapq
+import itertools
+import multiprocessing
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+INTERACTIVE = 0
+BULK = 1
+BACKFILL = 2
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BULK: "bulk", BACKFILL: "backfill"}
+
+# Longest a caller waits for a token before giving up, per priority
+MAX_WAIT_S = {INTERACTIVE: 0.25, BULK: 2.0, BACKFILL: 10.0}
+# Share of each bucket a priority may not spend (kept for the classes above)
+RESERVED = {INTERACTIVE: 0.0, BULK: 0.2, BACKFILL: 0.5}
+
+QUOTA_WORKERS = int(os.environ.get("QUOTA_WORKERS",
+                                   os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count())))
+# Project-wide requests per minute; 0 disables the limit for an API
+DEFAULT_QUOTAS_PER_MIN = {
+    "fact_check": float(os.environ.get("QUOTA_FACT_CHECK_PER_MIN", "600")),
+    "custom_search": float(os.environ.get("QUOTA_CUSTOM_SEARCH_PER_MIN", "100")),
+    "translate": float(os.environ.get("QUOTA_TRANSLATE_PER_MIN", "600")),
+}
+BURST_FRACTION = float(os.environ.get("QUOTA_BURST_FRACTION", "0.2"))
+
+_priority: ContextVar[int] = ContextVar("outbound_priority", default=INTERACTIVE)
+
+
+class QuotaExceeded(Exception):
+    """No quota for an outbound call within the caller's wait limit"""
+
+
+@contextmanager
+def priority(value: int):
+    """Run outbound calls made in this context at the given priority"""
+    token = _priority.set(value)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> int:
+    return _priority.get()
+
+
+class TokenBucket:
+    """Continuously refilled bucket; the caller serializes access"""
+
+    def __init__(self, per_minute: float, burst_fraction: float = BURST_FRACTION):
+        self.per_minute = per_minute
+        self.capacity = max(per_minute * burst_fraction, 1.0)
+        # Burst plus refill over any 60 seconds never exceeds the quota
+        self.refill_per_s = max(per_minute - self.capacity, 0.0) / 60.0
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.refill_per_s)
+        self._updated = now
+
+    def seconds_until(self, tokens: float) -> float:
+        missing = tokens - self.tokens
+        if missing <= 0:
+            return 0.0
+        return missing / self.refill_per_s if self.refill_per_s else float("inf")
+
+
+class Scheduler:
+    """Token buckets per API with priority-ordered waiting"""
+
+    def __init__(self, quotas_per_min: Dict[str, float] = None, workers: int = QUOTA_WORKERS,
+                 burst_fraction: float = BURST_FRACTION):
+        self._quotas = DEFAULT_QUOTAS_PER_MIN if quotas_per_min is None else quotas_per_min
+        self._burst_fraction = burst_fraction
+        self._buckets = {api: TokenBucket(quota / max(workers, 1), burst_fraction)
+                         for api, quota in self._quotas.items() if quota > 0}
+        self._waiters: Dict[str, list] = {api: [] for api in self._buckets}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._counters = {api: {"granted": 0, "denied": 0, "waited_ms": 0.0} for api in self._buckets}
+
+    def acquire(self, api: str, cost: float = 1.0, priority: Optional[int] = None,
+                max_wait_s: Optional[float] = None) -> None:
+        """Take `cost` tokens for `api`, waiting in priority order; raises QuotaExceeded"""
+        bucket = self._buckets.get(api)
+        if bucket is None:
+            return
+        if priority is None:
+            priority = current_priority()
+        if max_wait_s is None:
+            max_wait_s = MAX_WAIT_S.get(priority, 0.0)
+        # A bucket smaller than reserve plus cost would otherwise never serve lower classes
+        floor = min(bucket.capacity * RESERVED.get(priority, 0.0), max(bucket.capacity - cost, 0.0))
+        started = time.monotonic()
+        deadline = started + max_wait_s
+        entry = (priority, next(self._seq))
+        waiters = self._waiters[api]
+        counters = self._counters[api]
+
+        with self._cond:
+            heapq.heappush(waiters, entry)
+            try:
+                while True:
+                    bucket.refill()
+                    if waiters[0] == entry and bucket.tokens - cost >= floor:
+                        bucket.tokens -= cost
+                        counters["granted"] += 1
+                        counters["waited_ms"] += (time.monotonic() - started) * 1000
+                        return
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        counters["denied"] += 1
+                        raise QuotaExceeded(f"{api}: no quota for {PRIORITY_NAMES.get(priority, priority)} "
+                                            f"call within {max_wait_s}s")
+                    if waiters[0] == entry:
+                        remaining = min(remaining, bucket.seconds_until(cost + floor))
+                    self._cond.wait(max(remaining, 0.001))
+            finally:
+                waiters.remove(entry)
+                heapq.heapify(waiters)
+                self._cond.notify_all()
+
+    def budget(self, api: str, priority: Optional[int] = None) -> float:
+        """Fraction of the bucket the given priority could spend right now (1.0 if unlimited)"""
+        bucket = self._buckets.get(api)
+        if bucket is None:
+            return 1.0
+        if priority is None:
+            priority = current_priority()
+        floor = bucket.capacity * RESERVED.get(priority, 0.0)
+        with self._cond:
+            bucket.refill()
+            return max(bucket.tokens - floor, 0.0) / (bucket.capacity - floor)
+
+    def set_workers(self, workers: int) -> None:
+        """Re-divide the project quota between `workers` processes, keeping each bucket's fill level"""
+        with self._cond:
+            for api, old in self._buckets.items():
+                old.refill()
+                bucket = TokenBucket(self._quotas[api] / max(workers, 1), self._burst_fraction)
+                # Tokens already spent stay spent; re-dividing must not hand out a fresh burst
+                bucket.tokens = bucket.capacity * old.tokens / old.capacity
+                self._buckets[api] = bucket
+            self._cond.notify_all()
+
+    def after_fork(self) -> None:
+        """Waiters belong to the parent's threads"""
+        self._cond = threading.Condition()
+        self._waiters = {api: [] for api in self._buckets}
+
+    def stats(self) -> Dict:
+        with self._cond:
+            stats = {}
+            for api, bucket in self._buckets.items():
+                bucket.refill()
+                stats[api] = dict(self._counters[api], remaining=int(bucket.tokens),
+                                  capacity=int(bucket.capacity), per_minute=bucket.per_minute,
+                                  waiting=len(self._waiters[api]))
+                stats[api]["waited_ms"] = round(stats[api]["waited_ms"], 1)
+            return stats
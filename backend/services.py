@@ -0,0 +1,144 @@
+"""
+Per-process access to credentials and Google/Firebase services.
+
+Nothing heavy happens at import time. Each SDK is imported and each service is
+initialized the first time a feature needs it, exactly once per process, and
+the time spent is recorded in `init_timings()` so startup cost is visible.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+GOOGLE_SCOPES = [
+    'https://www.googleapis.com/auth/cloud-platform',
+    'https://www.googleapis.com/auth/factchecktools',
+    'https://www.googleapis.com/auth/cloud-translation'
+]
+
+_lock = threading.RLock()
+_state: Dict[str, Any] = {}
+_timings: Dict[str, float] = {}
+
+# Plain data that stays valid in a forked worker. Everything else holds
+# sockets, gRPC channels or threads and is rebuilt in each worker process.
+FORK_SAFE_STATE = ("read_service_account", "google_credentials", "firestore_import")
+
+
+def record_timing(name: str, elapsed_ms: float) -> None:
+    _timings[name] = round(elapsed_ms, 1)
+    print(f"⏱️ {name}: {_timings[name]} ms")
+
+
+@contextmanager
+def timed(name: str):
+    """Record how long a one-time import or initialization took"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_timing(name, (time.perf_counter() - start) * 1000)
+
+
+def init_timings() -> Dict[str, float]:
+    return dict(_timings)
+
+
+def _once(name: str, factory):
+    value = _state.get(name)
+    if value is not None:
+        return value
+    with _lock:
+        value = _state.get(name)
+        if value is None:
+            with timed(name):
+                value = factory()
+            _state[name] = value
+        return value
+
+
+def _reset_after_fork() -> None:
+    global _lock
+    _lock = threading.RLock()
+    for name in list(_state):
+        if name not in FORK_SAFE_STATE:
+            del _state[name]
+    firebase_admin = sys.modules.get("firebase_admin")
+    if firebase_admin is not None:
+        # The default app caches its Firestore client; start over in the child
+        firebase_admin._apps.clear()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+# -----------------------------
+# Credentials
+# -----------------------------
+def service_account_info() -> Dict:
+    """Service account JSON, read from FIREBASE_CRED_PATH once"""
+    def load():
+        cred_path = os.environ.get("FIREBASE_CRED_PATH")
+        if not cred_path:
+            raise ValueError("Please set the FIREBASE_CRED_PATH environment variable.")
+        with open(cred_path, 'r') as f:
+            return json.load(f)
+    return _once("read_service_account", load)
+
+
+def project_id() -> Optional[str]:
+    return service_account_info().get('project_id')
+
+
+def google_credentials():
+    """Google Cloud credentials from the same service account"""
+    def load():
+        from google.oauth2 import service_account
+        return service_account.Credentials.from_service_account_info(
+            service_account_info(), scopes=GOOGLE_SCOPES)
+    return _once("google_credentials", load)
+
+
+# -----------------------------
+# Firebase / Firestore
+# -----------------------------
+def firestore_client():
+    """Firestore client; initializes the Firebase app on first use"""
+    def load():
+        import firebase_admin
+        from firebase_admin import credentials, firestore
+        if not firebase_admin._apps:
+            firebase_admin.initialize_app(credentials.Certificate(service_account_info()))
+        return firestore.client()
+    return _once("firebase_init", load)
+
+
+def server_timestamp():
+    """Firestore's SERVER_TIMESTAMP sentinel"""
+    def load():
+        from firebase_admin import firestore
+        return firestore.SERVER_TIMESTAMP
+    return _once("firestore_import", load)
+
+
+# -----------------------------
+# Google API clients and Vertex AI
+# -----------------------------
+def google_clients():
+    """Process-wide registry of Google API clients"""
+    def load():
+        from google_clients import GoogleClientRegistry
+        return GoogleClientRegistry(google_credentials())
+    return _once("google_clients", load)
+
+
+def init_vertex() -> bool:
+    """Initialize Vertex AI for this project once per process"""
+    def load():
+        from google.cloud import aiplatform
+        aiplatform.init(project=project_id(), credentials=google_credentials())
+        return True
+    return _once("vertex_init", load)
@@ -0,0 +1,142 @@
+"""
+Single-flight coalescing of identical concurrent calls.
+
+When several threads ask for the same key at the same time, the first one
+(the leader) makes the call and the others wait for it and receive its
+result, or its exception. Nothing is cached: once the call finishes the
+next request for the key starts a new one.
+
+With a `lock_dir`, leaders in different worker processes on one host also
+coordinate: the leader takes an flock on a lock file for the key (keys are
+striped over a fixed number of files). A leader that had to wait for
+another process calls `recheck` first, so it can pick up the result the
+other process just stored in a shared store (the evidence cache's SQLite
+tier) instead of calling the upstream again.
+"""
+import os
+import threading
+import time
+import zlib
+from typing import Any, Callable, Dict, Hashable, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: coordinate within the process only
+    fcntl = None
+
+SINGLEFLIGHT_LOCK_DIR = os.environ.get("SINGLEFLIGHT_LOCK_DIR")
+LOCK_STRIPES = 256
+# Give up on another process's lock after this long and call anyway
+LOCK_TIMEOUT_S = float(os.environ.get("SINGLEFLIGHT_LOCK_TIMEOUT_S", "10"))
+LOCK_POLL_S = 0.01
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Shares one in-flight call among concurrent callers with the same key"""
+
+    def __init__(self, name: str, lock_dir: Optional[str] = None, lock_stripes: int = LOCK_STRIPES,
+                 lock_timeout_s: float = LOCK_TIMEOUT_S):
+        self.name = name
+        self.lock_dir = lock_dir if fcntl is not None else None
+        self.lock_stripes = lock_stripes
+        self.lock_timeout_s = lock_timeout_s
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self._counters = {"calls": 0, "shared": 0, "shared_errors": 0,
+                          "cross_process_waits": 0, "cross_process_hits": 0, "lock_timeouts": 0}
+        if self.lock_dir:
+            os.makedirs(self.lock_dir, exist_ok=True)
+
+    def do(self, key: Hashable, fn: Callable[[], Any],
+           recheck: Optional[Callable[[], Any]] = None) -> Any:
+        """
+        Return fn() for `key`, sharing the call with concurrent callers.
+        `recheck` (cross-process mode only) returns a stored result or None.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._counters["calls"] += 1
+
+        if not leader:
+            call.done.wait()
+            with self._lock:
+                self._counters["shared"] += 1
+                if call.error is not None:
+                    self._counters["shared_errors"] += 1
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._lead(key, fn, recheck)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    # -----------------------------
+    # Cross-process coordination
+    # -----------------------------
+    def _lead(self, key: Hashable, fn: Callable[[], Any], recheck: Optional[Callable[[], Any]]) -> Any:
+        if not self.lock_dir:
+            return fn()
+        stripe = zlib.crc32(repr(key).encode("utf-8")) % self.lock_stripes
+        # Opened per call: flocks belong to the open file, which a fork would share
+        fd = os.open(os.path.join(self.lock_dir, f"{self.name}-{stripe}.lock"), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            waited = self._acquire(fd)
+            if waited and recheck is not None:
+                value = recheck()
+                if value is not None:
+                    with self._lock:
+                        self._counters["cross_process_hits"] += 1
+                    return value
+            return fn()
+        finally:
+            os.close(fd)  # Releases the flock
+
+    def _acquire(self, fd: int) -> bool:
+        """Lock the file; returns whether another process held it"""
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return False
+        except BlockingIOError:
+            pass
+        with self._lock:
+            self._counters["cross_process_waits"] += 1
+        deadline = time.monotonic() + self.lock_timeout_s
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_S)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return True
+            except BlockingIOError:
+                continue
+        with self._lock:
+            self._counters["lock_timeouts"] += 1
+        return True
+
+    def after_fork(self) -> None:
+        """Calls in flight in the parent have no thread in the child to finish them"""
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return dict(self._counters, in_flight=len(self._calls))
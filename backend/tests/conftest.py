@@ -0,0 +1,27 @@
+import os
+import sys
+
+import pytest
+
+# Tests import the backend's flat modules the way the app does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def app_module(monkeypatch):
+    """The app with fake backends, no shared caches and admission control off"""
+    import app
+    from admission import AdmissionController
+    from benchmarks.fakes import FakeBackends
+    from evidence_cache import EvidenceCache
+
+    FakeBackends({}).install(app)
+    monkeypatch.setattr(app, "evidence_cache", EvidenceCache(max_entries=0))
+    monkeypatch.setattr(app, "NEAR_DUP_ENABLED", False)
+    monkeypatch.setattr(app, "admission", AdmissionController(enabled=False))
+    return app
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.create_app().test_client()
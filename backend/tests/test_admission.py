@@ -0,0 +1,101 @@
+"""Admission modes, load shedding and the X-Request-Start queue wait"""
+import time
+
+import pytest
+
+from admission import (FULL, LOCAL, REDUCED, SHED, AdmissionController, Overloaded, current_mode,
+                       queue_ms_from_header)
+
+
+@pytest.fixture
+def controller():
+    return AdmissionController(capacity=8, enabled=True, reduced_at=0.5, local_at=0.75, slow_ms=1000,
+                               very_slow_ms=2500, queue_ms=500, latency_ttl_s=5)
+
+
+@pytest.mark.parametrize("in_flight,expected", [(1, FULL), (4, FULL), (5, REDUCED), (6, REDUCED),
+                                                (7, LOCAL), (8, LOCAL), (9, SHED)])
+def test_mode_follows_checks_in_flight(controller, in_flight, expected):
+    assert controller.choose(in_flight) == expected
+
+
+@pytest.mark.parametrize("evidence_ms,expected", [(800, FULL), (1500, REDUCED), (3000, LOCAL)])
+def test_slow_evidence_lowers_the_mode(controller, evidence_ms, expected):
+    controller.observe("evidence", evidence_ms)
+
+    assert controller.choose(1) == expected
+
+
+def test_stale_latency_is_ignored(controller):
+    controller.observe("evidence", 3000)
+
+    assert controller.choose(1, now=time.monotonic() + 10) == FULL
+
+
+def test_other_stages_do_not_drive_the_mode(controller):
+    controller.observe("localized", 5000)
+
+    assert controller.choose(1) == FULL
+
+
+@pytest.mark.parametrize("queue_ms,expected", [(400, FULL), (600, REDUCED), (1100, LOCAL), (2100, SHED)])
+def test_each_doubling_of_queue_wait_lowers_the_mode(controller, queue_ms, expected):
+    assert controller.choose(1, queue_ms=queue_ms) == expected
+
+
+def test_bulk_requests_go_one_mode_further_down_under_load(controller):
+    assert controller.choose(1, bulk=True) == FULL
+    assert controller.choose(5, bulk=True) == LOCAL
+    assert controller.choose(7, bulk=True) == SHED
+
+
+def test_disabled_controller_admits_everything_in_full():
+    controller = AdmissionController(capacity=1, enabled=False)
+
+    assert controller.choose(100, queue_ms=60000, bulk=True) == FULL
+
+
+def test_admit_counts_tickets_and_sheds_beyond_capacity():
+    controller = AdmissionController(capacity=2, enabled=True)
+    first = controller.admit()
+    controller.admit()
+
+    with pytest.raises(Overloaded) as shed:
+        controller.admit()
+    assert 1 <= shed.value.retry_after_s <= 30
+
+    first.release()
+    first.release()
+    assert controller.admit().mode_name in ("reduced", "local")
+    stats = controller.stats()
+    assert (stats["in_flight"], stats["shed"]) == (2, 1)
+
+
+def test_ticket_sets_the_mode_for_its_context(controller):
+    controller.observe("evidence", 1500)
+
+    with controller.admit() as ticket:
+        assert ticket.mode == REDUCED
+        assert current_mode() == REDUCED
+    assert current_mode() == FULL
+    assert controller.stats()["in_flight"] == 0
+
+
+@pytest.mark.parametrize("value", ["1700000000.0", "t=1700000000.0", "1700000000000", "t=1700000000000000"])
+def test_queue_wait_from_request_start_header(value):
+    # The same start time in seconds, milliseconds and microseconds
+    assert queue_ms_from_header(value, now=1700000000.25) == pytest.approx(250)
+
+
+@pytest.mark.parametrize("value", [None, "", "soon", "t="])
+def test_missing_or_invalid_request_start_is_no_wait(value):
+    assert queue_ms_from_header(value, now=1700000000.0) == 0.0
+
+
+def test_shed_check_is_a_503_with_retry_after(app_module, client, monkeypatch):
+    monkeypatch.setattr(app_module, "admission", AdmissionController(capacity=0, enabled=True))
+
+    response = client.post("/v1/check", json={"text": "Drinking hot water cures the flu"})
+
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) >= 1
@@ -0,0 +1,58 @@
+"""Input handling of /v1/check/batch"""
+import pytest
+
+BAD_TEXT = {"error": "Text input is required (a non-empty string)"}
+
+
+@pytest.mark.parametrize("body", [{"items": "abc"}, {"texts": "abc"}, {"items": {"text": "abc"}}])
+def test_items_must_be_a_list(client, body):
+    response = client.post("/v1/check/batch", json=body)
+
+    assert response.status_code == 400
+    assert "must be a list" in response.json["error"]
+
+
+def test_body_must_be_an_object(client):
+    assert client.post("/v1/check/batch", json=["abc"]).status_code == 400
+
+
+def test_bad_items_get_their_own_error(client):
+    response = client.post("/v1/check/batch", json={"items": [
+        {"text": 123}, {"text": "  "}, None, {"text": "Drinking hot water cures the flu"},
+        {"text": "Drinking hot water cures the flu", "lang": 7},
+    ], "return_level": "simple"})
+
+    assert response.status_code == 200
+    results = response.json["results"]
+    assert results[:3] == [BAD_TEXT, BAD_TEXT, BAD_TEXT]
+    assert "risk" in results[3]
+    assert results[4] == {"error": "lang must be a string"}
+
+
+@pytest.mark.parametrize("return_level", ["simple", "detailed"])
+@pytest.mark.parametrize("lang", ["en", "hi"])
+def test_batch_items_match_single_checks(client, return_level, lang):
+    texts = ["Drinking hot water cures the flu. Doctors hate this miracle trick!!!",
+             "The ministry published the new vaccination schedule on Monday."]
+
+    single = [client.post("/v1/check", json={"text": text, "lang": lang, "return_level": return_level}).json
+              for text in texts]
+    batch = client.post("/v1/check/batch", json={"texts": texts, "lang": lang,
+                                                 "return_level": return_level}).json
+
+    for expected, result in zip(single, batch["results"]):
+        expected.pop("debug", None)
+        result.pop("debug", None)
+        assert result == expected
+
+
+def test_batch_debug_reports_each_items_own_lookups(client):
+    texts = ["Drinking hot water cures the flu", "Drinking hot water cures the flu",
+             "The ministry published the new vaccination schedule"]
+
+    results = client.post("/v1/check/batch", json={"texts": texts}).json["results"]
+
+    fanouts = [result["debug"]["evidence_fanout"] for result in results]
+    single = client.post("/v1/check", json={"text": texts[2]}).json["debug"]["evidence_fanout"]
+    assert fanouts[0]["tasks"] == fanouts[1]["tasks"] == single["tasks"]
+    assert [fanout["unique_queries"] for fanout in fanouts] == [1, 1, 1]
@@ -0,0 +1,64 @@
+"""Local ClaimReview index: segments, search and deduplication across dumps"""
+import json
+
+import pytest
+
+from claimreview_index import ClaimReviewIndex
+
+
+def api_claim(text, url, rating, date="2024-01-01T00:00:00Z", title=None):
+    return {"text": text, "claimReview": [{
+        "url": url, "title": title or text, "publisher": {"name": "Checker"},
+        "textualRating": rating, "reviewDate": date, "languageCode": "en",
+    }]}
+
+
+def write_dump(path, claims):
+    path.write_text("".join(json.dumps(claim) + "\n" for claim in claims))
+    return str(path)
+
+
+@pytest.fixture
+def index(tmp_path):
+    return ClaimReviewIndex(str(tmp_path / "index"), reload_s=0)
+
+
+def test_search_ranks_matching_reviews(index, tmp_path):
+    index.add_dump(write_dump(tmp_path / "dump.jsonl", [
+        api_claim("Garlic cures covid", "https://checker.org/garlic", "False"),
+        api_claim("Garlic lowers blood pressure slightly", "https://checker.org/pressure", "Mostly true"),
+        api_claim("5G towers spread covid", "https://checker.org/5g", "False"),
+    ]))
+
+    results = index.search("does garlic cure covid")
+
+    assert [review["url"] for review in results] == ["https://checker.org/garlic"]
+    assert results[0]["score"] > 0
+
+
+def test_newest_segment_wins_for_a_duplicate_url(index, tmp_path):
+    url = "https://checker.org/garlic"
+    # The older copy matches the query better, but the review was updated since
+    index.add_dump(write_dump(tmp_path / "old.jsonl", [
+        api_claim("Garlic cures covid garlic covid", url, "Unproven"),
+    ]))
+    index.add_dump(write_dump(tmp_path / "new.jsonl", [
+        api_claim("Eating garlic cures covid infections quickly", url, "False", date="2024-06-01T00:00:00Z"),
+        api_claim("Garlic cures covid in a day", "https://checker.org/garlic-day", "False"),
+    ]))
+
+    results = index.search("garlic cures covid", k=5)
+
+    assert sorted(review["url"] for review in results) == [url, "https://checker.org/garlic-day"]
+    assert next(review for review in results if review["url"] == url)["rating"] == "False"
+
+
+def test_compact_keeps_the_newest_copy(index, tmp_path):
+    url = "https://checker.org/garlic"
+    index.add_dump(write_dump(tmp_path / "old.jsonl", [api_claim("Garlic cures covid", url, "Unproven")]))
+    index.add_dump(write_dump(tmp_path / "new.jsonl", [api_claim("Garlic cures covid", url, "False")]))
+
+    index.compact()
+
+    assert index.stats()["segments"] == 1
+    assert [review["rating"] for review in index.search("garlic cures covid")] == ["False"]
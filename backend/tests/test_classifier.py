@@ -0,0 +1,119 @@
+"""Micro-batching, timeouts and risk scoring of the local classifier (classifier.py)"""
+import threading
+
+import pytest
+
+from classifier import Classifier, MicroBatcher
+
+TEXTS = [
+    "Doctors confirm this miracle cure works overnight",
+    "The ministry published the vaccination schedule",
+    "Share before it is deleted: the truth they hide",
+    "Rainfall was above average this monsoon",
+]
+
+
+class TinyModel:
+    """Scores a text by its share of alarm words and records every batch it is given"""
+
+    ALARM = {"miracle", "cure", "share", "deleted", "truth", "hide"}
+
+    def __init__(self, release: threading.Event = None):
+        self.batches = []
+        self.release = release
+
+    def predict_batch(self, texts):
+        if self.release is not None:
+            self.release.wait(5)
+        self.batches.append(list(texts))
+        return [sum(word in self.ALARM for word in text.lower().split()) / len(text.split()) for text in texts]
+
+
+def test_submissions_are_grouped_into_batches():
+    model = TinyModel()
+    batcher = MicroBatcher(model.predict_batch, max_batch=8, max_wait_ms=500)
+    pending = [batcher.submit(text) for text in TEXTS * 2]
+    for item in pending:
+        assert item.done.wait(5)
+
+    assert [len(batch) for batch in model.batches] == [8]
+    assert [item.score for item in pending] == model.predict_batch(TEXTS * 2)
+    assert batcher.stats()["largest_batch"] == 8
+
+
+def test_batches_never_exceed_max_batch():
+    model = TinyModel()
+    batcher = MicroBatcher(model.predict_batch, max_batch=3, max_wait_ms=200)
+    pending = [batcher.submit(text) for text in TEXTS * 2]
+    for item in pending:
+        assert item.done.wait(5)
+
+    assert sum(len(batch) for batch in model.batches) == 8
+    assert max(len(batch) for batch in model.batches) == 3
+
+
+def test_late_score_returns_none():
+    release = threading.Event()
+    clf = Classifier(load_model=lambda: TinyModel(release), max_wait_ms=0, timeout_ms=50)
+    try:
+        assert clf.score(TEXTS[0]) is None
+        assert clf.stats()["timeouts"] == 1
+    finally:
+        release.set()
+
+
+def test_failed_batch_returns_none():
+    class BrokenModel:
+        def predict_batch(self, texts):
+            raise RuntimeError("out of memory")
+
+    clf = Classifier(load_model=BrokenModel, max_wait_ms=0)
+    assert clf.score(TEXTS[0]) is None
+    assert clf.stats()["errors"] == 1
+
+
+def test_disabled_classifier_is_a_no_op():
+    clf = Classifier(model_name="")
+    assert clf.submit(TEXTS[0]) is None
+    assert clf.score(TEXTS[0]) is None
+
+
+@pytest.fixture
+def check_client(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, "classifier", Classifier(load_model=TinyModel, max_wait_ms=0))
+    seen = []
+    calculate_risk_score = app_module.calculate_risk_score
+
+    def recording_risk_score(*args, **kwargs):
+        result = calculate_risk_score(*args, **kwargs)
+        seen.append(result)
+        return result
+
+    monkeypatch.setattr(app_module, "calculate_risk_score", recording_risk_score)
+    return app_module.create_app().test_client(), seen
+
+
+def test_score_reaches_risk_score(check_client):
+    client, seen = check_client
+    text = "Share this miracle cure before it is deleted"
+    expected = TinyModel().predict_batch([text])[0]
+
+    response = client.post("/v1/check", json={"text": text, "lang": "en", "return_level": "simple"})
+
+    assert response.status_code == 200
+    assert response.json["risk"]["classifier_score"] == round(expected, 3)
+    assert [risk["classifier_score"] for risk in seen] == [round(expected, 3)]
+    assert any("Language model" in rationale for rationale in response.json["risk"]["rationales"])
+
+
+def test_tiny_transformer_scores_match_unbatched():
+    pytest.importorskip("torch")
+    pytest.importorskip("transformers")
+    from benchmarks.bench_classifier import tiny_model
+
+    model = tiny_model(TEXTS, threads=1)
+    batched = model.predict_batch(TEXTS)
+    single = [model.predict_batch([text])[0] for text in TEXTS]
+
+    assert all(0.0 <= score <= 1.0 for score in batched)
+    assert batched == pytest.approx(single, abs=1e-5)
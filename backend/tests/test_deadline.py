@@ -0,0 +1,32 @@
+"""The client evidence deadline ("deadline_ms") of /v1/check and /v1/check/batch"""
+import pytest
+
+TEXT = "Drinking hot water cures the flu"
+
+
+@pytest.mark.parametrize("endpoint,body", [
+    ("/v1/check", {"text": TEXT}),
+    ("/v1/check/batch", {"texts": [TEXT]}),
+])
+@pytest.mark.parametrize("deadline_ms", ["soon", [100], {"ms": 1}, True, -1, "nan", "-5"])
+def test_bad_deadline_is_a_400(client, endpoint, body, deadline_ms):
+    response = client.post(endpoint, json=dict(body, deadline_ms=deadline_ms))
+
+    assert response.status_code == 400
+    assert "deadline_ms" in response.json["error"]
+
+
+def test_deadline_is_capped(app_module, client):
+    response = client.post("/v1/check", json={"text": TEXT, "deadline_ms": 10 ** 9})
+    fanout = response.json["debug"]["evidence_fanout"]
+
+    assert response.status_code == 200
+    assert fanout["deadline_ms"] == app_module.EVIDENCE_DEADLINE_MS
+
+
+@pytest.mark.parametrize("deadline_ms", [0, 250, "250"])
+def test_valid_deadlines(client, deadline_ms):
+    response = client.post("/v1/check", json={"text": TEXT, "deadline_ms": deadline_ms})
+
+    assert response.status_code == 200
+    assert response.json["debug"]["evidence_fanout"]["deadline_ms"] == float(deadline_ms)
@@ -0,0 +1,159 @@
+"""Evidence cache: TTLs, LRU bound, the SQLite tier and coalesced loads"""
+import threading
+import time
+
+import pytest
+
+import evidence_cache
+from evidence_cache import EvidenceCache, normalize_claim_query
+
+EVIDENCE = [{"url": "https://example.org/check", "stance": "refute"}]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(evidence_cache, "time", clock)
+    return clock
+
+
+def test_queries_are_normalized():
+    cache = EvidenceCache()
+    cache.set("fact_check", "  Vaccines   CAUSE autism ", EVIDENCE)
+
+    assert cache.get("fact_check", "vaccines cause autism") == EVIDENCE
+    assert cache.get("search:who.int", "vaccines cause autism") is None
+    assert normalize_claim_query("x" * 150) == "x" * 100
+
+
+def test_hits_are_copies():
+    cache = EvidenceCache()
+    cache.set("fact_check", "claim", EVIDENCE)
+
+    cache.get("fact_check", "claim")[0]["stance"] = "support"
+
+    assert cache.get("fact_check", "claim") == EVIDENCE
+
+
+def test_entries_expire_per_source(clock):
+    cache = EvidenceCache(ttls={"fact_check": 600, "search": 60})
+    cache.set("fact_check", "claim", EVIDENCE)
+    cache.set("search:who.int", "claim", EVIDENCE)
+
+    clock.now += 120
+    assert cache.get("search:who.int", "claim") is None
+    assert cache.get("fact_check", "claim") == EVIDENCE
+
+    clock.now += 600
+    assert cache.get("fact_check", "claim") is None
+
+
+def test_empty_results_are_cached_briefly(clock):
+    cache = EvidenceCache(negative_ttl=30)
+    cache.set("fact_check", "unanswerable", [])
+
+    assert cache.get("fact_check", "unanswerable") == []
+    assert cache.stats()["negative_hits"] == 1
+    clock.now += 60
+    assert cache.get("fact_check", "unanswerable") is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = EvidenceCache(max_entries=2)
+    cache.set("fact_check", "a", EVIDENCE)
+    cache.set("fact_check", "b", EVIDENCE)
+    cache.get("fact_check", "a")
+
+    cache.set("fact_check", "c", EVIDENCE)
+
+    assert cache.get("fact_check", "b") is None
+    assert cache.get("fact_check", "a") == EVIDENCE
+    assert cache.stats()["evictions"] == 1
+
+
+def test_sqlite_tier_survives_a_restart(tmp_path):
+    db_path = str(tmp_path / "evidence.db")
+    EvidenceCache(db_path=db_path).set("fact_check", "claim", EVIDENCE)
+
+    restarted = EvidenceCache(db_path=db_path)
+
+    assert restarted.get("fact_check", "claim") == EVIDENCE
+    assert restarted.get("fact_check", "claim") == EVIDENCE
+    stats = restarted.stats()
+    assert (stats["disk_hits"], stats["hits"], stats["persistent"]) == (1, 1, True)
+
+
+def test_expired_sqlite_entries_are_ignored(tmp_path, clock):
+    db_path = str(tmp_path / "evidence.db")
+    EvidenceCache(db_path=db_path, ttls={"fact_check": 60}).set("fact_check", "claim", EVIDENCE)
+
+    clock.now += 120
+    assert EvidenceCache(db_path=db_path).get("fact_check", "claim") is None
+
+
+def test_sqlite_tier_is_reopened_after_fork(tmp_path):
+    cache = EvidenceCache(db_path=str(tmp_path / "evidence.db"))
+    cache.set("fact_check", "claim", EVIDENCE)
+
+    cache.after_fork()
+
+    cache.set("fact_check", "other", EVIDENCE)
+    assert EvidenceCache(db_path=str(tmp_path / "evidence.db")).get("fact_check", "other") == EVIDENCE
+
+
+def test_get_or_load_caches_what_the_loader_returns():
+    cache = EvidenceCache()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return EVIDENCE
+
+    assert cache.get_or_load("fact_check", "claim", loader) == EVIDENCE
+    assert cache.get_or_load("fact_check", "claim", loader) == EVIDENCE
+    assert calls == [1]
+
+
+def test_loader_errors_are_not_cached():
+    cache = EvidenceCache()
+
+    def failing():
+        raise RuntimeError("upstream down")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_load("fact_check", "claim", failing)
+    assert cache.get_or_load("fact_check", "claim", lambda: EVIDENCE) == EVIDENCE
+
+
+def test_concurrent_misses_share_one_load():
+    cache = EvidenceCache()
+    calls = []
+    release = threading.Event()
+
+    def loader():
+        calls.append(1)
+        release.wait(5)
+        return EVIDENCE
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_load("fact_check", "claim", loader)))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert calls == [1]
+    assert results == [EVIDENCE] * 4
+    # Every caller gets its own copy
+    assert len({id(result[0]) for result in results}) == 4
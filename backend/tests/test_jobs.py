@@ -0,0 +1,148 @@
+"""Re-scoring jobs: chunked runs, checkpoints, resume, locks and slots"""
+import json
+import os
+
+import pytest
+
+import jobs
+from jobs import JobsBusy, JobStore, acquire_lock, lock_held, run_job, try_lock
+
+TEXTS = [
+    "BREAKING!!! Doctors don't want you to know this miracle cure",
+    "The city council approved the new budget on Tuesday",
+    "Share before they delete it: 5G towers spread the virus",
+    "Scientists publish a peer-reviewed study on sleep",
+]
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    # The pool imports the app already loaded here instead of spawning fresh interpreters
+    monkeypatch.setattr(jobs, "JOBS_START_METHOD", "fork")
+    monkeypatch.setattr(jobs, "JOBS_NICE", 0)
+    monkeypatch.setattr(jobs, "JOBS_LOCK_WAIT_S", 0.1)
+    (tmp_path / "exports").mkdir()
+    return JobStore(root=str(tmp_path / "jobs"), input_dir=str(tmp_path / "exports"), workers=1,
+                    max_running=1)
+
+
+@pytest.fixture
+def export(tmp_path):
+    path = tmp_path / "exports" / "checks.jsonl"
+    lines = [json.dumps({"id": f"check-{i}", "data": {"input_text": text, "risk_score": 50}})
+             for i, text in enumerate(TEXTS)]
+    # A blank line is skipped, a record without text gets an error row
+    lines[2:2] = ["", json.dumps({"id": "empty", "input_text": "  "})]
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+
+def read_rows(job_dir):
+    rows = []
+    for name in sorted(os.listdir(job_dir)):
+        if name.startswith("part-"):
+            with open(os.path.join(job_dir, name)) as f:
+                rows.extend(json.loads(line) for line in f)
+    return rows
+
+
+def test_job_writes_one_row_per_record_in_input_order(store, export):
+    job_id = store.create(export)
+    job_dir = os.path.join(store.root, job_id)
+
+    checkpoint = run_job(job_dir, workers=1, chunk_lines=2, task_lines=1)
+
+    assert checkpoint["done"]
+    assert (checkpoint["parts"], checkpoint["rescored"], checkpoint["failed"]) == (3, 4, 1)
+    rows = read_rows(job_dir)
+    assert [row["line"] for row in rows] == [1, 2, 4, 5, 6]
+    assert [row.get("id") for row in rows] == ["check-0", "check-1", None, "check-2", "check-3"]
+    assert rows[2]["error"] == "no input_text"
+    assert all(0 <= row["risk_score"] <= 100 and row["previous_risk_score"] == 50
+               for row in rows if "error" not in row)
+    assert checkpoint["offset"] == os.path.getsize(export)
+
+
+def test_resumed_job_continues_from_its_checkpoint(store, export):
+    job_id = store.create(export)
+    job_dir = os.path.join(store.root, job_id)
+    run_job(job_dir, workers=1, chunk_lines=2, task_lines=1)
+    complete = read_rows(job_dir)
+
+    # Pretend the run stopped after the first part was written
+    with open(export, "rb") as f:
+        offset = len(f.readline()) + len(f.readline())
+    with open(os.path.join(job_dir, "part-00000.jsonl"), "w") as f:
+        f.write(json.dumps({"line": 1, "kept": True}) + "\n" + json.dumps({"line": 2, "kept": True}) + "\n")
+    for name in ("part-00001.jsonl", "part-00002.jsonl"):
+        os.remove(os.path.join(job_dir, name))
+    jobs.write_json_atomic(os.path.join(job_dir, "checkpoint.json"), {
+        "offset": offset, "lines": 2, "parts": 1, "rescored": 2, "failed": 0, "done": False
+    })
+    assert store.status(job_id)["state"] == "interrupted"
+
+    checkpoint = run_job(job_dir, workers=1, chunk_lines=2, task_lines=1)
+
+    rows = read_rows(job_dir)
+    assert rows[:2] == [{"line": 1, "kept": True}, {"line": 2, "kept": True}]
+    assert rows[2:] == complete[2:]
+    assert (checkpoint["parts"], checkpoint["rescored"], checkpoint["failed"]) == (3, 4, 1)
+    assert store.status(job_id)["state"] == "done"
+
+
+def test_job_held_by_another_process_is_not_run(store, export):
+    job_dir = os.path.join(store.root, store.create(export))
+    fd = try_lock(os.path.join(job_dir, "lock"))
+    try:
+        assert lock_held(job_dir)
+        assert acquire_lock(job_dir, wait_s=0.1) is None
+        assert run_job(job_dir, workers=1) is None
+    finally:
+        os.close(fd)
+    assert not lock_held(job_dir)
+
+
+def test_status_states(store, export):
+    job_id = store.create(export)
+    job_dir = os.path.join(store.root, job_id)
+    assert store.status(job_id)["state"] == "queued"
+
+    jobs.write_json_atomic(os.path.join(job_dir, "checkpoint.json"), {
+        "offset": 10, "lines": 1, "parts": 1, "rescored": 1, "failed": 0, "done": False, "error": "boom"
+    })
+    status = store.status(job_id)
+    assert (status["state"], status["error"], status["parts"]) == ("failed", "boom", ["part-00000.jsonl"])
+    assert 0 < status["progress"] < 1
+
+    assert store.status("0123456789ab") is None
+    assert store.status("../../etc") is None
+
+
+def test_inputs_must_be_exports(store, export, tmp_path):
+    assert store.resolve_input("checks.jsonl") == os.path.realpath(export)
+    (tmp_path / "secret.jsonl").write_text("{}\n")
+    for name in ("../secret.jsonl", str(tmp_path / "secret.jsonl"), "missing.jsonl"):
+        with pytest.raises(ValueError):
+            store.resolve_input(name)
+
+
+def test_submission_without_a_free_slot_is_refused(store, export):
+    os.makedirs(store.root)
+    slot_fd = try_lock(os.path.join(store.root, "slot-0.lock"))
+    try:
+        with pytest.raises(JobsBusy):
+            store.submit(export)
+        assert os.listdir(store.root) == ["slot-0.lock"]
+    finally:
+        os.close(slot_fd)
+
+
+def test_submitted_job_runs_in_the_background(store, export):
+    job_id = store.submit(export)
+    store._threads[job_id].join(60)
+
+    status = store.status(job_id)
+    assert (status["state"], status["rescored"], status["failed"]) == ("done", 4, 1)
+    # The slot was freed when the job ended
+    assert store.start(job_id)
+    store._threads[job_id].join(60)
@@ -0,0 +1,96 @@
+"""Domain reputation lookups, the shipped table and namespaces from the Public Suffix List"""
+import json
+import os
+import time
+
+import pytest
+
+from reputation import (DomainReputation, ReputationTable, host_of, psl_namespaces, write_table,
+                        REPUTATION_PATH)
+
+PSL = """\
+// ===BEGIN ICANN DOMAINS===
+// br : https://registro.br/
+br
+gov.br
+edu.br
+com.br
+*.ck
+!www.ck
+gob.mx
+go.jp
+ac.uk
+gov.scot
+// ===END ICANN DOMAINS===
+// ===BEGIN PRIVATE DOMAINS===
+gov.example.io
+edu.eu.org
+// ===END PRIVATE DOMAINS===
+"""
+
+
+def test_longest_listed_suffix_wins():
+    table = ReputationTable({"gov.in": 0.8, "mohfw.gov.in": {"score": 1.0, "search": 1}, "in": 0.1})
+
+    assert table.lookup("www.mohfw.gov.in") == 1.0
+    assert table.lookup("tripura.gov.in") == 0.8
+    assert table.lookup("news.in") == 0.1
+    assert table.lookup("example.com") is None
+    assert table.search_sites == ["mohfw.gov.in"]
+
+
+@pytest.mark.parametrize("value,host", [("https://WWW.Who.int/news?x=1", "www.who.int"),
+                                        ("who.int.", "who.int"), ("who.int:443/path", "who.int"),
+                                        ("http://[bad", "")])
+def test_host_of(value, host):
+    assert host_of(value) == host
+
+
+def test_namespaces_come_from_the_icann_section_only():
+    assert psl_namespaces(PSL.splitlines()) == {"gov.br": 0.8, "edu.br": 0.7, "gob.mx": 0.8, "ac.uk": 0.7}
+
+
+@pytest.mark.parametrize("url,score", [
+    ("https://www.mohfw.gov.in/", 1.0),
+    ("https://www.saude.gov.br/noticias", 0.8),
+    ("https://www.gob.mx/salud", 0.8),
+    ("https://www.ox.ac.uk/", 0.7),
+    ("https://www.unam.edu.mx/", 0.7),
+    ("https://www.facebook.com/post", 0.05),
+    ("https://example.com/", 0.0),
+])
+def test_shipped_table(url, score):
+    reputation = DomainReputation(REPUTATION_PATH, reload_s=3600)
+
+    assert reputation.score(url) == score
+    assert reputation.stats()["size"] > 400
+
+
+def test_write_table_round_trips(tmp_path):
+    path = str(tmp_path / "reputation.json")
+    data = {"default_score": 0.1, "sources": ["test"],
+            "domains": {"who.int": {"score": 1.0, "search": 1}, "gov.br": 0.8}}
+
+    write_table(path, data)
+
+    with open(path) as f:
+        assert json.load(f) == data
+
+
+def test_changed_file_is_reloaded(tmp_path):
+    path = str(tmp_path / "reputation.json")
+    write_table(path, {"domains": {"who.int": 1.0}})
+    reputation = DomainReputation(path, reload_s=0)
+    assert reputation.score("who.int") == 1.0
+
+    write_table(path, {"domains": {"who.int": 0.5}})
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 10 ** 9))
+    # The first lookup after the change starts the reload in the background
+    reputation.score("who.int")
+    deadline = time.monotonic() + 5
+    while reputation._loading and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert reputation.score("who.int") == 0.5
+    assert reputation.stats()["reloads"] == 2
+
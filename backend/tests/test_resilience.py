@@ -0,0 +1,167 @@
+"""Circuit breakers and hedged calls"""
+import threading
+import time
+
+import pytest
+
+from resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, hedged
+
+
+def fail():
+    raise RuntimeError("upstream down")
+
+
+def fail_all(breaker, count):
+    for _ in range(count):
+        with pytest.raises(RuntimeError):
+            breaker.call(fail)
+
+
+# -----------------------------
+# Circuit breaker
+# -----------------------------
+def test_opens_after_consecutive_failures_and_fails_fast():
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout_s=60)
+
+    fail_all(breaker, 2)
+    assert breaker.state == CLOSED
+    fail_all(breaker, 1)
+    assert breaker.state == OPEN
+
+    calls = []
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: calls.append(1))
+    assert calls == []
+    assert breaker.stats()["rejected"] == 1
+
+
+def test_opens_when_half_the_window_failed():
+    breaker = CircuitBreaker("test", failure_threshold=100, window=4, reset_timeout_s=60)
+
+    for _ in range(2):
+        breaker.call(lambda: None)
+        fail_all(breaker, 1)
+
+    assert breaker.state == OPEN
+
+
+def test_success_resets_the_consecutive_count():
+    breaker = CircuitBreaker("test", failure_threshold=3, window=100)
+
+    fail_all(breaker, 2)
+    breaker.call(lambda: None)
+    fail_all(breaker, 2)
+
+    assert breaker.state == CLOSED
+
+
+def test_half_open_lets_one_trial_through_after_the_timeout():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout_s=0.05)
+    fail_all(breaker, 1)
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+
+    breaker.record_success(0.01)
+    assert breaker.state == CLOSED
+
+
+def test_failed_trial_reopens():
+    breaker = CircuitBreaker("test", failure_threshold=5, reset_timeout_s=0.05)
+    fail_all(breaker, 5)
+    time.sleep(0.06)
+
+    fail_all(breaker, 1)
+
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+
+def test_background_probe_closes_the_breaker():
+    upstream_up = threading.Event()
+
+    def probe():
+        if not upstream_up.is_set():
+            raise RuntimeError("still down")
+
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout_s=0.02, probe=probe)
+    fail_all(breaker, 1)
+    time.sleep(0.1)
+    assert breaker.state == OPEN
+    # A probed breaker never goes half-open on its own
+    assert not breaker.allow()
+
+    upstream_up.set()
+    deadline = time.monotonic() + 5
+    while breaker.state != CLOSED and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert breaker.state == CLOSED
+    stats = breaker.stats()
+    assert stats["probes"] >= 2 and stats["probe_failures"] >= 1
+
+
+def test_latency_p95_needs_enough_samples():
+    breaker = CircuitBreaker("test")
+    for i in range(19):
+        breaker.record_success(i / 100)
+    assert breaker.latency_p95() is None
+
+    for i in range(19, 100):
+        breaker.record_success(i / 100)
+    assert breaker.latency_p95() == pytest.approx(0.95)
+
+
+# -----------------------------
+# Hedged calls
+# -----------------------------
+def slow(value, seconds, calls=None):
+    def fn():
+        if calls is not None:
+            calls.append(value)
+        time.sleep(seconds)
+        return value
+    return fn
+
+
+def test_fast_primary_never_starts_the_secondary():
+    calls = []
+
+    assert hedged(slow("primary", 0, calls), slow("secondary", 0, calls), 0.5) == "primary"
+    assert calls == ["primary"]
+
+
+def test_slow_primary_is_hedged():
+    assert hedged(slow("primary", 1.0), slow("secondary", 0), 0.05) == "secondary"
+
+
+def test_hedge_waits_for_the_slower_path_when_the_faster_one_fails():
+    def fail_after_hedge():
+        time.sleep(0.1)
+        raise RuntimeError("secondary down")
+
+    assert hedged(slow("primary", 0.2), fail_after_hedge, 0.05) == "primary"
+
+
+def test_secondary_is_a_fallback_without_a_hedge_delay():
+    calls = []
+
+    assert hedged(slow("primary", 0, calls), slow("secondary", 0, calls), None) == "primary"
+    assert hedged(fail, slow("secondary", 0, calls), None) == "secondary"
+    assert calls == ["primary", "secondary"]
+
+
+@pytest.mark.parametrize("hedge_after_s", [None, 0.5, 0.01])
+def test_primary_error_is_raised_when_both_fail(hedge_after_s):
+    def primary():
+        time.sleep(0.05)
+        raise ValueError("primary down")
+
+    def secondary():
+        raise KeyError("secondary down")
+
+    with pytest.raises(ValueError, match="primary down"):
+        hedged(primary, secondary, hedge_after_s)
@@ -0,0 +1,107 @@
+"""Quota token buckets and priority-ordered waiting"""
+import threading
+import time
+
+import pytest
+
+from scheduler import (BACKFILL, BULK, INTERACTIVE, QuotaExceeded, Scheduler, TokenBucket,
+                       current_priority, priority)
+
+
+def drain(scheduler, api, count, level=INTERACTIVE):
+    for _ in range(count):
+        scheduler.acquire(api, priority=level, max_wait_s=0)
+
+
+def test_bucket_never_exceeds_the_quota_in_a_minute():
+    bucket = TokenBucket(600, burst_fraction=0.2)
+
+    assert bucket.capacity == 120
+    # The burst plus a minute of refill is exactly the quota
+    assert bucket.capacity + bucket.refill_per_s * 60 == pytest.approx(600)
+
+
+def test_quota_is_divided_between_workers():
+    scheduler = Scheduler({"fact_check": 600}, workers=4, burst_fraction=0.2)
+
+    stats = scheduler.stats()["fact_check"]
+    assert (stats["per_minute"], stats["capacity"]) == (150, 30)
+
+
+def test_exhausted_bucket_raises_quota_exceeded():
+    scheduler = Scheduler({"fact_check": 600}, workers=1, burst_fraction=0.2)
+    drain(scheduler, "fact_check", 120)
+
+    with pytest.raises(QuotaExceeded):
+        scheduler.acquire("fact_check", priority=INTERACTIVE, max_wait_s=0)
+    stats = scheduler.stats()["fact_check"]
+    assert (stats["granted"], stats["denied"]) == (120, 1)
+
+
+def test_lower_priorities_leave_the_reserve_to_the_classes_above():
+    scheduler = Scheduler({"translate": 600}, workers=1, burst_fraction=0.2)
+
+    # Backfill keeps half of the 120 token burst, bulk a fifth of it
+    drain(scheduler, "translate", 60, BACKFILL)
+    with pytest.raises(QuotaExceeded):
+        scheduler.acquire("translate", priority=BACKFILL, max_wait_s=0)
+    assert scheduler.budget("translate", BACKFILL) < 0.01
+
+    drain(scheduler, "translate", 36, BULK)
+    with pytest.raises(QuotaExceeded):
+        scheduler.acquire("translate", priority=BULK, max_wait_s=0)
+
+    drain(scheduler, "translate", 24, INTERACTIVE)
+    assert scheduler.budget("translate", INTERACTIVE) < 0.01
+
+
+def test_waiters_are_served_in_priority_order():
+    # One token of burst, refilled about every 0.1s
+    scheduler = Scheduler({"custom_search": 600}, workers=1, burst_fraction=0.001)
+    drain(scheduler, "custom_search", 1)
+    order = []
+
+    def wait_for_token(level):
+        scheduler.acquire("custom_search", priority=level, max_wait_s=2)
+        order.append(level)
+
+    bulk = threading.Thread(target=wait_for_token, args=(BULK,))
+    bulk.start()
+    time.sleep(0.02)
+    interactive = threading.Thread(target=wait_for_token, args=(INTERACTIVE,))
+    interactive.start()
+    bulk.join(5)
+    interactive.join(5)
+
+    assert order == [INTERACTIVE, BULK]
+
+
+def test_apis_without_a_quota_are_not_limited():
+    scheduler = Scheduler({"fact_check": 0}, workers=1)
+
+    drain(scheduler, "fact_check", 1000)
+    drain(scheduler, "vertex", 1000)
+    assert scheduler.budget("fact_check") == 1.0
+    assert scheduler.stats() == {}
+
+
+def test_priority_context():
+    assert current_priority() == INTERACTIVE
+    with priority(BULK):
+        assert current_priority() == BULK
+        with priority(BACKFILL):
+            assert current_priority() == BACKFILL
+        assert current_priority() == BULK
+    assert current_priority() == INTERACTIVE
+
+
+def test_set_workers_keeps_the_fill_level():
+    scheduler = Scheduler({"fact_check": 600}, workers=1, burst_fraction=0.2)
+    drain(scheduler, "fact_check", 90)
+
+    scheduler.set_workers(2)
+
+    stats = scheduler.stats()["fact_check"]
+    assert (stats["per_minute"], stats["capacity"]) == (300, 60)
+    # A quarter of the burst was left, a quarter of the new burst remains
+    assert stats["remaining"] == 15
@@ -0,0 +1,31 @@
+"""Custom Search of authoritative sites (search_site_evidence)"""
+import pytest
+
+from scheduler import Scheduler
+
+
+@pytest.fixture(autouse=True)
+def search_quota(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, "outbound", Scheduler({"custom_search": 600}, workers=1))
+
+
+def test_site_search_issues_a_real_query(app_module):
+    evidence = app_module.search_site_evidence("garlic cures covid", "site:who.int")
+
+    assert evidence == [{
+        "url": "https://who.int/health-advisory",
+        "title": "Health advisory: garlic cures covid",
+        "source": "who.int",
+        "stance": "neutral",
+        "freshness_days": 0,
+        "snippet": "Official statement regarding garlic cures covid...",
+        "api_source": "google_custom_search",
+    }]
+    assert app_module.outbound.stats()["custom_search"]["granted"] == 1
+
+
+def test_no_quota_is_spent_without_a_search_engine(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, "CUSTOM_SEARCH_ENGINE_ID", "")
+
+    assert app_module.search_site_evidence("garlic cures covid", "site:who.int") == []
+    assert app_module.outbound.stats()["custom_search"]["granted"] == 0
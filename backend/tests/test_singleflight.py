@@ -0,0 +1,152 @@
+"""SingleFlight coalescing, within a process and across processes via lock files"""
+import fcntl
+import os
+import threading
+import time
+import zlib
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def followers(flight, key, fn, count):
+    """Call flight.do from `count` started threads; returns them and their results and errors"""
+    results, errors = [], []
+
+    def call():
+        try:
+            results.append(flight.do(key, fn))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+
+def blocking(value=None, error=None):
+    """fn for flight.do that records its calls and finishes once `release` is set"""
+    started, release, calls = threading.Event(), threading.Event(), []
+
+    def fn():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        if error is not None:
+            raise error
+        return value
+
+    return fn, started, release, calls
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight("test")
+    fn, started, release, calls = blocking(value="result")
+
+    threads, results, errors = followers(flight, "key", fn, 1)
+    started.wait(5)
+    threads_2, results_2, errors_2 = followers(flight, "key", fn, 4)
+    time.sleep(0.1)
+    release.set()
+    for thread in threads + threads_2:
+        thread.join(5)
+
+    assert calls == [1]
+    assert results + results_2 == ["result"] * 5
+    assert errors + errors_2 == []
+    stats = flight.stats()
+    assert (stats["calls"], stats["shared"], stats["in_flight"]) == (1, 4, 0)
+
+
+def test_leaders_error_is_raised_in_every_caller():
+    flight = SingleFlight("test")
+    fn, started, release, calls = blocking(error=RuntimeError("upstream down"))
+
+    threads, _, errors = followers(flight, "key", fn, 1)
+    started.wait(5)
+    threads_2, _, errors_2 = followers(flight, "key", fn, 3)
+    time.sleep(0.1)
+    release.set()
+    for thread in threads + threads_2:
+        thread.join(5)
+
+    assert calls == [1]
+    assert [str(e) for e in errors + errors_2] == ["upstream down"] * 4
+    assert flight.stats()["shared_errors"] == 3
+
+
+def test_results_are_not_cached():
+    flight = SingleFlight("test")
+    calls = []
+
+    assert flight.do("key", lambda: calls.append(1) or len(calls)) == 1
+    assert flight.do("key", lambda: calls.append(1) or len(calls)) == 2
+    assert flight.stats()["calls"] == 2
+
+
+def test_different_keys_do_not_wait_for_each_other():
+    flight = SingleFlight("test")
+    release = threading.Event()
+    slow = threading.Thread(target=lambda: flight.do("slow", lambda: release.wait(5)))
+    slow.start()
+
+    assert flight.do("fast", lambda: "fast") == "fast"
+    release.set()
+    slow.join(5)
+
+
+@pytest.fixture
+def other_process_lock(tmp_path):
+    """Hold the lock file for a key the way another worker's leader would"""
+    fds = []
+
+    def hold(flight, key):
+        stripe = zlib.crc32(repr(key).encode("utf-8")) % flight.lock_stripes
+        fd = os.open(os.path.join(flight.lock_dir, f"{flight.name}-{stripe}.lock"), os.O_RDWR | os.O_CREAT)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        fds.append(fd)
+        return fd
+
+    yield hold
+    for fd in fds:
+        os.close(fd)
+
+
+def test_leader_that_waited_for_another_process_rechecks_first(tmp_path, other_process_lock):
+    flight = SingleFlight("test", lock_dir=str(tmp_path))
+    fd = other_process_lock(flight, "key")
+    calls = []
+    threading.Timer(0.1, lambda: fcntl.flock(fd, fcntl.LOCK_UN)).start()
+
+    result = flight.do("key", lambda: calls.append(1) or "called", recheck=lambda: "stored")
+
+    assert result == "stored"
+    assert calls == []
+    stats = flight.stats()
+    assert (stats["cross_process_waits"], stats["cross_process_hits"]) == (1, 1)
+
+
+def test_leader_calls_when_the_recheck_finds_nothing(tmp_path, other_process_lock):
+    flight = SingleFlight("test", lock_dir=str(tmp_path))
+    fd = other_process_lock(flight, "key")
+    threading.Timer(0.1, lambda: fcntl.flock(fd, fcntl.LOCK_UN)).start()
+
+    assert flight.do("key", lambda: "called", recheck=lambda: None) == "called"
+    assert flight.stats()["cross_process_hits"] == 0
+
+
+def test_uncontended_leader_skips_the_recheck(tmp_path):
+    flight = SingleFlight("test", lock_dir=str(tmp_path))
+
+    assert flight.do("key", lambda: "called", recheck=lambda: "stored") == "called"
+    assert flight.stats()["cross_process_waits"] == 0
+
+
+def test_lock_held_too_long_is_ignored(tmp_path, other_process_lock):
+    flight = SingleFlight("test", lock_dir=str(tmp_path), lock_timeout_s=0.05)
+    other_process_lock(flight, "key")
+
+    assert flight.do("key", lambda: "called", recheck=lambda: None) == "called"
+    assert flight.stats()["lock_timeouts"] == 1
@@ -0,0 +1,23 @@
+"""Cold start of the app stays within its time budget (benchmarks/bench_startup.py)"""
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET_MS = float(os.environ.get("STARTUP_BUDGET_MS", "1500"))
+
+
+def test_cold_start_within_budget(tmp_path):
+    cred_path = tmp_path / "service-account.json"
+    cred_path.write_text(json.dumps({"project_id": "test-project",
+                                     "client_email": "test@test-project.iam.gserviceaccount.com"}))
+    env = dict(os.environ, FIREBASE_CRED_PATH=str(cred_path))
+
+    result = subprocess.run([sys.executable, "-m", "benchmarks.bench_startup", "--budget-ms", str(BUDGET_MS)],
+                            cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=120)
+
+    assert result.returncode == 0, result.stdout + result.stderr
+    report = json.loads(result.stdout[:result.stdout.rindex("}") + 1])
+    assert report["eager_modules"] == []
+    assert report["startup_ms"] <= BUDGET_MS
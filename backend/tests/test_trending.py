@@ -0,0 +1,42 @@
+"""Accuracy of the sliding-window trending detector (trending.py) on synthetic streams"""
+import math
+
+import pytest
+
+from benchmarks.bench_trending import run
+from trending import SlidingTopK
+
+EPSILON = 0.01
+DELTA = 0.05
+
+
+@pytest.mark.parametrize("skew", [1.1, 0.8])
+def test_zipf_stream_within_count_min_guarantee(skew):
+    row = run(events=20_000, vocab=5_000, skew=skew, k=10, epsilon=EPSILON, delta=DELTA,
+              candidates=200, spike=300)
+
+    assert row["undercounts"] == 0
+    assert row["over_bound_rate"] <= DELTA
+    assert row["topk_recall"] >= 0.8
+    assert row["spike_growth_rank"] == 1
+
+
+def test_depth_covers_every_slot():
+    detector = SlidingTopK(slots=12, epsilon=EPSILON, delta=DELTA)
+    sketch = detector._sketches[0]
+
+    assert sketch.width == math.ceil(math.e / EPSILON)
+    # Each of the 12 sketches fails with probability at most delta / 12
+    assert math.exp(-sketch.depth) <= DELTA / 12
+
+
+def test_counts_leave_the_window():
+    detector = SlidingTopK(window_s=60, slots=6, epsilon=EPSILON, delta=DELTA)
+    detector.add({"claim a": "Claim A"}, now=600.0)
+    detector.add({"claim a": "Claim A", "claim b": "Claim B"}, now=630.0)
+
+    assert [(item["text"], item["count"]) for item in detector.top(now=635.0)["items"]] == [
+        ("Claim A", 2), ("Claim B", 1)]
+    assert [(item["text"], item["count"]) for item in detector.top(now=665.0)["items"]] == [
+        ("Claim A", 1), ("Claim B", 1)]
+    assert detector.top(now=700.0)["items"] == []
@@ -0,0 +1,235 @@
+"""WriteBehindQueue against an in-memory Firestore client"""
+import json
+import threading
+import time
+
+import pytest
+
+from write_behind import WriteBehindQueue
+
+SERVER_TIMESTAMP = object()
+
+
+class FakeBatch:
+    def __init__(self, db):
+        self.db = db
+        self.records = []
+
+    def set(self, ref, record):
+        self.records.append(record)
+
+    def commit(self):
+        with self.db.lock:
+            self.db.attempts += 1
+            fail = self.db.fail > 0
+            self.db.fail -= fail
+        if self.db.gate is not None:
+            self.db.gate.wait(5)
+        if fail:
+            raise RuntimeError("commit failed")
+        with self.db.lock:
+            self.db.commits.append(self.records)
+
+
+class FakeCollection:
+    def document(self):
+        return object()
+
+
+class FakeDb:
+    """Records each committed batch; the first `fail` commits raise, commits wait on `gate` if set"""
+
+    def __init__(self, fail: int = 0, gate: threading.Event = None):
+        self.fail = fail
+        self.gate = gate
+        self.attempts = 0
+        self.commits = []
+        self.lock = threading.Lock()
+
+    def batch(self):
+        return FakeBatch(self)
+
+    def collection(self, name):
+        return FakeCollection()
+
+    @property
+    def written(self):
+        return [record for batch in self.commits for record in batch]
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+@pytest.fixture
+def queues():
+    """Queues created by a test, closed at its end so no writer thread outlives it"""
+    created = []
+
+    def make(db, **kwargs):
+        kwargs.setdefault("retry_backoff_s", 0.0)
+        queue = WriteBehindQueue(db, "checks", **kwargs)
+        created.append((queue, db))
+        return queue
+
+    yield make
+    for queue, db in created:
+        if db.gate is not None:
+            db.gate.set()
+        queue.close(timeout=5)
+
+
+def blocked_writer(queues, **kwargs):
+    """A queue whose first commit of two records is in flight until db.gate is set"""
+    db = FakeDb(gate=threading.Event())
+    queue = queues(db, max_batch=2, max_queue=2, flush_interval_s=0.05, **kwargs)
+    queue.enqueue_many([{"n": 0}, {"n": 1}])
+    assert wait_until(lambda: queue.metrics()["in_flight"] == 2)
+    return queue, db
+
+
+def test_commits_a_full_batch_without_waiting_for_the_interval(queues):
+    db = FakeDb()
+    queue = queues(db, max_batch=3, flush_interval_s=60)
+
+    queue.enqueue_many([{"n": n} for n in range(7)])
+
+    assert wait_until(lambda: len(db.commits) == 2)
+    assert [len(batch) for batch in db.commits] == [3, 3]
+    assert queue.metrics()["depth"] == 1
+
+
+def test_commits_a_partial_batch_once_it_is_old_enough(queues):
+    db = FakeDb()
+    queue = queues(db, max_batch=100, flush_interval_s=0.1)
+
+    queue.enqueue({"n": 0})
+    queue.enqueue({"n": 1})
+
+    assert wait_until(lambda: db.commits)
+    assert db.commits == [[{"n": 0}, {"n": 1}]]
+    assert queue.metrics()["batches"] == 1
+
+
+def test_failed_commit_is_retried(queues):
+    db = FakeDb(fail=2)
+    queue = queues(db, max_batch=2, flush_interval_s=60, max_retries=3)
+
+    queue.enqueue_many([{"n": 0}, {"n": 1}])
+
+    assert queue.flush(timeout=5)
+    assert db.written == [{"n": 0}, {"n": 1}]
+    assert db.attempts == 3
+    stats = queue.metrics()
+    assert stats["retries"] == 2
+    assert stats["failed_batches"] == 0
+
+
+def test_batch_is_dropped_after_the_last_retry(queues):
+    db = FakeDb(fail=10)
+    queue = queues(db, max_batch=1, flush_interval_s=60, max_retries=1)
+
+    queue.enqueue({"n": 0})
+
+    assert queue.flush(timeout=5)
+    assert db.written == []
+    stats = queue.metrics()
+    assert (stats["failed_batches"], stats["dropped"], stats["retries"]) == (1, 1, 1)
+
+
+def test_drop_policy_discards_records_beyond_capacity(queues):
+    queue, db = blocked_writer(queues, overflow="drop")
+
+    queue.enqueue_many([{"n": 2}, {"n": 3}])
+    assert queue.enqueue({"n": 4}) is False
+
+    db.gate.set()
+    assert queue.flush(timeout=5)
+    assert [record["n"] for record in db.written] == [0, 1, 2, 3]
+    assert queue.metrics()["dropped"] == 1
+
+
+def test_spill_policy_writes_overflow_to_disk_and_replays_it(queues, tmp_path):
+    spill_path = tmp_path / "spill.jsonl"
+    queue, db = blocked_writer(queues, overflow="spill", spill_path=str(spill_path),
+                               server_timestamp=SERVER_TIMESTAMP)
+
+    queue.enqueue_many([{"n": 2}, {"n": 3}])
+    assert queue.enqueue({"n": 4, "timestamp": SERVER_TIMESTAMP}) is False
+    assert json.loads(spill_path.read_text()) == {"n": 4, "timestamp": "__firestore_server_timestamp__"}
+
+    db.gate.set()
+    assert wait_until(lambda: len(db.written) == 5)
+    assert db.written[-1] == {"n": 4, "timestamp": SERVER_TIMESTAMP}
+    assert not spill_path.exists()
+    stats = queue.metrics()
+    assert (stats["spilled"], stats["replayed"], stats["dropped"]) == (1, 1, 0)
+
+
+def test_spill_file_left_by_an_earlier_process_is_replayed(queues, tmp_path):
+    spill_path = tmp_path / "spill.jsonl"
+    spill_path.write_text("".join(json.dumps({"n": n}) + "\n" for n in range(3)))
+    db = FakeDb()
+    queue = queues(db, max_batch=2, max_queue=2, flush_interval_s=0.05, overflow="spill",
+                   spill_path=str(spill_path))
+
+    queue.enqueue({"n": 3})
+
+    assert wait_until(lambda: len(db.written) == 4)
+    assert sorted(record["n"] for record in db.written) == [0, 1, 2, 3]
+    assert not spill_path.exists()
+    assert queue.metrics()["replayed"] == 3
+
+
+def test_block_policy_waits_for_room(queues):
+    queue, db = blocked_writer(queues, overflow="block", block_timeout_s=5)
+    queue.enqueue_many([{"n": 2}, {"n": 3}])
+    results = []
+    producer = threading.Thread(target=lambda: results.append(queue.enqueue({"n": 4})))
+
+    producer.start()
+    time.sleep(0.1)
+    assert producer.is_alive()
+
+    db.gate.set()
+    producer.join(5)
+    assert results == [True]
+    assert queue.flush(timeout=5)
+    assert [record["n"] for record in db.written] == [0, 1, 2, 3, 4]
+    assert queue.metrics()["blocked"] == 1
+
+
+def test_block_policy_drops_after_its_timeout(queues):
+    queue, db = blocked_writer(queues, overflow="block", block_timeout_s=0.05)
+    queue.enqueue_many([{"n": 2}, {"n": 3}])
+
+    assert queue.enqueue({"n": 4}) is False
+    assert queue.metrics()["dropped"] == 1
+
+
+def test_close_flushes_pending_records(queues):
+    db = FakeDb()
+    queue = queues(db, max_batch=100, flush_interval_s=60)
+
+    queue.enqueue_many([{"n": n} for n in range(3)])
+    queue.close(timeout=5)
+
+    assert db.written == [{"n": 0}, {"n": 1}, {"n": 2}]
+    assert queue.metrics()["depth"] == 0
+
+
+def test_close_spills_what_it_could_not_commit(queues, tmp_path):
+    spill_path = tmp_path / "spill.jsonl"
+    db = FakeDb(fail=10)
+    queue = queues(db, max_batch=100, flush_interval_s=60, max_retries=0, spill_path=str(spill_path))
+
+    queue.enqueue_many([{"n": 0}, {"n": 1}])
+    queue.close(timeout=5)
+
+    assert db.written == []
+    assert [json.loads(line) for line in spill_path.read_text().splitlines()] == [{"n": 0}, {"n": 1}]
@@ -0,0 +1,237 @@
+"""
+Translation cache and pretranslated lesson catalog.
+
+Lessons are fixed templates, so each one is translated once per language and
+kept on disk in the lesson catalog. Explanations are built from a small set of
+recurring lines (verdicts, rationales, source lines), so they are split into
+line fragments that are cached per (fragment, lang) in an LRU. Fragments that
+miss the cache are sent to the Translate API together in one batched call.
+
+Build the catalog offline with:
+
+    FIREBASE_CRED_PATH=... python translations.py build-catalog --langs hi,bn,ta
+"""
+import argparse
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+LESSON_CATALOG_PATH = os.environ.get("LESSON_CATALOG_PATH", os.path.join(DATA_DIR, "lesson_catalog.json"))
+SUPPORTED_LANGS = [lang for lang in os.environ.get("SUPPORTED_LANGS", "hi").split(",") if lang]
+TRANSLATION_CACHE_SIZE = int(os.environ.get("TRANSLATION_CACHE_SIZE", "5000"))
+
+# Leading emoji, bullets and spaces stay untranslated; the rest of the line is the fragment.
+# A letter followed by VS16 (e.g. "\u2139\ufe0f") is an emoji too.
+_LINE_PREFIX = re.compile(r"^((?:[^\w*]|\w\ufe0f)*)(.*?)(\s*)$", re.DOTALL)
+
+# translate_batch(texts, target_lang) -> translated texts, same order
+BatchTranslateFn = Callable[[List[str], str], List[str]]
+
+
+def split_fragments(markdown: str) -> Tuple[List[Tuple[str, str, str]], List[str]]:
+    """
+    Split markdown into lines of (prefix, fragment, suffix) and the list of
+    fragments that need translating (lines without letters are kept as is).
+    """
+    lines = []
+    fragments = []
+    for line in markdown.split("\n"):
+        prefix, fragment, suffix = _LINE_PREFIX.match(line).groups()
+        if any(ch.isalpha() for ch in fragment):
+            fragments.append(fragment)
+        else:
+            prefix, fragment, suffix = line, "", ""
+        lines.append((prefix, fragment, suffix))
+    return lines, fragments
+
+
+def join_fragments(lines: List[Tuple[str, str, str]], translated: Dict[str, str]) -> str:
+    return "\n".join(prefix + translated.get(fragment, fragment) + suffix
+                     for prefix, fragment, suffix in lines)
+
+
+class TranslationCache:
+    """Thread-safe LRU of translated fragments keyed by (fragment, lang)"""
+
+    def __init__(self, max_entries: int = TRANSLATION_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, fragment: str, lang: str) -> Optional[str]:
+        with self._lock:
+            value = self._entries.get((fragment, lang))
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((fragment, lang))
+            self.hits += 1
+            return value
+
+    def set(self, fragment: str, lang: str, value: str) -> None:
+        with self._lock:
+            self._entries[(fragment, lang)] = value
+            self._entries.move_to_end((fragment, lang))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries),
+                    "max_entries": self.max_entries}
+
+
+class LessonCatalog:
+    """Lesson templates pretranslated per language, persisted as JSON"""
+
+    def __init__(self, templates: Dict[str, str], path: str = LESSON_CATALOG_PATH):
+        self.templates = templates
+        self.path = path
+        self._lock = threading.Lock()
+        self._catalog: Dict[str, Dict[str, str]] = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self._catalog = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Could not load lesson catalog {path}: {e}")
+
+    def get(self, key: str, lang: str) -> Optional[str]:
+        if lang == "en":
+            return self.templates[key]
+        return self._catalog.get(lang, {}).get(key)
+
+    def add(self, lang: str, entries: Dict[str, str]) -> None:
+        with self._lock:
+            self._catalog.setdefault(lang, {}).update(entries)
+            self._save()
+
+    def langs(self) -> List[str]:
+        return sorted(self._catalog)
+
+    def missing_langs(self, langs: List[str]) -> List[str]:
+        return [lang for lang in langs
+                if lang != "en" and set(self.templates) - set(self._catalog.get(lang, {}))]
+
+    def build(self, langs: List[str], translate_batch: BatchTranslateFn) -> None:
+        """Translate every template into each language (one API call per language)"""
+        keys = list(self.templates)
+        for lang in self.missing_langs(langs):
+            translated = translate_batch([self.templates[key] for key in keys], lang)
+            # A failed call falls back to the English input; don't store that
+            entries = {key: value for key, value in zip(keys, translated) if value != self.templates[key]}
+            if entries:
+                self.add(lang, entries)
+
+    def _save(self) -> None:
+        # Caller holds self._lock
+        if not self.path:
+            return
+        try:
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._catalog, f, ensure_ascii=False, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Could not save lesson catalog {self.path}: {e}")
+
+
+class Translator:
+    """Translates explanations and lessons with one batched API call per request"""
+
+    def __init__(self, translate_batch: BatchTranslateFn, catalog: LessonCatalog,
+                 cache: Optional[TranslationCache] = None):
+        self.translate_batch = translate_batch
+        self.catalog = catalog
+        self.cache = cache or TranslationCache()
+
+    def translate_results(self, explanations: List[str], lesson_keys: List[str],
+                          lang: str) -> Tuple[List[str], List[str]]:
+        """
+        Translate explanations (by cached fragments) and lessons (from the
+        catalog) into `lang`. Everything that misses both goes out in one call.
+        """
+        if lang == "en":
+            return list(explanations), [self.catalog.get(key, lang) for key in lesson_keys]
+
+        split = [split_fragments(explanation) for explanation in explanations]
+        translated: Dict[str, str] = {}
+        pending: List[str] = []
+        for _, fragments in split:
+            for fragment in fragments:
+                if fragment in translated or fragment in pending:
+                    continue
+                cached = self.cache.get(fragment, lang)
+                if cached is None:
+                    pending.append(fragment)
+                else:
+                    translated[fragment] = cached
+
+        missing_lessons = sorted({key for key in lesson_keys if self.catalog.get(key, lang) is None})
+        requests = pending + [self.catalog.templates[key] for key in missing_lessons]
+        if requests:
+            results = self.translate_batch(requests, lang)
+            for fragment, value in zip(pending, results):
+                translated[fragment] = value
+                # Only cache real translations; the fallback returns the input
+                if value != fragment:
+                    self.cache.set(fragment, lang, value)
+            new_lessons = {key: value for key, value in zip(missing_lessons, results[len(pending):])
+                           if value != self.catalog.templates[key]}
+            if new_lessons:
+                self.catalog.add(lang, new_lessons)
+            lesson_fallback = dict(zip(missing_lessons, results[len(pending):]))
+        else:
+            lesson_fallback = {}
+
+        out_explanations = [join_fragments(lines, translated) for lines, _ in split]
+        out_lessons = [self.catalog.get(key, lang) or lesson_fallback.get(key) or self.catalog.templates[key]
+                       for key in lesson_keys]
+        return out_explanations, out_lessons
+
+    def after_fork(self) -> None:
+        """Fresh locks in a forked worker (the catalog build thread may have held one)"""
+        self.cache._lock = threading.Lock()
+        self.catalog._lock = threading.Lock()
+
+    def stats(self) -> Dict:
+        return dict(self.cache.stats(), catalog_langs=self.catalog.langs())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lesson catalog tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build-catalog", help="Pretranslate lesson templates")
+    build.add_argument("--langs", default=",".join(SUPPORTED_LANGS),
+                       help="Comma-separated target languages")
+    build.add_argument("--path", default=LESSON_CATALOG_PATH)
+    args = parser.parse_args()
+
+    from google.cloud import translate_v2 as translate
+    from google.oauth2 import service_account
+    from lessons import LESSON_TEMPLATES
+
+    cred_path = os.environ.get("FIREBASE_CRED_PATH")
+    if not cred_path:
+        raise ValueError("Please set the FIREBASE_CRED_PATH environment variable.")
+    credentials = service_account.Credentials.from_service_account_file(
+        cred_path, scopes=['https://www.googleapis.com/auth/cloud-translation'])
+    client = translate.Client(credentials=credentials)
+
+    def translate_batch(texts: List[str], lang: str) -> List[str]:
+        return [result['translatedText'] for result in client.translate(texts, target_language=lang)]
+
+    catalog = LessonCatalog(LESSON_TEMPLATES, path=args.path)
+    langs = [lang for lang in args.langs.split(",") if lang]
+    catalog.build(langs, translate_batch)
+    print(f"Lesson catalog at {args.path} covers: {', '.join(catalog.langs())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""
+Trending claims and entities over a sliding time window, in fixed memory.
+
+Each tracked kind (claims, entities) has a ring of Count-Min Sketches, one
+per slot of the window (TRENDING_WINDOW_S split into TRENDING_SLOTS); when
+a slot expires it is zeroed and reused. An item's count over the window is
+the sum of its estimates in the live slots. Count-Min never undercounts,
+and a sketch of width ceil(e / epsilon) and depth ceil(ln(1 / delta'))
+overcounts by more than epsilon times its own item count with probability
+at most delta'. The window sums TRENDING_SLOTS sketches, any of which may
+fail, so each is sized for delta' = delta / TRENDING_SLOTS: the window
+estimate then overcounts by more than epsilon * N (N = items in the
+window) with probability at most delta.
+
+The sketch cannot list its items, so a bounded set of candidates (the
+TRENDING_CANDIDATES items with the highest estimates, kept in a min-heap)
+remembers which ones to report. Growth compares an item's rate in the most
+recent TRENDING_RECENT_SLOTS slots with its rate over the rest of the
+window, so a rumor that just started spreading ranks high on growth before
+it does on count.
+
+Memory depends only on the parameters, never on traffic. Counts are per
+worker process.
+"""
+import heapq
+import itertools
+import math
+import os
+import threading
+import time
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+TRENDING_WINDOW_S = float(os.environ.get("TRENDING_WINDOW_S", "3600"))
+TRENDING_SLOTS = int(os.environ.get("TRENDING_SLOTS", "12"))
+TRENDING_RECENT_SLOTS = int(os.environ.get("TRENDING_RECENT_SLOTS", "3"))
+TRENDING_EPSILON = float(os.environ.get("TRENDING_EPSILON", "0.001"))
+TRENDING_DELTA = float(os.environ.get("TRENDING_DELTA", "0.01"))
+TRENDING_CANDIDATES = int(os.environ.get("TRENDING_CANDIDATES", "200"))
+# Longest item text kept for display
+DISPLAY_CHARS = 200
+
+_MASK_32 = (1 << 32) - 1
+_MASK_64 = (1 << 64) - 1
+
+
+class CountMinSketch:
+    """Count-Min Sketch over `depth` rows of `width` counters"""
+
+    def __init__(self, width: int, depth: int):
+        self.width = width
+        self.depth = depth
+        self.counts = array("i", bytes(4 * width * depth))
+
+    def cells(self, key: str) -> List[int]:
+        # Row hashes h1 + row * h2 from one 64-bit hash (Kirsch-Mitzenmacher); hash((row, key))
+        # makes rows collide together. str hashes are salted per process, fine for in-memory sketches.
+        h = hash(key) & _MASK_64
+        h1, h2 = h & _MASK_32, (h >> 32) | 1
+        return [row * self.width + (h1 + row * h2) % self.width for row in range(self.depth)]
+
+    def add(self, cells: List[int], count: int = 1) -> None:
+        counts = self.counts
+        for cell in cells:
+            counts[cell] += count
+
+    def estimate(self, cells: List[int]) -> int:
+        counts = self.counts
+        return min(counts[cell] for cell in cells)
+
+    def clear(self) -> None:
+        self.counts = array("i", bytes(4 * self.width * self.depth))
+
+
+class SlidingTopK:
+    """Heavy hitters of one kind of item over a sliding window"""
+
+    def __init__(self, window_s: float = TRENDING_WINDOW_S, slots: int = TRENDING_SLOTS,
+                 recent_slots: int = TRENDING_RECENT_SLOTS, epsilon: float = TRENDING_EPSILON,
+                 delta: float = TRENDING_DELTA, candidates: int = TRENDING_CANDIDATES):
+        self.window_s = window_s
+        self.slot_s = window_s / slots
+        self.recent_slots = min(max(recent_slots, 1), slots - 1) if slots > 1 else 1
+        self.epsilon = epsilon
+        self.delta = delta
+        width = math.ceil(math.e / epsilon)
+        # Union bound over the slots: each sketch fails with probability delta / slots
+        depth = math.ceil(math.log(slots / delta))
+        self._sketches = [CountMinSketch(width, depth) for _ in range(slots)]
+        self._totals = [0] * slots
+        self._slot_ids = [None] * slots
+        self.max_candidates = candidates
+        # key -> (display text, current estimate); the heap holds (estimate, seq, key), stale entries included
+        self._candidates: Dict[str, Tuple[str, int]] = {}
+        self._heap: List[Tuple[int, int, str]] = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def _cells(self, key: str) -> List[int]:
+        return self._sketches[0].cells(key)
+
+    # -----------------------------
+    # Slots
+    # -----------------------------
+    def _live_slots(self, now: float) -> List[int]:
+        """Indexes of the window's slots, oldest first, clearing any that expired"""
+        current = int(now // self.slot_s)
+        n = len(self._sketches)
+        expired = False
+        for slot_id in range(current - n + 1, current + 1):
+            i = slot_id % n
+            if self._slot_ids[i] != slot_id:
+                self._sketches[i].clear()
+                self._totals[i] = 0
+                self._slot_ids[i] = slot_id
+                expired = True
+        if expired:
+            self._rebuild_candidates()
+        return [slot_id % n for slot_id in range(current - n + 1, current + 1)]
+
+    def _window_estimate(self, cells: List[int], slots: Iterable[int]) -> int:
+        return sum(self._sketches[i].estimate(cells) for i in slots)
+
+    # -----------------------------
+    # Candidates
+    # -----------------------------
+    def _rebuild_candidates(self) -> None:
+        """Counts only fall when slots expire; re-estimate and drop items that left the window"""
+        slots = range(len(self._sketches))
+        candidates = {}
+        for key, (text, _) in self._candidates.items():
+            estimate = self._window_estimate(self._cells(key), slots)
+            if estimate > 0:
+                candidates[key] = (text, estimate)
+        self._candidates = candidates
+        self._heap = [(estimate, next(self._seq), key) for key, (_, estimate) in candidates.items()]
+        heapq.heapify(self._heap)
+
+    def _pop_min(self) -> Tuple[int, str]:
+        """Smallest current candidate, skipping heap entries that were superseded"""
+        while True:
+            estimate, _, key = self._heap[0]
+            entry = self._candidates.get(key)
+            if entry is not None and entry[1] == estimate:
+                return estimate, key
+            heapq.heappop(self._heap)
+
+    def _offer(self, key: str, text: str, estimate: int) -> None:
+        if key in self._candidates or len(self._candidates) < self.max_candidates:
+            self._candidates[key] = (self._candidates.get(key, (text,))[0], estimate)
+        else:
+            smallest, smallest_key = self._pop_min()
+            if estimate <= smallest:
+                return
+            heapq.heappop(self._heap)
+            del self._candidates[smallest_key]
+            self._candidates[key] = (text, estimate)
+        heapq.heappush(self._heap, (estimate, next(self._seq), key))
+        if len(self._heap) > 4 * self.max_candidates:
+            self._heap = [(estimate, next(self._seq), key) for key, (_, estimate) in self._candidates.items()]
+            heapq.heapify(self._heap)
+
+    # -----------------------------
+    # Public API
+    # -----------------------------
+    def add(self, items: Dict[str, str], now: Optional[float] = None) -> None:
+        """Count each item (key -> display text) once"""
+        if now is None:
+            now = time.time()
+        with self._lock:
+            slots = self._live_slots(now)
+            current = slots[-1]
+            sketch = self._sketches[current]
+            for key, text in items.items():
+                cells = self._cells(key)
+                sketch.add(cells)
+                self._totals[current] += 1
+                self._offer(key, text[:DISPLAY_CHARS], self._window_estimate(cells, slots))
+
+    def top(self, k: int = 10, by: str = "count", now: Optional[float] = None) -> Dict:
+        """The k candidates with the highest estimated window count (or growth)"""
+        if now is None:
+            now = time.time()
+        with self._lock:
+            slots = self._live_slots(now)
+            recent, older = slots[-self.recent_slots:], slots[:-self.recent_slots]
+            total = sum(self._totals)
+            items = []
+            for key, (text, _) in self._candidates.items():
+                cells = self._cells(key)
+                recent_count = self._window_estimate(cells, recent)
+                older_count = self._window_estimate(cells, older)
+                # Per-slot rates; an item unseen before counts as one sighting in the older part
+                growth = (recent_count / len(recent)) / (max(older_count, 1) / max(len(older), 1))
+                items.append({"text": text, "count": recent_count + older_count,
+                              "recent_count": recent_count, "growth": round(growth, 2)})
+        sort_key = (lambda item: (item["growth"], item["count"])) if by == "growth" else (
+            lambda item: (item["count"], item["growth"]))
+        items.sort(key=sort_key, reverse=True)
+        return {
+            "window_s": self.window_s,
+            "recent_s": self.recent_slots * self.slot_s,
+            "total": total,
+            # Estimates exceed true counts by more than this with probability <= delta
+            "error_bound": math.ceil(self.epsilon * total),
+            "items": items[:k],
+        }
+
+    def memory_bytes(self) -> int:
+        return sum(sketch.counts.itemsize * len(sketch.counts) for sketch in self._sketches)
+
+    def after_fork(self) -> None:
+        self._lock = threading.Lock()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"total": sum(self._totals), "candidates": len(self._candidates),
+                    "sketch_bytes": self.memory_bytes()}
+
+
+class TrendingTracker:
+    """Trending claims and entities of recent checks"""
+
+    KINDS = ("claims", "entities")
+
+    def __init__(self, **options):
+        self.windows = {kind: SlidingTopK(**options) for kind in self.KINDS}
+
+    def observe(self, claims: List[Dict], entities: Iterable[str], normalize=None,
+                now: Optional[float] = None) -> None:
+        """Count one check's claims (keyed by `normalize(text)`) and entities, each once"""
+        normalize = normalize or (lambda text: " ".join(text.casefold().split()))
+        claim_items = {}
+        for claim in claims:
+            key = normalize(claim["text"])
+            if key:
+                claim_items.setdefault(key, claim["text"])
+        entity_items = {entity.casefold(): entity for entity in entities if entity.strip()}
+        self.windows["claims"].add(claim_items, now)
+        self.windows["entities"].add(entity_items, now)
+
+    def top(self, kind: str = "claims", k: int = 10, by: str = "count", now: Optional[float] = None) -> Dict:
+        return dict(self.windows[kind].top(k, by, now), kind=kind, sort=by)
+
+    def after_fork(self) -> None:
+        for window in self.windows.values():
+            window.after_fork()
+
+    def stats(self) -> Dict:
+        stats = {}
+        for kind, window in self.windows.items():
+            for key, value in window.stats().items():
+                stats[f"{kind}_{key}"] = value
+        return stats
@@ -0,0 +1,325 @@
+"""
+Write-behind persistence for Firestore records.
+
+Request handlers enqueue records and return immediately; a background thread
+groups them into WriteBatch commits by size or age. Memory is bounded: when
+the queue is full the overflow policy decides whether to drop the record,
+spill it to a local JSONL file (replayed once there is room again) or block
+the caller. Failed commits are retried with backoff and pending records are
+flushed at shutdown. Worker processes may share one spill file: appends and
+replays hold an flock on "<spill_path>.lock", so one process never rewrites
+the file under another's append.
+
+Anything with Firestore's `collection(name).document()` and `batch()`
+interface can be passed as `db` (or a function returning one, resolved on
+first commit), so the queue runs against an in-memory fake or the Firestore
+emulator (set FIRESTORE_EMULATOR_HOST) as well as production.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: the spill file is only guarded within the process
+    fcntl = None
+
+import metrics
+
+# Firestore allows at most 500 writes per batch commit
+FIRESTORE_BATCH_LIMIT = 500
+
+OVERFLOW_POLICIES = ("drop", "spill", "block")
+
+_SERVER_TIMESTAMP_MARKER = "__firestore_server_timestamp__"
+
+
+class WriteBehindQueue:
+    """Bounded queue of records committed to one collection in batches"""
+
+    def __init__(self, db, collection: str, max_batch: int = 100, flush_interval_s: float = 1.0,
+                 max_queue: int = 10000, overflow: str = "drop", spill_path: Optional[str] = None,
+                 block_timeout_s: float = 5.0, max_retries: int = 3, retry_backoff_s: float = 0.5,
+                 server_timestamp: Any = None):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {OVERFLOW_POLICIES}, got {overflow!r}")
+        if overflow == "spill" and not spill_path:
+            raise ValueError("overflow='spill' requires spill_path")
+
+        # Client and sentinel may be given as zero-argument functions to defer initialization
+        self._db = db
+        self.collection = collection
+        self.max_batch = min(max_batch, FIRESTORE_BATCH_LIMIT)
+        self.flush_interval_s = flush_interval_s
+        self.max_queue = max_queue
+        # Commit as soon as a full batch is queued, or the queue itself is full
+        self._flush_at = min(self.max_batch, max_queue)
+        self.overflow = overflow
+        self.spill_path = spill_path
+        self.block_timeout_s = block_timeout_s
+        self.max_retries = max_retries
+        self.retry_backoff_s = retry_backoff_s
+        # Sentinel that must round-trip through the spill file (firestore.SERVER_TIMESTAMP)
+        self._server_timestamp = server_timestamp
+
+        self._queue: deque = deque()
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._spill_lock = threading.Lock()
+        self._counters = {"enqueued": 0, "written": 0, "batches": 0, "retries": 0,
+                          "failed_batches": 0, "dropped": 0, "spilled": 0, "replayed": 0,
+                          "blocked": 0}
+        self._max_depth = 0
+        self._last_commit_ms = 0
+        atexit.register(self.close)
+
+    @property
+    def db(self):
+        if callable(self._db) and not hasattr(self._db, "batch"):
+            self._db = self._db()
+        return self._db
+
+    @db.setter
+    def db(self, value):
+        self._db = value
+
+    @property
+    def server_timestamp(self):
+        if callable(self._server_timestamp):
+            self._server_timestamp = self._server_timestamp()
+        return self._server_timestamp
+
+    # -----------------------------
+    # Producer side
+    # -----------------------------
+    def enqueue(self, record: Dict) -> bool:
+        """Queue one record; returns False if it was dropped or spilled"""
+        return self.enqueue_many([record]) == 1
+
+    def enqueue_many(self, records: List[Dict]) -> int:
+        """Queue records; returns how many were accepted into memory"""
+        self._ensure_started()
+        accepted = 0
+        overflow = []
+        with self._cond:
+            for record in records:
+                if len(self._queue) >= self.max_queue and self.overflow == "block":
+                    self._counters["blocked"] += 1
+                    self._cond.notify_all()
+                    self._cond.wait_for(lambda: len(self._queue) < self.max_queue or self._closed,
+                                        timeout=self.block_timeout_s)
+                if len(self._queue) < self.max_queue and not self._closed:
+                    self._queue.append(record)
+                    accepted += 1
+                    self._max_depth = max(self._max_depth, len(self._queue))
+                else:
+                    overflow.append(record)
+            self._counters["enqueued"] += accepted
+            if len(self._queue) >= self._flush_at:
+                self._cond.notify_all()
+
+        if overflow:
+            if self.overflow == "spill":
+                self._spill(overflow)
+            else:
+                with self._cond:
+                    self._counters["dropped"] += len(overflow)
+                print(f"Write-behind queue full, dropped {len(overflow)} record(s)")
+        return accepted
+
+    # -----------------------------
+    # Consumer side
+    # -----------------------------
+    def _ensure_started(self) -> None:
+        # The writer thread does not survive fork(); start one per process
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._cond:
+            if self._thread is None or not self._thread.is_alive() or self._pid != os.getpid():
+                if self._pid is not None and self._pid != os.getpid():
+                    # Records inherited from the parent are the parent's to write
+                    self._queue.clear()
+                    self._in_flight = 0
+                self._pid = os.getpid()
+                self._closed = False
+                self._thread = threading.Thread(target=self._run, name=f"write-behind-{self.collection}",
+                                                daemon=True)
+                self._thread.start()
+
+    def _take_batch(self) -> List[Dict]:
+        # Caller holds self._cond
+        batch = []
+        while self._queue and len(batch) < self.max_batch:
+            batch.append(self._queue.popleft())
+        self._in_flight = len(batch)
+        self._cond.notify_all()
+        return batch
+
+    def _run(self) -> None:
+        self._replay_spill()
+        while True:
+            with self._cond:
+                deadline = time.monotonic() + self.flush_interval_s
+                while len(self._queue) < self._flush_at and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if self._closed and not self._queue:
+                    return
+                batch = self._take_batch()
+
+            if batch:
+                self._commit_with_retry(batch)
+                with self._cond:
+                    self._in_flight = 0
+                    self._cond.notify_all()
+                    # After close, spilled records wait for the next process
+                    has_room = len(self._queue) < self.max_queue // 2 and not self._closed
+                if has_room:
+                    self._replay_spill()
+
+    def _commit_with_retry(self, records: List[Dict]) -> None:
+        for attempt in range(self.max_retries + 1):
+            start = time.monotonic()
+            try:
+                batch = self.db.batch()
+                collection = self.db.collection(self.collection)
+                for record in records:
+                    batch.set(collection.document(), record)
+                with metrics.upstream("firestore"):
+                    batch.commit()
+                with self._cond:
+                    self._counters["written"] += len(records)
+                    self._counters["batches"] += 1
+                    self._last_commit_ms = round((time.monotonic() - start) * 1000)
+                return
+            except Exception as e:
+                print(f"Firestore batch commit failed (attempt {attempt + 1}): {e}")
+                if attempt < self.max_retries:
+                    with self._cond:
+                        self._counters["retries"] += 1
+                    time.sleep(self.retry_backoff_s * (2 ** attempt))
+
+        with self._cond:
+            self._counters["failed_batches"] += 1
+        if self.spill_path:
+            self._spill(records)
+        else:
+            with self._cond:
+                self._counters["dropped"] += len(records)
+
+    # -----------------------------
+    # Spill file
+    # -----------------------------
+    def _encode(self, value):
+        if self.server_timestamp is not None and value is self.server_timestamp:
+            return _SERVER_TIMESTAMP_MARKER
+        return str(value)
+
+    def _decode(self, record: Dict) -> Dict:
+        return {key: (self.server_timestamp if value == _SERVER_TIMESTAMP_MARKER else value)
+                for key, value in record.items()}
+
+    @contextmanager
+    def _spill_locked(self):
+        """Exclusive use of the spill file, against this process's threads and other processes"""
+        with self._spill_lock:
+            if fcntl is None:
+                yield
+                return
+            # Opened per use: flocks belong to the open file, which a fork would share
+            fd = os.open(self.spill_path + ".lock", os.O_CREAT | os.O_RDWR, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                yield
+            finally:
+                os.close(fd)  # Releases the flock
+
+    def _spill(self, records: List[Dict]) -> None:
+        try:
+            with self._spill_locked(), open(self.spill_path, "a", encoding="utf-8") as f:
+                for record in records:
+                    f.write(json.dumps(record, default=self._encode) + "\n")
+            with self._cond:
+                self._counters["spilled"] += len(records)
+        except OSError as e:
+            print(f"Write-behind spill failed, dropped {len(records)} record(s): {e}")
+            with self._cond:
+                self._counters["dropped"] += len(records)
+
+    def _replay_spill(self) -> None:
+        """Move spilled records back into the queue while there is room"""
+        if not self.spill_path:
+            return
+        with self._spill_locked():
+            if not os.path.exists(self.spill_path):
+                return
+            with open(self.spill_path, "r", encoding="utf-8") as f:
+                lines = [line for line in f if line.strip()]
+            with self._cond:
+                room = max(self.max_queue - len(self._queue), 0)
+                for line in lines[:room]:
+                    self._queue.append(self._decode(json.loads(line)))
+                self._counters["replayed"] += min(room, len(lines))
+                self._max_depth = max(self._max_depth, len(self._queue))
+            rest = lines[room:]
+            if rest:
+                tmp_path = f"{self.spill_path}.{os.getpid()}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.writelines(rest)
+                os.replace(tmp_path, self.spill_path)
+            else:
+                os.remove(self.spill_path)
+
+    # -----------------------------
+    # Lifecycle and metrics
+    # -----------------------------
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Wait until everything queued so far is committed"""
+        if self._thread is None or not self._thread.is_alive():
+            return not self._queue
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._cond.notify_all()
+            while self._queue or self._in_flight:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(min(remaining, self.flush_interval_s))
+                self._cond.notify_all()
+        return True
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Flush pending records and stop the writer thread"""
+        if self._pid is not None and self._pid != os.getpid():
+            return
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        thread = self._thread
+        if thread is not None and thread.is_alive() and self._pid == os.getpid():
+            thread.join(timeout)
+        with self._cond:
+            leftover = list(self._queue)
+            self._queue.clear()
+        if leftover:
+            if self.spill_path:
+                self._spill(leftover)
+            else:
+                print(f"Write-behind shutdown dropped {len(leftover)} record(s)")
+                self._counters["dropped"] += len(leftover)
+
+    def metrics(self) -> Dict:
+        with self._cond:
+            return dict(self._counters, depth=len(self._queue), in_flight=self._in_flight,
+                        max_depth=self._max_depth, capacity=self.max_queue,
+                        overflow_policy=self.overflow, last_commit_ms=self._last_commit_ms)
@@ -1,6 +1,5 @@
 import React, { useState } from 'react';
 import { TextField, Button, Select, MenuItem, FormControl, InputLabel, CircularProgress } from '@mui/material';
-import axios from 'axios';
 import { useTranslation } from 'react-i18next';
 
 const CheckForm = ({ onResults }) => {
@@ -10,12 +9,56 @@ const CheckForm = ({ onResults }) => {
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState('');
 
+  // Apply one streamed event to the partial results shown so far
+  const applyEvent = (current, { event, ...payload }) => {
+    switch (event) {
+      case 'claims':
+        return { ...current, ...payload };
+      case 'provisional_risk':
+        return { ...current, risk: payload.risk, provisional: true };
+      case 'evidence':
+        return { ...current, evidence: [...(current.evidence || []), ...payload.evidence] };
+      case 'result':
+        return { ...payload, provisional: false };
+      case 'error':
+        throw new Error(payload.error);
+      default:
+        return current;
+    }
+  };
+
   const handleSubmit = async () => {
     setLoading(true);
     setError('');
     try {
-      const response = await axios.post('http://localhost:5000/v1/check', { text, lang });
-      onResults(response.data);
+      // Stream NDJSON so local results render before the evidence lookups finish
+      const response = await fetch('http://localhost:5000/v1/check', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ text, lang, stream: true }),
+      });
+      if (!response.ok) {
+        const body = await response.json().catch(() => ({}));
+        throw new Error(body.error || `Request failed with status ${response.status}`);
+      }
+
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      let results = { evidence: [] };
+      for (;;) {
+        const { done, value } = await reader.read();
+        buffer += decoder.decode(value || new Uint8Array(), { stream: !done });
+        const lines = buffer.split('\n');
+        buffer = done ? '' : lines.pop();
+        for (const line of lines) {
+          if (line.trim()) {
+            results = applyEvent(results, JSON.parse(line));
+            onResults(results);
+          }
+        }
+        if (done) break;
+      }
     } catch (err) {
       setError('Error checking: ' + err.message);
     }
@@ -1,5 +1,5 @@
 import React from 'react';
-import { Typography, Box, List, ListItem, Button } from '@mui/material';
+import { Typography, Box, List, ListItem, Button, CircularProgress } from '@mui/material';
 import ReactMarkdown from 'react-markdown';
 import jsPDF from 'jspdf';
 import html2canvas from 'html2canvas';
@@ -9,7 +9,8 @@ const ResultsDisplay = ({ results }) => {
   const { t } = useTranslation();
   if (!results) return <Typography>{t('loading')}</Typography>;
 
-  const { risk, explanation_md, lesson_md, evidence } = results;
+  // While streaming, risk is provisional and the explanation and lesson are not in yet
+  const { risk, explanation_md, lesson_md, evidence = [], provisional } = results;
 
   const handleShare = async () => {
     const input = document.getElementById('report-content');
@@ -22,8 +23,13 @@ const ResultsDisplay = ({ results }) => {
 
   return (
     <Box id="report-content">
-      <Typography variant="h5">{t('riskScore')}: {risk.score}/100 {risk.score >= 70 ? `(${t('highRisk')})` : ''}</Typography>
-      <ReactMarkdown>{explanation_md}</ReactMarkdown>
+      {risk && (
+        <Typography variant="h5">
+          {t('riskScore')}: {risk.score}/100 {risk.score >= 70 ? `(${t('highRisk')})` : ''}
+          {provisional && <CircularProgress size={16} sx={{ ml: 1 }} />}
+        </Typography>
+      )}
+      {explanation_md && <ReactMarkdown>{explanation_md}</ReactMarkdown>}
       <Typography variant="h6">Evidence:</Typography>
       <List>
         {evidence.map((ev, i) => (
@@ -32,7 +38,7 @@ const ResultsDisplay = ({ results }) => {
           </ListItem>
         ))}
       </List>
-      <ReactMarkdown>{lesson_md}</ReactMarkdown>
+      {lesson_md && <ReactMarkdown>{lesson_md}</ReactMarkdown>}
       <Button variant="outlined" onClick={handleShare}>{t('shareReport')}</Button>
     </Box>
   );